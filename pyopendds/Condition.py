@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from .constants import SampleState, ViewState, InstanceState, StatusKind
+if TYPE_CHECKING:
+    from .DataReader import DataReader
+
+
+class Condition:
+    '''Base of the conditions that can be attached to a WaitSet.
+    '''
+
+    _native: Any
+
+    def get_trigger_value(self) -> bool:
+        from _pyopendds import condition_get_trigger_value
+        return condition_get_trigger_value(self._native)
+
+    def _id(self) -> int:
+        from _pyopendds import condition_id
+        return condition_id(self._native)
+
+
+class GuardCondition(Condition):
+    '''Condition triggered by the application, for example to wake up a thread
+    waiting on a WaitSet.
+    '''
+
+    def __init__(self) -> None:
+        from _pyopendds import create_guardcondition
+        self._native = create_guardcondition()
+
+    def set_trigger_value(self, value: bool) -> None:
+        from _pyopendds import guardcondition_set_trigger_value
+        guardcondition_set_trigger_value(self._native, value)
+
+
+class ReadCondition(Condition):
+    '''Condition triggered while a reader has samples in the given states.
+    Create these with DataReader.create_readcondition.
+    '''
+
+    def __init__(self, reader: DataReader,
+            sample_states: SampleState = SampleState.ANY,
+            view_states: ViewState = ViewState.ANY,
+            instance_states: InstanceState = InstanceState.ANY) -> None:
+        self.reader = reader
+        self.sample_states = SampleState(sample_states)
+        self.view_states = ViewState(view_states)
+        self.instance_states = InstanceState(instance_states)
+
+        from _pyopendds import datareader_create_readcondition
+        self._native = datareader_create_readcondition(reader._native,
+            self.sample_states, self.view_states, self.instance_states)
+
+
+class StatusCondition(Condition):
+    '''Condition triggered while an entity has a change in one of its enabled
+    statuses. Get these with DataReader.get_statuscondition.
+    '''
+
+    def __init__(self, entity: Any, native: Any) -> None:
+        self.entity = entity
+        self._native = native
+
+    def get_enabled_statuses(self) -> StatusKind:
+        from _pyopendds import statuscondition_get_enabled_statuses
+        return StatusKind(statuscondition_get_enabled_statuses(self._native))
+
+    def set_enabled_statuses(self, mask: StatusKind) -> None:
+        from _pyopendds import statuscondition_set_enabled_statuses
+        statuscondition_set_enabled_statuses(self._native, mask)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Tuple
+
+from .Topic import Topic
+from .qos import TopicQos
+if TYPE_CHECKING:
+    from .DomainParticipant import DomainParticipant
+
+
+def _parameters(parameters: Iterable[Any]) -> Tuple[str, ...]:
+    if isinstance(parameters, str):
+        raise TypeError('Expression parameters must be an iterable of parameters')
+    return tuple(str(parameter) for parameter in parameters)
+
+
+class ContentFilteredTopic:
+    '''A topic of only the samples of another topic that match a filter
+    expression, which can be used anywhere a Topic can be used to create a
+    reader. The samples are filtered in the native code before they're
+    converted to Python, and writers can filter them before sending them.
+
+    Parameters are referenced in the expression as %0, %1, and so on. They
+    are passed to OpenDDS as strings, so string parameters need quotes.
+    '''
+
+    def __init__(self,
+            participant: DomainParticipant, name: str, topic: Topic,
+            filter_expression: str, expression_parameters: Iterable[Any] = ()):
+        participant.content_filtered_topics[name] = self
+        self.name = name
+        self.topic = topic
+        self.filter_expression = filter_expression
+        self.expression_parameters = _parameters(expression_parameters)
+
+        from _pyopendds import create_contentfilteredtopic
+        self._native = create_contentfilteredtopic(
+            participant._native, name, topic._native, filter_expression,
+            self.expression_parameters)
+
+    @property
+    def type(self) -> Any:
+        return self.topic.type
+
+    @property
+    def type_name(self) -> str:
+        return self.topic.type_name
+
+    @property
+    def qos(self) -> Optional[TopicQos]:
+        return self.topic.qos
+
+    @property
+    def _ts_package(self) -> Any:
+        return self.topic._ts_package
+
+    def set_expression_parameters(self, expression_parameters: Iterable[Any]) -> None:
+        '''Change the parameters of the filter expression. This applies to
+        the readers that were already created.
+        '''
+        from _pyopendds import contentfilteredtopic_set_expression_parameters
+        parameters = _parameters(expression_parameters)
+        contentfilteredtopic_set_expression_parameters(self._native, parameters)
+        self.expression_parameters = parameters
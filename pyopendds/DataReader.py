@@ -1,29 +1,350 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import weakref
+
 from .Topic import Topic
-from .constants import StatusKind
+from .ContentFilteredTopic import ContentFilteredTopic
+from .Condition import ReadCondition, StatusCondition
+from .constants import (
+    StatusKind, SampleState, ViewState, InstanceState, LENGTH_UNLIMITED, HANDLE_NIL)
+from .listener import DataReaderListener, default_dispatcher, dispatch_reader_event
+from .qos import DataReaderQos, QosArg, resolve_qos, native_qos
 from .util import TimeDurationType, normalize_time_duration
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, AsyncIterator, Tuple, Union
 if TYPE_CHECKING:
     from .Subscriber import Subscriber
 
 
 class DataReader:
 
-    def __init__(self, subscriber: Subscriber, topic: Topic, qos=None, listener=None):
+    def __init__(self,
+            subscriber: Subscriber, topic: Union[Topic, ContentFilteredTopic],
+            qos: QosArg = None, listener: Optional[DataReaderListener] = None):
         self.topic = topic
-        self.qos = qos
-        self.listener = listener
+        self.qos = resolve_qos(qos, DataReaderQos, 'datareader')
+        self.listener: Optional[DataReaderListener] = None
         self.subscriber = subscriber
+        self._fileno: Optional[int] = None
+        self._statuscondition: Optional[StatusCondition] = None
         subscriber.readers.append(self)
 
         from _pyopendds import create_datareader
-        create_datareader(self, subscriber, topic)
+        self._native: Any = create_datareader(subscriber._native, topic._native,
+            native_qos((self.qos or DataReaderQos()).with_topic_qos(topic.qos)))
+        self._ts_package = topic._ts_package
+        self._ts_package.bind(self._native)
+        if listener is not None:
+            self.set_listener(listener)
+
+    def set_listener(self, listener: Optional[DataReaderListener]) -> None:
+        '''Replace the listener of the reader, or remove it if listener is
+        None. See pyopendds.listener. A reader can't have a listener and use
+        fileno at the same time.
+        '''
+        from _pyopendds import datareader_set_listener
+        if listener is None:
+            datareader_set_listener(self._native, None, None, 0)
+        else:
+            dispatcher = listener.dispatcher or default_dispatcher()
+            datareader_set_listener(self._native, dispatcher._native,
+                functools.partial(dispatch_reader_event, weakref.ref(self)),
+                listener.status_mask())
+        self.listener = listener
 
     def wait_for(self, status: StatusKind, timeout: TimeDurationType):
         from _pyopendds import datareader_wait_for
-        return datareader_wait_for(self, status, *normalize_time_duration(timeout))
+        return datareader_wait_for(self._native, status, *normalize_time_duration(timeout))
+
+    def get_statuscondition(self) -> StatusCondition:
+        '''Return the StatusCondition of the reader, which is always the same
+        object.
+        '''
+        if self._statuscondition is None:
+            from _pyopendds import datareader_get_statuscondition
+            self._statuscondition = StatusCondition(
+                self, datareader_get_statuscondition(self._native))
+        return self._statuscondition
+
+    def create_readcondition(self,
+            sample_states: SampleState = SampleState.ANY,
+            view_states: ViewState = ViewState.ANY,
+            instance_states: InstanceState = InstanceState.ANY) -> ReadCondition:
+        '''Return a ReadCondition that's triggered while the reader has samples
+        in the given states.
+        '''
+        return ReadCondition(self, sample_states, view_states, instance_states)
+
+    def delete_readcondition(self, condition: ReadCondition) -> None:
+        from _pyopendds import datareader_delete_readcondition
+        datareader_delete_readcondition(self._native, condition._native)
+
+    def fileno(self) -> int:
+        '''Return a file descriptor that becomes readable when the reader has
+        data available, for use with select and event loops. It stops being
+        readable when take or read is called.
+        '''
+        if self._fileno is None:
+            from _pyopendds import datareader_notify_fileno
+            self._fileno = datareader_notify_fileno(self._native)
+        return self._fileno
+
+    def _reset_notification(self):
+        if self._fileno is not None:
+            from _pyopendds import datareader_reset_notification
+            datareader_reset_notification(self._native)
 
     def take_next_sample(self):
-        return self.topic._ts_package.take_next_sample(self)
+        self._reset_notification()
+        return self._ts_package.take_next_sample(self._native)
+
+    def take(self, max_samples: int = LENGTH_UNLIMITED,
+            timeout: TimeDurationType = 0, with_info: bool = False) -> List[Any]:
+        '''Take up to max_samples samples from the reader in one native call.
+
+        Returns immediately if there are samples available, otherwise waits up
+        to timeout for some to arrive. Returns an empty list if none did.
+
+        With with_info, each item is a tuple of the sample and a compact
+        SampleInfo named tuple with source_timestamp and take_timestamp in
+        integer nanoseconds since the epoch, instance_handle,
+        publication_handle, sample_state, view_state, and instance_state.
+        '''
+        self._reset_notification()
+        take = self._ts_package.take_with_info if with_info else self._ts_package.take
+        return take(self._native, max_samples, *normalize_time_duration(timeout))
+
+    def read(self, max_samples: int = LENGTH_UNLIMITED,
+            timeout: TimeDurationType = 0, with_info: bool = False) -> List[Any]:
+        '''Same as take, but leaves the samples in the reader.
+        '''
+        self._reset_notification()
+        read = self._ts_package.read_with_info if with_info else self._ts_package.read
+        return read(self._native, max_samples, *normalize_time_duration(timeout))
+
+    def take_array(self, max_samples: int = LENGTH_UNLIMITED,
+            timeout: TimeDurationType = 0) -> Any:
+        '''Same as take, but returns the samples as a NumPy structured array
+        with a column for each field. Numeric and enum fields are copied
+        straight from the native samples, other fields are object columns.
+        Requires NumPy, see pyopendds.array.
+        '''
+        return self._take_array(self._ts_package.take_array, max_samples, timeout)
+
+    def read_array(self, max_samples: int = LENGTH_UNLIMITED,
+            timeout: TimeDurationType = 0) -> Any:
+        '''Same as take_array, but leaves the samples in the reader.
+        '''
+        return self._take_array(self._ts_package.read_array, max_samples, timeout)
+
+    def take_serialized(self, max_samples: int = LENGTH_UNLIMITED,
+            timeout: TimeDurationType = 0) -> List[memoryview]:
+        '''Same as take, but returns the samples serialized as classic CDR
+        instead of converting them, for passing them on or decoding only some
+        of their fields with the view classes itl2py generates for each topic
+        type, like ReadingView for Reading. See pyopendds.cdr. Raises
+        TypeError for types that can't be decoded from CDR.
+        '''
+        self._check_cdr_decodable()
+        self._reset_notification()
+        return self._ts_package.take_serialized(
+            self._native, max_samples, *normalize_time_duration(timeout))
+
+    def read_serialized(self, max_samples: int = LENGTH_UNLIMITED,
+            timeout: TimeDurationType = 0) -> List[memoryview]:
+        '''Same as take_serialized, but leaves the samples in the reader.
+        '''
+        self._check_cdr_decodable()
+        self._reset_notification()
+        return self._ts_package.read_serialized(
+            self._native, max_samples, *normalize_time_duration(timeout))
+
+    def _check_cdr_decodable(self) -> None:
+        if not hasattr(self.topic.type, '_pyopendds_cdr_fields'):
+            raise TypeError(
+                "{} has fields that can't be decoded from CDR, like 128-bit numbers".format(
+                    self.topic.type.__name__))
+
+    def take_lazy(self, max_samples: int = LENGTH_UNLIMITED,
+            timeout: TimeDurationType = 0) -> List[Any]:
+        '''Same as take, but returns native proxies of the samples that only
+        convert a field to Python when it's first accessed. materialize()
+        on a proxy returns the regular sample. Requires the package to be
+        generated with itl2py --lazy-samples.
+        '''
+        self._reset_notification()
+        return self._ts_package.take_lazy(
+            self._native, max_samples, *normalize_time_duration(timeout))
+
+    def read_lazy(self, max_samples: int = LENGTH_UNLIMITED,
+            timeout: TimeDurationType = 0) -> List[Any]:
+        '''Same as take_lazy, but leaves the samples in the reader.
+        '''
+        self._reset_notification()
+        return self._ts_package.read_lazy(
+            self._native, max_samples, *normalize_time_duration(timeout))
+
+    def _take_array(self, take_array, max_samples, timeout):
+        from .array import make_array
+        self._reset_notification()
+        return make_array(self.topic.type,
+            *take_array(self._native, max_samples, *normalize_time_duration(timeout)))
+
+    def lookup_instance(self, sample: Any) -> int:
+        '''Return the handle of the instance with the same key as the sample,
+        or HANDLE_NIL if the reader doesn't know about the instance.
+        '''
+        return self._ts_package.lookup_instance(self._native, sample)
+
+    def take_instance(self, handle: int, max_samples: int = LENGTH_UNLIMITED) -> List[Any]:
+        '''Take up to max_samples samples of the instance with the handle,
+        without waiting. Returns an empty list if there aren't any.
+        '''
+        self._reset_notification()
+        return self._ts_package.take_instance(self._native, handle, max_samples)
+
+    def read_instance(self, handle: int, max_samples: int = LENGTH_UNLIMITED) -> List[Any]:
+        '''Same as take_instance, but leaves the samples in the reader.
+        '''
+        self._reset_notification()
+        return self._ts_package.read_instance(self._native, handle, max_samples)
+
+    def take_next_instance(self, previous: int = HANDLE_NIL,
+            max_samples: int = LENGTH_UNLIMITED) -> Tuple[int, List[Any]]:
+        '''Take up to max_samples samples of the instance that comes after
+        previous in the order of the handles, without waiting. Returns the
+        handle of that instance and the samples, or HANDLE_NIL and an empty
+        list when there are no more instances with samples. Start with
+        HANDLE_NIL to go through all the instances.
+        '''
+        self._reset_notification()
+        return self._ts_package.take_next_instance(self._native, previous, max_samples)
+
+    def read_next_instance(self, previous: int = HANDLE_NIL,
+            max_samples: int = LENGTH_UNLIMITED) -> Tuple[int, List[Any]]:
+        '''Same as take_next_instance, but leaves the samples in the reader.
+        '''
+        self._reset_notification()
+        return self._ts_package.read_next_instance(self._native, previous, max_samples)
+
+    def enable_last_value_cache(self) -> None:
+        '''Keep the newest sample of each instance in native code for
+        last_value and changed_last_values. Those take all the samples from
+        the reader, but only convert the samples they return to Python, once
+        for each new sample. The reader shouldn't be used with take, read, or a
+        listener after this.
+        '''
+        self._ts_package.enable_last_value_cache(self._native)
+
+    def last_value(self, instance: Any) -> Optional[Any]:
+        '''Return the newest sample of an instance, given its handle or a
+        sample with its key, from the last value cache. Returns None if there
+        isn't one. The same sample object is returned until a newer one
+        arrives, so it shouldn't be modified.
+        '''
+        handle = instance if isinstance(instance, int) else self.lookup_instance(instance)
+        self._reset_notification()
+        return self._ts_package.last_value(self._native, handle)
+
+    def changed_last_values(self) -> Dict[int, Optional[Any]]:
+        '''Return the newest sample of each instance that got a new sample
+        since the last call, by handle, from the last value cache. Disposed
+        instances are None.
+        '''
+        self._reset_notification()
+        return self._ts_package.changed_last_values(self._native)
+
+    def string_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        '''Return the hits, misses, hit rate, entries, capacity, and estimated
+        memory in bytes of the caches of string fields passed to itl2py
+        --intern-strings, by the scoped name of the field. The caches are
+        shared by all the readers using the same generated package.
+        '''
+        return self._ts_package.string_cache_stats()
+
+    def stats(self) -> Dict[str, Any]:
+        '''Return the counters the native code keeps for this reader:
+
+        - samples: samples taken or read
+        - batches: take and read calls that returned samples
+        - bytes: serialized size of the samples taken by take_serialized
+        - wait_ns: nanoseconds spent waiting for samples to arrive
+        - take_ns: nanoseconds spent in the OpenDDS take and read calls
+        - convert_ns: nanoseconds spent converting the samples to Python
+        - backlog: samples the reader holds that haven't been taken yet
+        - string_caches: string_cache_stats()
+        '''
+        from _pyopendds import datareader_stats
+        stats = datareader_stats(self._native)
+        stats['string_caches'] = self.string_cache_stats()
+        return stats
+
+    def enable_latency_stats(self) -> None:
+        '''Start recording the time from when each sample was written, its
+        source timestamp, to when it's taken or read for the first time into a
+        native histogram for latency_stats. This is cheap enough to leave on,
+        but the clocks of the writer and the reader have to be in sync.
+        '''
+        from _pyopendds import datareader_enable_latency_stats
+        datareader_enable_latency_stats(self._native)
+
+    def latency_stats(self) -> Optional[Dict[str, Any]]:
+        '''Return the latencies recorded since enable_latency_stats or
+        reset_stats, or None if they aren't enabled:
+
+        - count: samples recorded
+        - mean_ns: mean latency in nanoseconds
+        - p50_ns, p99_ns, p99_9_ns: percentiles in nanoseconds, within 1/32
+        - max_ns: highest latency in nanoseconds
+
+        Samples that appear to be from the future because of clock differences
+        are counted as 0.
+        '''
+        from _pyopendds import datareader_latency_stats
+        return datareader_latency_stats(self._native)
+
+    def reset_stats(self) -> None:
+        '''Set the counters returned by stats and the latencies returned by
+        latency_stats to zero. This also resets the string caches, which are
+        shared with other readers of the same type.
+        '''
+        from _pyopendds import datareader_reset_stats
+        datareader_reset_stats(self._native)
+        self._ts_package.reset_string_cache_stats()
+
+    async def _data_available(self) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def readable():
+            if not future.done():
+                future.set_result(None)
+
+        fd = self.fileno()
+        loop.add_reader(fd, readable)
+        try:
+            await future
+        finally:
+            loop.remove_reader(fd)
+
+    async def take_async(self, max_samples: int = LENGTH_UNLIMITED) -> List[Any]:
+        '''Take up to max_samples samples from the reader, waiting in the
+        running event loop until there are some if there are none available.
+        '''
+        # Get notifications before taking, so none are missed in between
+        self.fileno()
+        while True:
+            samples = self.take(max_samples)
+            if samples:
+                return samples
+            await self._data_available()
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        '''Asynchronously iterate over samples as they arrive, taking them from
+        the reader in batches.
+        '''
+        while True:
+            for sample in await self.take_async():
+                yield sample
@@ -1,2 +1,42 @@
+from __future__ import annotations
+
+from .Topic import Topic
+from .constants import StatusKind
+from .qos import DataWriterQos, QosArg, resolve_qos, native_qos
+from .util import TimeDurationType, normalize_time_duration
+
+from typing import TYPE_CHECKING, Any, Iterable
+if TYPE_CHECKING:
+    from .Publisher import Publisher
+
+
 class DataWriter:
-    pass
+
+    def __init__(self, publisher: Publisher, topic: Topic, qos: QosArg = None, listener=None):
+        self.topic = topic
+        self.qos = resolve_qos(qos, DataWriterQos, 'datawriter')
+        self.listener = listener
+        self.publisher = publisher
+        publisher.writers.append(self)
+
+        from _pyopendds import create_datawriter
+        self._native = create_datawriter(publisher._native, topic._native,
+            native_qos((self.qos or DataWriterQos()).with_topic_qos(topic.qos)))
+        self._ts_package = topic._ts_package
+        self._ts_package.bind(self._native)
+
+    def wait_for(self, status: StatusKind, timeout: TimeDurationType):
+        from _pyopendds import datawriter_wait_for
+        return datawriter_wait_for(self._native, status, *normalize_time_duration(timeout))
+
+    def write(self, sample: Any) -> None:
+        self._ts_package.write(self._native, sample)
+
+    def write_many(self, samples: Iterable[Any]) -> None:
+        '''Write all the samples in one native call. All the samples are
+        converted before any are written.
+        '''
+        self._ts_package.write_many(self._native, samples)
+
+    def dispose(self, sample: Any) -> None:
+        self._ts_package.dispose(self._native, sample)
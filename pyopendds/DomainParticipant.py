@@ -1,34 +1,52 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List
 
 from .Topic import Topic
+from .ContentFilteredTopic import ContentFilteredTopic
 from .Subscriber import Subscriber
 from .Publisher import Publisher
+from .qos import DomainParticipantQos, QosArg, resolve_qos, native_qos
+from .util import sum_stats
 
 
 class DomainParticipant:
 
-    def __init__(self, domain: int, qos=None, listener=None):
+    def __init__(self, domain: int, qos: QosArg = None, listener=None):
         self.domain = int(domain)
-        self.qos = qos
+        self.qos = resolve_qos(qos, DomainParticipantQos, 'participant')
         self.listener = listener
         self.topics: Dict[str, Topic] = {}
+        self.content_filtered_topics: Dict[str, ContentFilteredTopic] = {}
         self.subscribers: List[Subscriber] = []
         self.publishers: List[Publisher] = []
-        self._registered_typesupport: List[Any] = []
+        self._registered_typesupport: Dict[type, Any] = {}
 
         from _pyopendds import create_participant
-        create_participant(self, domain)
+        self._native = create_participant(domain, native_qos(self.qos))
 
     def __del__(self):
         from _pyopendds import participant_cleanup
-        participant_cleanup(self)
+        participant_cleanup(self._native)
 
     def create_topic(self,
-            name: str, topic_type: type, qos=None, listener=None) -> Topic:
+            name: str, topic_type: type, qos: QosArg = None, listener=None) -> Topic:
         return Topic(self, name, topic_type, qos, listener)
 
-    def create_subscriber(self, qos=None, listener=None) -> Subscriber:
+    def create_contentfilteredtopic(self,
+            name: str, topic: Topic, filter_expression: str,
+            expression_parameters: Iterable[Any] = ()) -> ContentFilteredTopic:
+        return ContentFilteredTopic(self, name, topic, filter_expression, expression_parameters)
+
+    def create_subscriber(self, qos: QosArg = None, listener=None) -> Subscriber:
         return Subscriber(self, qos, listener)
 
-    def create_publisher(self, qos=None, listener=None) -> Publisher:
+    def create_publisher(self, qos: QosArg = None, listener=None) -> Publisher:
         return Publisher(self, qos, listener)
+
+    def stats(self) -> Dict[str, Any]:
+        '''Return the stats of all the readers of this participant added up.
+        '''
+        return sum_stats(subscriber.stats() for subscriber in self.subscribers)
+
+    def reset_stats(self) -> None:
+        for subscriber in self.subscribers:
+            subscriber.reset_stats()
@@ -1,22 +1,23 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING, List
 
+from .DataWriter import DataWriter
 from .Topic import Topic
+from .qos import PublisherQos, QosArg, resolve_qos, native_qos
 if TYPE_CHECKING:
     from .DomainParticipant import DomainParticipant
-    from .DataWriter import DataWriter
 
 
 class Publisher:
 
-    def __init__(self, participant: DomainParticipant, qos=None, listener=None):
+    def __init__(self, participant: DomainParticipant, qos: QosArg = None, listener=None):
+        self.qos = resolve_qos(qos, PublisherQos, 'publisher')
         participant.publishers.append(self)
-        self.qos = qos
         self.listener = listener
         self.writers: List[DataWriter] = []
 
         from _pyopendds import create_publisher
-        create_publisher(self, participant)
+        self._native = create_publisher(participant._native, native_qos(self.qos))
 
-    def create_datawriter(self, topic: Topic, qos=None, listener=None):
-        pass
+    def create_datawriter(self, topic: Topic, qos: QosArg = None, listener=None):
+        return DataWriter(self, topic, qos, listener)
@@ -1,22 +1,36 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
 from .DataReader import DataReader
 from .Topic import Topic
+from .ContentFilteredTopic import ContentFilteredTopic
+from .listener import DataReaderListener
+from .qos import SubscriberQos, QosArg, resolve_qos, native_qos
+from .util import sum_stats
 if TYPE_CHECKING:
     from .DomainParticipant import DomainParticipant
 
 
 class Subscriber:
 
-    def __init__(self, participant: DomainParticipant, qos=None, listener=None):
+    def __init__(self, participant: DomainParticipant, qos: QosArg = None, listener=None):
+        self.qos = resolve_qos(qos, SubscriberQos, 'subscriber')
         participant.subscribers.append(self)
-        self.qos = qos
         self.listener = listener
         self.readers: List[DataReader] = []
 
         from _pyopendds import create_subscriber
-        create_subscriber(self, participant)
+        self._native = create_subscriber(participant._native, native_qos(self.qos))
 
-    def create_datareader(self, topic: Topic, qos=None, listener=None):
+    def create_datareader(self, topic: Union[Topic, ContentFilteredTopic], qos: QosArg = None,
+            listener: Optional[DataReaderListener] = None) -> DataReader:
         return DataReader(self, topic, qos, listener)
+
+    def stats(self) -> Dict[str, Any]:
+        '''Return the stats of all the readers of this subscriber added up.
+        '''
+        return sum_stats(reader.stats() for reader in self.readers)
+
+    def reset_stats(self) -> None:
+        for reader in self.readers:
+            reader.reset_stats()
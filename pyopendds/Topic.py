@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any
+
+from .qos import TopicQos, QosArg, resolve_qos, native_qos
 if TYPE_CHECKING:
     from .DomainParticipant import DomainParticipant
 
@@ -9,11 +11,11 @@ class Topic:
 
     def __init__(self,
             participant: DomainParticipant, name: str, topic_type: Any,
-            qos=None, listener=None):
+            qos: QosArg = None, listener=None):
+        self.qos = resolve_qos(qos, TopicQos, 'topic')
         participant.topics[name] = self
         self.name = name
         self.type = topic_type
-        self.qos = qos
         self.listener = listener
 
         # Get OpenDDS Topic Type Name
@@ -22,8 +24,10 @@ class Topic:
             importlib.import_module(
                 topic_type._pyopendds_typesupport_packge_name)
         if topic_type not in participant._registered_typesupport:
-            self._ts_package.register_type(participant, topic_type)
+            participant._registered_typesupport[topic_type] = \
+                self._ts_package.register_type(participant._native, topic_type)
         self.type_name = self._ts_package.type_name(topic_type)
 
         from _pyopendds import create_topic
-        create_topic(self, participant, name, self.type_name)
+        self._native = create_topic(
+            participant._native, name, self.type_name, topic_type, native_qos(self.qos))
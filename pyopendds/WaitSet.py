@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from .Condition import Condition
+from .constants import StatusKind
+from .qos import DURATION_INFINITE
+from .util import TimeDurationType, normalize_time_duration
+if TYPE_CHECKING:
+    from .DataReader import DataReader
+
+
+class WaitSet:
+    '''Waits for any of the conditions attached to it to trigger. The
+    conditions stay attached between calls to wait, and wait doesn't hold the
+    GIL, so other Python threads keep running while a thread is waiting.
+
+    A reader can be attached directly, which attaches its StatusCondition with
+    only DATA_AVAILABLE enabled. wait returns the reader itself when it has
+    data.
+    '''
+
+    def __init__(self) -> None:
+        from _pyopendds import create_waitset
+        self._native = create_waitset()
+        # What wait returns for each attached condition, by condition id
+        self._attached: Dict[int, Any] = {}
+
+    @staticmethod
+    def _condition(reader_or_condition: Union[DataReader, Condition]) -> Condition:
+        if isinstance(reader_or_condition, Condition):
+            return reader_or_condition
+        return reader_or_condition.get_statuscondition()
+
+    def attach(self, reader_or_condition: Union[DataReader, Condition]) -> None:
+        from _pyopendds import waitset_attach
+        if isinstance(reader_or_condition, Condition):
+            condition = reader_or_condition
+        else:
+            status_condition = reader_or_condition.get_statuscondition()
+            # Statuses other than DATA_AVAILABLE are never cleared here, so
+            # leaving them enabled would keep the condition triggered
+            status_condition.set_enabled_statuses(StatusKind.DATA_AVAILABLE)
+            condition = status_condition
+        waitset_attach(self._native, condition._native)
+        self._attached[condition._id()] = reader_or_condition
+
+    def detach(self, reader_or_condition: Union[DataReader, Condition]) -> None:
+        from _pyopendds import waitset_detach
+        condition = self._condition(reader_or_condition)
+        waitset_detach(self._native, condition._native)
+        del self._attached[condition._id()]
+
+    def wait(self, timeout: Optional[TimeDurationType] = None) -> List[Any]:
+        '''Wait up to timeout, or forever if it's None, for attached
+        conditions to trigger. Returns the readers and conditions that
+        triggered, which is empty if the wait timed out.
+        '''
+        from _pyopendds import waitset_wait
+        duration = DURATION_INFINITE if timeout is None else normalize_time_duration(timeout)
+        return [self._attached[id] for id in waitset_wait(self._native, *duration)]
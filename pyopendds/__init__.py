@@ -1,4 +1,14 @@
-from .constants import SampleState, ViewState, InstanceState, StatusKind
+from .constants import (
+    SampleState,
+    ViewState,
+    InstanceState,
+    StatusKind,
+    OverflowPolicy,
+    HistoryKind,
+    ReliabilityKind,
+    LENGTH_UNLIMITED,
+    HANDLE_NIL,
+)
 from .exceptions import PyOpenDDS_Error, ReturnCodeError
 from .init_opendds import (
     opendds_version_str,
@@ -6,28 +16,81 @@ from .init_opendds import (
     opendds_version_dict,
     init_opendds,
 )
+from .qos import (
+    DURATION_INFINITE,
+    HistoryQosPolicy,
+    ResourceLimitsQosPolicy,
+    ReliabilityQosPolicy,
+    LatencyBudgetQosPolicy,
+    TransportPriorityQosPolicy,
+    TimeBasedFilterQosPolicy,
+    PartitionQosPolicy,
+    UserDataQosPolicy,
+    DomainParticipantQos,
+    TopicQos,
+    SubscriberQos,
+    PublisherQos,
+    DataReaderQos,
+    DataWriterQos,
+    QosProfile,
+    register_profile,
+)
+from .listener import DataReaderListener, ListenerDispatcher
 from .DomainParticipant import DomainParticipant
 from .Topic import Topic
+from .ContentFilteredTopic import ContentFilteredTopic
 from .Subscriber import Subscriber
 from .Publisher import Publisher
 from .DataReader import DataReader
 from .DataWriter import DataWriter
+from .Condition import Condition, GuardCondition, ReadCondition, StatusCondition
+from .WaitSet import WaitSet
 
 __all__ = [
     "SampleState",
     "ViewState",
     "InstanceState",
     "StatusKind",
+    "OverflowPolicy",
+    "HistoryKind",
+    "ReliabilityKind",
+    "LENGTH_UNLIMITED",
+    "HANDLE_NIL",
     "PyOpenDDS_Error",
     "ReturnCodeError",
     "opendds_version_str",
     "opendds_version_tuple",
     "opendds_version_dict",
     "init_opendds",
+    "DURATION_INFINITE",
+    "HistoryQosPolicy",
+    "ResourceLimitsQosPolicy",
+    "ReliabilityQosPolicy",
+    "LatencyBudgetQosPolicy",
+    "TransportPriorityQosPolicy",
+    "TimeBasedFilterQosPolicy",
+    "PartitionQosPolicy",
+    "UserDataQosPolicy",
+    "DomainParticipantQos",
+    "TopicQos",
+    "SubscriberQos",
+    "PublisherQos",
+    "DataReaderQos",
+    "DataWriterQos",
+    "QosProfile",
+    "register_profile",
+    "DataReaderListener",
+    "ListenerDispatcher",
     "DomainParticipant",
     "Topic",
+    "ContentFilteredTopic",
     "Subscriber",
     "Publisher",
     "DataReader",
     "DataWriter",
+    "Condition",
+    "GuardCondition",
+    "ReadCondition",
+    "StatusCondition",
+    "WaitSet",
 ]
@@ -0,0 +1,50 @@
+'''Turn samples taken by DataReader.take_array into NumPy structured arrays.
+
+This requires NumPy, which can be installed with the numpy extra:
+``pip install pyopendds[numpy]``.
+'''
+
+from typing import Any, Dict, Sequence, Tuple
+
+import numpy
+
+_dtypes: Dict[type, Tuple[numpy.dtype, numpy.dtype]] = {}
+
+
+def get_dtypes(topic_type: type) -> Tuple[numpy.dtype, numpy.dtype]:
+    '''Return the dtype of the arrays take_array returns for a topic type and
+    the dtype of the packed records the native code copies its numeric fields
+    into.
+    '''
+    dtypes = _dtypes.get(topic_type)
+    if dtypes is None:
+        fields = getattr(topic_type, '_pyopendds_array_fields')
+        dtypes = (
+            numpy.dtype(list(fields)),
+            numpy.dtype([field for field in fields if field[1] != 'O']),
+        )
+        _dtypes[topic_type] = dtypes
+    return dtypes
+
+
+def make_array(topic_type: type, count: int, records: Any,
+        objects: Sequence[list]) -> numpy.ndarray:
+    '''Assemble a structured array from the packed records of the numeric
+    fields and the lists of the rest of the fields.
+    '''
+    dtype, record_dtype = get_dtypes(topic_type)
+    if count == 0:
+        return numpy.empty(0, dtype)
+    if not objects:
+        # All the fields are numeric, so the records can be used as they are
+        return numpy.frombuffer(records, dtype, count)
+
+    array = numpy.empty(count, dtype)
+    if record_dtype.names:
+        record_array = numpy.frombuffer(records, record_dtype, count)
+        for name in record_dtype.names:
+            array[name] = record_array[name]
+    object_names = [name for name in dtype.names if name not in record_dtype.fields]
+    for name, column in zip(object_names, objects):
+        array[name] = column
+    return array
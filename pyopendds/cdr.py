@@ -0,0 +1,279 @@
+'''Decode the serialized samples returned by DataReader.take_serialized.
+
+The samples are classic CDR (XCDR1) in native byte order without an
+encapsulation header, and each one starts 8 byte aligned so the alignment of
+the fields is relative to the start of the sample. itl2py generates a
+SampleView subclass for each topic type that decodes a field only when it's
+accessed and keeps it, and the structs describe how their fields are decoded
+with the decoders here. There are no decoders for 128-bit numbers, so types
+with them don't have views and take_serialized can't be used with them.
+'''
+
+import struct
+import sys
+from array import array
+from typing import Any, Callable, Dict, List, Tuple
+
+_length = struct.Struct('=I')
+
+# Wide strings are UTF-16 in native byte order
+_utf16 = 'utf-16-le' if sys.byteorder == 'little' else 'utf-16-be'
+
+
+def _align(offset: int, size: int) -> int:
+    return (offset + size - 1) & -size
+
+
+class Decoder:
+    '''Decodes one type. decode returns the value at offset and the offset
+    after it. skip only returns the offset after it, which is cheaper for
+    types that would have to create Python objects.
+    '''
+
+    def decode(self, data: memoryview, offset: int) -> Tuple[Any, int]:
+        raise NotImplementedError
+
+    def skip(self, data: memoryview, offset: int) -> int:
+        return self.decode(data, offset)[1]
+
+
+class Primitive(Decoder):
+    '''Number decoded with a struct format character, which is also its
+    array.array typecode.
+    '''
+
+    def __init__(self, format: str, size: int):
+        self.format = format
+        self.size = size
+        self._struct = struct.Struct('=' + format)
+
+    def decode(self, data, offset):
+        offset = _align(offset, self.size)
+        return self._struct.unpack_from(data, offset)[0], offset + self.size
+
+    def skip(self, data, offset):
+        return _align(offset, self.size) + self.size
+
+
+class Bool(Primitive):
+
+    def __init__(self):
+        super().__init__('?', 1)
+
+
+class Char(Decoder):
+
+    def decode(self, data, offset):
+        return chr(data[offset]), offset + 1
+
+    def skip(self, data, offset):
+        return offset + 1
+
+
+class WChar(Primitive):
+    '''16 bit character, a UTF-16 code unit.
+    '''
+
+    def __init__(self):
+        super().__init__('H', 2)
+
+    def decode(self, data, offset):
+        value, offset = super().decode(data, offset)
+        return chr(value), offset
+
+
+class String(Decoder):
+    '''Length including the null terminator, then the bytes in the encoding
+    of the generated package and the null terminator.
+    '''
+
+    def __init__(self, encoding: str = 'utf-8'):
+        self.encoding = encoding
+
+    def decode(self, data, offset):
+        offset = _align(offset, 4)
+        length = _length.unpack_from(data, offset)[0]
+        start = offset + 4
+        return str(data[start:start + max(length - 1, 0)], self.encoding), start + length
+
+    def skip(self, data, offset):
+        offset = _align(offset, 4)
+        return offset + 4 + _length.unpack_from(data, offset)[0]
+
+
+class WString(Decoder):
+    '''Length in bytes without a null terminator, then the UTF-16 code units.
+    Like wchar, lone surrogates are kept.
+    '''
+
+    def decode(self, data, offset):
+        offset = _align(offset, 4)
+        length = _length.unpack_from(data, offset)[0]
+        start = offset + 4
+        return str(data[start:start + length], _utf16, 'surrogatepass'), start + length
+
+    def skip(self, data, offset):
+        offset = _align(offset, 4)
+        return offset + 4 + _length.unpack_from(data, offset)[0]
+
+
+class Enum(Decoder):
+    '''Enums are 32 bit in classic CDR, no matter their bit bound.
+    '''
+
+    def __init__(self, cls: Callable[[int], Any]):
+        self.cls = cls
+
+    def decode(self, data, offset):
+        offset = _align(offset, 4)
+        return self.cls(_length.unpack_from(data, offset)[0]), offset + 4
+
+    def skip(self, data, offset):
+        return _align(offset, 4) + 4
+
+
+class Struct(Decoder):
+    '''Struct generated by itl2py, which lists the decoders of its fields.
+    '''
+
+    def __init__(self, cls: type):
+        self.cls = cls
+
+    def decode(self, data, offset):
+        values = {}
+        for name, decoder in fields_of(self.cls):
+            values[name], offset = decoder.decode(data, offset)
+        return self.cls(**values), offset
+
+    def skip(self, data, offset):
+        for name, decoder in fields_of(self.cls):
+            offset = decoder.skip(data, offset)
+        return offset
+
+
+class _Elements(Decoder):
+    '''Elements of a sequence or array, decoded as bytes, an array.array, or a
+    list like the generated structs have them.
+    '''
+
+    def __init__(self, element: Decoder, kind: str):
+        self.element = element
+        self.kind = kind
+
+    def decode_elements(self, data, offset, count):
+        element = self.element
+        if self.kind == 'bytes':
+            return bytes(data[offset:offset + count]), offset + count
+        elif self.kind == 'array' and isinstance(element, Primitive):
+            if count:
+                offset = _align(offset, element.size)
+            end = offset + count * element.size
+            values = array(element.format)
+            values.frombytes(data[offset:end])
+            return values, end
+        values = []
+        for i in range(count):
+            value, offset = element.decode(data, offset)
+            values.append(value)
+        return values, offset
+
+    def skip_elements(self, data, offset, count):
+        element = self.element
+        if isinstance(element, (Primitive, Char)):
+            if not count:
+                return offset
+            size = getattr(element, 'size', 1)
+            return _align(offset, size) + count * size
+        for i in range(count):
+            offset = element.skip(data, offset)
+        return offset
+
+
+class Sequence(_Elements):
+    '''Number of elements, then the elements.
+    '''
+
+    def decode(self, data, offset):
+        offset = _align(offset, 4)
+        count = _length.unpack_from(data, offset)[0]
+        return self.decode_elements(data, offset + 4, count)
+
+    def skip(self, data, offset):
+        offset = _align(offset, 4)
+        return self.skip_elements(data, offset + 4, _length.unpack_from(data, offset)[0])
+
+
+class Array(_Elements):
+    '''Fixed number of elements. Multidimensional arrays are flattened.
+    '''
+
+    def __init__(self, element: Decoder, count: int, kind: str):
+        super().__init__(element, kind)
+        self.count = count
+
+    def decode(self, data, offset):
+        return self.decode_elements(data, offset, self.count)
+
+    def skip(self, data, offset):
+        return self.skip_elements(data, offset, self.count)
+
+
+_fields: Dict[type, Tuple[Tuple[str, Decoder], ...]] = {}
+
+
+def fields_of(cls: type) -> Tuple[Tuple[str, Decoder], ...]:
+    '''Return the names and decoders of the fields of a generated struct.
+    They're only created the first time they're needed, so they don't slow
+    down importing the generated package.
+    '''
+    fields = _fields.get(cls)
+    if fields is None:
+        fields = tuple(getattr(cls, '_pyopendds_cdr_fields')())
+        _fields[cls] = fields
+    return fields
+
+
+class SampleView:
+    '''Base of the generated views of serialized samples. The fields are slots
+    that are empty until the field is accessed, then the field is decoded and
+    kept in the slot. The fields before it are skipped over without decoding
+    them, and where each field starts is remembered.
+
+    The slots of the view itself start with an underscore, which IDL names
+    can't, so they can't clash with the fields.
+    '''
+
+    __slots__ = ('_data', '_offsets')
+
+    _pyopendds_type: type
+    _pyopendds_index: Dict[str, int]
+
+    def __init__(self, data: memoryview):
+        self._data = data
+        self._offsets: List[int] = [0]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._pyopendds_index = {name: i for i, name in enumerate(cls.__slots__)}
+
+    def __getattr__(self, name: str) -> Any:
+        index = type(self)._pyopendds_index.get(name)
+        if index is None:
+            raise AttributeError(name)
+        fields = fields_of(self._pyopendds_type)
+        data = self._data
+        offsets = self._offsets
+        while len(offsets) <= index:
+            i = len(offsets) - 1
+            offsets.append(fields[i][1].skip(data, offsets[i]))
+        value = fields[index][1].decode(data, offsets[index])[0]
+        setattr(self, name, value)
+        return value
+
+    def materialize(self) -> Any:
+        '''Decode all the fields into a regular sample.
+        '''
+        return Struct(self._pyopendds_type).decode(self._data, 0)[0]
+
+    def __repr__(self):
+        return '<{} of {} bytes>'.format(type(self).__name__, len(self._data))
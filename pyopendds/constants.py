@@ -1,26 +1,54 @@
 import enum
 
 
+# Passed as max_samples to take or read all available samples
+LENGTH_UNLIMITED = -1
+
+# Instance handle that doesn't refer to any instance
+HANDLE_NIL = 0
+
+
 class SampleState(enum.IntFlag):
     READ = 0x0001
-    NOT_READ = 0x0010
+    NOT_READ = 0x0002
     ANY = 0xFFFF
 
 
 class ViewState(enum.IntFlag):
     NEW = 0x0001
-    NOT_NEW = 0x0010
+    NOT_NEW = 0x0002
     ANY = 0xFFFF
 
 
 class InstanceState(enum.IntFlag):
     ALIVE = 0x0001
-    NOT_ALIVE_DISPOSED = 0x0010
-    NOT_ALIVE_NO_WRITERS = 0x0100
+    NOT_ALIVE_DISPOSED = 0x0002
+    NOT_ALIVE_NO_WRITERS = 0x0004
     NOT_ALIVE = 0x0006
     ANY = 0xFFFF
 
 
+class HistoryKind(enum.IntEnum):
+    KEEP_LAST = 0
+    KEEP_ALL = 1
+
+
+class ReliabilityKind(enum.IntEnum):
+    BEST_EFFORT = 0
+    RELIABLE = 1
+
+
+class OverflowPolicy(enum.IntEnum):
+    '''What a ListenerDispatcher does with an event when its queue is full.
+    '''
+    # Make the OpenDDS thread reporting the event wait for room
+    BLOCK = 0
+    # Drop the oldest event in the queue to make room
+    DROP_OLDEST = 1
+    # Drop the new event
+    COUNT_AND_DROP = 2
+
+
 class ReturnCode(enum.IntEnum):
     OK = 0
     ERROR = 1
@@ -14,6 +14,17 @@
 #endif
 
 #include <dds/DdsDcpsInfrastructureC.h>
+#include <dds/DdsDcpsDomainC.h>
+#include <dds/DdsDcpsTopicC.h>
+#include <dds/DdsDcpsSubscriptionC.h>
+#include <dds/DdsDcpsPublicationC.h>
+
+#include <algorithm>
+#include <atomic>
+#include <chrono>
+#include <initializer_list>
+#include <limits>
+#include <vector>
 
 namespace pyopendds {
 
@@ -75,43 +86,558 @@ private:
   PyObject* o_;
 };
 
-/// Name of PyCapule Attribute Holding the C++ Object
-const char* capsule_name = "_cpp_object";
+/**
+ * Releases the GIL for as long as the instance exists so other Python threads
+ * can run while OpenDDS blocks or does heavy work. The Python C API must not
+ * be used while an instance exists.
+ */
+class GilRelease {
+public:
+  GilRelease()
+    : state_(PyEval_SaveThread())
+  {
+  }
+  ~GilRelease() { PyEval_RestoreThread(state_); }
+
+private:
+  PyThreadState* state_;
+};
+
+/**
+ * Check the number of arguments passed to a METH_FASTCALL function. Returns
+ * true and sets a Python TypeError if it's wrong.
+ */
+bool check_nargs(const char* name, Py_ssize_t nargs, Py_ssize_t expected)
+{
+  if (nargs != expected) {
+    PyErr_Format(
+      PyExc_TypeError, "%s() takes %zd arguments (%zd given)", name, expected, nargs);
+    return true;
+  }
+  return false;
+}
 
 /**
- * Get Contents of Capsule from a PyObject
+ * Convert an int argument passed to a METH_FASTCALL function. Returns true and
+ * sets a Python exception if it's not an int or doesn't fit in T.
  */
 template <typename T>
-T* get_capsule(PyObject* obj)
+bool int_arg(PyObject* arg, T& value)
 {
-  T* rv = nullptr;
-  PyObject* capsule = PyObject_GetAttrString(obj, capsule_name); // nr
-  if (capsule) {
-    if (PyCapsule_IsValid(capsule, nullptr)) {
-      rv = static_cast<T*>(PyCapsule_GetPointer(capsule, nullptr));
+  const long long result = PyLong_AsLongLong(arg);
+  if (result == -1 && PyErr_Occurred()) {
+    return true;
+  }
+  if (result < static_cast<long long>(std::numeric_limits<T>::min()) ||
+      result > static_cast<long long>(std::numeric_limits<T>::max())) {
+    PyErr_SetString(PyExc_OverflowError, "Python int is out of range for argument");
+    return true;
+  }
+  value = static_cast<T>(result);
+  return false;
+}
+
+/// Kinds of OpenDDS entities and other objects that a _pyopendds.Entity can hold
+enum class EntityKind {
+  participant,
+  topic,
+  contentfilteredtopic,
+  subscriber,
+  publisher,
+  datareader,
+  datawriter,
+  waitset,
+  readcondition,
+  guardcondition,
+  statuscondition,
+};
+
+template <typename T>
+struct EntityTraits;
+
+template <>
+struct EntityTraits<DDS::DomainParticipant> {
+  static const EntityKind kind = EntityKind::participant;
+  static const char* name() { return "DomainParticipant"; }
+};
+
+template <>
+struct EntityTraits<DDS::Topic> {
+  static const EntityKind kind = EntityKind::topic;
+  static const char* name() { return "Topic"; }
+};
+
+template <>
+struct EntityTraits<DDS::ContentFilteredTopic> {
+  static const EntityKind kind = EntityKind::contentfilteredtopic;
+  static const char* name() { return "ContentFilteredTopic"; }
+};
+
+template <>
+struct EntityTraits<DDS::Subscriber> {
+  static const EntityKind kind = EntityKind::subscriber;
+  static const char* name() { return "Subscriber"; }
+};
+
+template <>
+struct EntityTraits<DDS::Publisher> {
+  static const EntityKind kind = EntityKind::publisher;
+  static const char* name() { return "Publisher"; }
+};
+
+template <>
+struct EntityTraits<DDS::DataReader> {
+  static const EntityKind kind = EntityKind::datareader;
+  static const char* name() { return "DataReader"; }
+};
+
+template <>
+struct EntityTraits<DDS::DataWriter> {
+  static const EntityKind kind = EntityKind::datawriter;
+  static const char* name() { return "DataWriter"; }
+};
+
+template <>
+struct EntityTraits<DDS::WaitSet> {
+  static const EntityKind kind = EntityKind::waitset;
+  static const char* name() { return "WaitSet"; }
+};
+
+template <>
+struct EntityTraits<DDS::ReadCondition> {
+  static const EntityKind kind = EntityKind::readcondition;
+  static const char* name() { return "ReadCondition"; }
+};
+
+template <>
+struct EntityTraits<DDS::GuardCondition> {
+  static const EntityKind kind = EntityKind::guardcondition;
+  static const char* name() { return "GuardCondition"; }
+};
+
+template <>
+struct EntityTraits<DDS::StatusCondition> {
+  static const EntityKind kind = EntityKind::statuscondition;
+  static const char* name() { return "StatusCondition"; }
+};
+
+/**
+ * Histogram of latencies in nanoseconds in the style of HdrHistogram. Values
+ * below 64 get a bucket each, then each power of two range is split into 32
+ * buckets, so a value is off by less than 1/32 of itself and all 64 bit values
+ * fit in 1920 buckets. Recording is a few relaxed atomic adds, so it's cheap
+ * enough to leave on.
+ */
+class LatencyHistogram {
+public:
+  typedef std::atomic<unsigned long long> Counter;
+
+  static const unsigned sub_bits = 5;
+  static const size_t sub_count = size_t(1) << sub_bits;
+  static const size_t bucket_count = (64 - sub_bits + 1) * sub_count;
+
+  LatencyHistogram() { reset(); }
+
+  void reset()
+  {
+    for (Counter& count : counts_) {
+      count.store(0, std::memory_order_relaxed);
+    }
+    for (Counter* counter : {&count_, &sum_, &max_}) {
+      counter->store(0, std::memory_order_relaxed);
+    }
+  }
+
+  void record(unsigned long long value)
+  {
+    counts_[bucket(value)].fetch_add(1, std::memory_order_relaxed);
+    count_.fetch_add(1, std::memory_order_relaxed);
+    sum_.fetch_add(value, std::memory_order_relaxed);
+    unsigned long long max = max_.load(std::memory_order_relaxed);
+    while (value > max && !max_.compare_exchange_weak(max, value, std::memory_order_relaxed)) {
+    }
+  }
+
+  static size_t bucket(unsigned long long value)
+  {
+    if (value < 2 * sub_count) {
+      return static_cast<size_t>(value);
+    }
+    const unsigned shift = highest_bit(value) - sub_bits;
+    return (shift + 1) * sub_count + static_cast<size_t>(value >> shift) - sub_count;
+  }
+
+  /// Highest value that goes in a bucket, which percentiles are reported as
+  static unsigned long long highest_value(size_t bucket)
+  {
+    if (bucket < 2 * sub_count) {
+      return bucket;
+    }
+    const unsigned shift = static_cast<unsigned>(bucket / sub_count - 1);
+    const unsigned long long mantissa = bucket % sub_count + sub_count;
+    // Wraps around to the highest 64 bit value for the last bucket
+    return ((mantissa + 1) << shift) - 1;
+  }
+
+  /**
+   * Return the count, mean, 50th, 99th, and 99.9th percentiles, and maximum
+   * as a dict. The percentiles are capped at the maximum.
+   */
+  PyObject* to_dict() const
+  {
+    std::vector<unsigned long long> counts(bucket_count);
+    unsigned long long total = 0;
+    for (size_t i = 0; i < bucket_count; ++i) {
+      counts[i] = counts_[i].load(std::memory_order_relaxed);
+      total += counts[i];
+    }
+    const unsigned long long max = max_.load(std::memory_order_relaxed);
+
+    // Ranks of the percentiles in thousandths
+    const unsigned long long permille[] = {500, 990, 999};
+    unsigned long long percentiles[] = {0, 0, 0};
+    unsigned long long seen = 0;
+    size_t next = 0;
+    for (size_t i = 0; i < bucket_count && total && next < 3; ++i) {
+      seen += counts[i];
+      while (next < 3 && seen * 1000 >= total * permille[next]) {
+        percentiles[next++] = std::min(highest_value(i), max);
+      }
+    }
+
+    return Py_BuildValue("{sKsdsKsKsKsK}",
+      "count", total,
+      "mean_ns", total ? static_cast<double>(sum_.load(std::memory_order_relaxed)) / total : 0.0,
+      "p50_ns", percentiles[0],
+      "p99_ns", percentiles[1],
+      "p99_9_ns", percentiles[2],
+      "max_ns", max);
+  }
+
+private:
+  static unsigned highest_bit(unsigned long long value)
+  {
+    unsigned bit = 0;
+    for (unsigned shift = 32; shift; shift >>= 1) {
+      if (value >> shift) {
+        value >>= shift;
+        bit += shift;
+      }
+    }
+    return bit;
+  }
+
+  Counter counts_[bucket_count];
+  Counter count_;
+  Counter sum_;
+  Counter max_;
+};
+
+/**
+ * Counters of the native work done by a reader's take and read calls, which
+ * DataReader.stats() returns. They're relaxed atomics updated a few times per
+ * call and never touch Python, so they're always on.
+ */
+struct ReaderStats {
+  typedef std::atomic<unsigned long long> Counter;
+  typedef std::chrono::steady_clock Clock;
+
+  /// Samples converted to Python
+  Counter samples;
+
+  /// Calls that converted at least one sample
+  Counter batches;
+
+  /**
+   * Serialized size of the samples taken by take_serialized. It isn't counted
+   * for the other calls, because finding it would cost more than the
+   * conversion it's measuring.
+   */
+  Counter bytes;
+
+  /// Time spent waiting for samples to arrive
+  Counter wait_ns;
+
+  /// Time spent in the OpenDDS take and read calls
+  Counter take_ns;
+
+  /// Time spent converting samples to Python
+  Counter convert_ns;
+
+  /**
+   * Time from the source timestamp to the take or read call of new samples,
+   * null until DataReader.enable_latency_stats() creates it. It isn't
+   * removed once created, so it can be used without a lock.
+   */
+  std::atomic<LatencyHistogram*> latency;
+
+  ReaderStats()
+    : latency(nullptr)
+  {
+    reset();
+  }
+
+  ~ReaderStats() { delete latency.load(); }
+
+  void reset()
+  {
+    for (Counter* counter : {&samples, &batches, &bytes, &wait_ns, &take_ns, &convert_ns}) {
+      counter->store(0, std::memory_order_relaxed);
+    }
+    LatencyHistogram* const histogram = latency.load(std::memory_order_acquire);
+    if (histogram) {
+      histogram->reset();
+    }
+  }
+
+  void enable_latency()
+  {
+    if (!latency.load(std::memory_order_acquire)) {
+      latency.store(new LatencyHistogram, std::memory_order_release);
+    }
+  }
+
+  /// Nanoseconds since the epoch, which is what source timestamps count from
+  static long long wall_ns()
+  {
+    return std::chrono::duration_cast<std::chrono::nanoseconds>(
+      std::chrono::system_clock::now().time_since_epoch()).count();
+  }
+
+  static long long time_ns(const DDS::Time_t& time)
+  {
+    return time.sec * 1000000000LL + time.nanosec;
+  }
+
+  /**
+   * Record the latency of a sample taken or read at take_time, if latency
+   * stats are enabled. Only samples that weren't read before are recorded,
+   * so reading a sample again doesn't count it twice. Samples that appear to
+   * be from the future because of clock differences are recorded as 0.
+   */
+  void record_latency(const DDS::SampleInfo& info, long long take_time)
+  {
+    LatencyHistogram* const histogram = latency.load(std::memory_order_acquire);
+    if (histogram) {
+      record_latency(*histogram, info, take_time);
+    }
+  }
+
+  /// Same as record_latency, but for the first length infos of a sequence
+  void record_latency(const DDS::SampleInfoSeq& infos, CORBA::ULong length, long long take_time)
+  {
+    LatencyHistogram* const histogram = latency.load(std::memory_order_acquire);
+    if (histogram) {
+      for (CORBA::ULong i = 0; i < length; ++i) {
+        record_latency(*histogram, infos[i], take_time);
+      }
     }
-    Py_DECREF(capsule);
-  } else {
-    PyErr_Clear();
   }
-  if (!rv) {
-    PyErr_SetString(PyExc_TypeError, "Python object does not have a valid capsule pointer");
+
+  static void add(Counter& counter, unsigned long long value)
+  {
+    counter.fetch_add(value, std::memory_order_relaxed);
+  }
+
+  /// Add the time from start to end to a counter and return end
+  static Clock::time_point add_time(Counter& counter, Clock::time_point start,
+    Clock::time_point end = Clock::now())
+  {
+    add(counter, std::chrono::duration_cast<std::chrono::nanoseconds>(end - start).count());
+    return end;
+  }
+
+  /// Count a batch of samples that started being converted at start
+  void converted(unsigned long long count, Clock::time_point start)
+  {
+    converted(count, 0, start);
+  }
+
+  /// Count a batch of samples of a known serialized size
+  void converted(unsigned long long count, unsigned long long size, Clock::time_point start)
+  {
+    add_time(convert_ns, start);
+    if (count) {
+      add(samples, count);
+      add(batches, 1);
+      add(bytes, size);
+    }
   }
-  return rv;
+
+  static void record_latency(
+    LatencyHistogram& histogram, const DDS::SampleInfo& info, long long take_time)
+  {
+    if (info.valid_data && info.sample_state == DDS::NOT_READ_SAMPLE_STATE &&
+        info.source_timestamp.sec >= 0) {
+      const long long latency = take_time - time_ns(info.source_timestamp);
+      histogram.record(latency > 0 ? latency : 0);
+    }
+  }
+
+  /// Return the counters and the backlog of the reader as a dict
+  PyObject* to_dict(long backlog) const
+  {
+    return Py_BuildValue("{sKsKsKsKsKsKsl}",
+      "samples", samples.load(std::memory_order_relaxed),
+      "batches", batches.load(std::memory_order_relaxed),
+      "bytes", bytes.load(std::memory_order_relaxed),
+      "wait_ns", wait_ns.load(std::memory_order_relaxed),
+      "take_ns", take_ns.load(std::memory_order_relaxed),
+      "convert_ns", convert_ns.load(std::memory_order_relaxed),
+      "backlog", backlog);
+  }
+};
+
+/**
+ * Base of the last value caches TopicType keeps for readers that enable one,
+ * so EntityObject can own one without knowing the topic type.
+ */
+class LastValueCacheBase {
+public:
+  virtual ~LastValueCacheBase() {}
+};
+
+/**
+ * Layout of _pyopendds.Entity, the native object the Python entity objects
+ * keep in their _native attribute. Native code gets the OpenDDS entity out of
+ * it with a type check and a pointer dereference.
+ */
+struct EntityObject {
+  PyObject_HEAD
+
+  EntityKind kind;
+
+  /**
+   * Reference owned by this object, released when it's deleted. This is an
+   * Object because content filtered topics aren't entities.
+   */
+  CORBA::Object* entity;
+
+  /// The same entity as the interface for its kind, like DDS::DataReader*
+  void* interface;
+
+  /// Python class of the topic type for topics, readers, and writers
+  PyObject* topic_type;
+
+  /**
+   * The TopicTypeBase of the topic type, bound to readers and writers by the
+   * generated module when they're created.
+   */
+  void* bound_topic_type;
+
+  /**
+   * Reader or writer narrowed to the interface for the topic type. This
+   * doesn't hold its own reference, entity keeps the object alive.
+   */
+  void* narrowed;
+
+  /// Counters for readers, owned by this object. Null for other entities.
+  ReaderStats* reader_stats;
+
+  /// Last value cache of readers that enabled it, owned by this object
+  LastValueCacheBase* last_value_cache;
+
+  /// _pyopendds.Entity, set when a module using this is initialized
+  static PyTypeObject* type;
+
+  /**
+   * Get _pyopendds.Entity from the _pyopendds module. Returns true if there
+   * was an error.
+   */
+  static bool cache_type()
+  {
+    Ref module = PyImport_ImportModule("_pyopendds");
+    if (!module) {
+      return true;
+    }
+    type = reinterpret_cast<PyTypeObject*>(PyObject_GetAttrString(*module, "Entity"));
+    return !type;
+  }
+};
+
+/**
+ * Get the EntityObject of a _pyopendds.Entity. Returns null and sets a Python
+ * TypeError if it isn't one.
+ */
+EntityObject* get_entity_object(PyObject* obj)
+{
+  if (!PyObject_TypeCheck(obj, EntityObject::type)) {
+    PyErr_SetString(PyExc_TypeError, "Python object is not a native PyOpenDDS entity");
+    return nullptr;
+  }
+  return reinterpret_cast<EntityObject*>(obj);
 }
 
+/**
+ * Get the OpenDDS entity a _pyopendds.Entity holds. Returns null and sets a
+ * Python TypeError if it isn't one or it holds a different kind of entity.
+ */
 template <typename T>
-bool set_capsule(PyObject* py, T* cpp, PyCapsule_Destructor cb)
+T* get_entity(PyObject* obj)
 {
-  PyObject* capsule = PyCapsule_New(cpp, nullptr, cb);
-  if (!capsule) {
-    return true;
+  EntityObject* const entity = get_entity_object(obj);
+  if (!entity) {
+    return nullptr;
+  }
+  if (entity->kind != EntityTraits<T>::kind || !entity->interface) {
+    PyErr_Format(PyExc_TypeError, "Native PyOpenDDS entity is not a %s", EntityTraits<T>::name());
+    return nullptr;
   }
-  const bool error = PyObject_SetAttrString(py, capsule_name, capsule);
-  Py_DECREF(capsule);
-  return error;
+  return static_cast<T*>(entity->interface);
 }
 
+/**
+ * _pyopendds.SampleInfo, a struct sequence of the parts of a DDS::SampleInfo
+ * that take and read return with each sample when asked to. The timestamps
+ * are integer nanoseconds since the epoch.
+ */
+struct SampleInfoType {
+  /// Set when a module using this is initialized
+  static PyTypeObject* type;
+
+  /**
+   * Get _pyopendds.SampleInfo from the _pyopendds module. Returns true if
+   * there was an error.
+   */
+  static bool cache_type()
+  {
+    Ref module = PyImport_ImportModule("_pyopendds");
+    if (!module) {
+      return true;
+    }
+    type = reinterpret_cast<PyTypeObject*>(PyObject_GetAttrString(*module, "SampleInfo"));
+    return !type;
+  }
+
+  /// Create a SampleInfo for a sample taken or read at take_time
+  static PyObject* create(const DDS::SampleInfo& info, long long take_time)
+  {
+    Ref result = PyStructSequence_New(type);
+    if (!result) {
+      throw Exception();
+    }
+    PyObject* const values[] = {
+      PyLong_FromLongLong(ReaderStats::time_ns(info.source_timestamp)),
+      PyLong_FromLongLong(take_time),
+      PyLong_FromLong(info.instance_handle),
+      PyLong_FromLong(info.publication_handle),
+      PyLong_FromUnsignedLong(info.sample_state),
+      PyLong_FromUnsignedLong(info.view_state),
+      PyLong_FromUnsignedLong(info.instance_state),
+    };
+    bool failed = false;
+    for (Py_ssize_t i = 0; i < Py_ssize_t(sizeof(values) / sizeof(values[0])); ++i) {
+      failed = failed || !values[i];
+      PyStructSequence_SET_ITEM(*result, i, values[i]);
+    }
+    if (failed) {
+      throw Exception();
+    }
+    result++;
+    return *result;
+  }
+};
+
 class Errors {
 public:
   static PyObject* pyopendds() { return pyopendds_; }
@@ -140,9 +666,17 @@ public:
     return false;
   }
 
+  /**
+   * Raise the ReturnCodeError for rc if it's not RETCODE_OK. Returns true if
+   * it was raised.
+   */
   static bool check_rc(DDS::ReturnCode_t rc)
   {
-    return !PyObject_CallMethod(ReturnCodeError_, "check", "k", rc);
+    if (rc == DDS::RETCODE_OK) {
+      return false;
+    }
+    Ref result = PyObject_CallMethod(ReturnCodeError_, "check", "k", rc);
+    return !result;
   }
 
 private:
@@ -4,14 +4,28 @@
 #include "common.hpp"
 
 #include <dds/DCPS/TypeSupportImpl.h>
+#include <dds/DCPS/Serializer.h>
 #include <dds/DdsDcpsDomainC.h>
 #include <dds/DCPS/WaitSet.h>
 #include <dds/Version.h>
 
 #include <stdexcept>
+#include <algorithm>
+#include <new>
 #include <map>
+#include <list>
+#include <string>
+#include <unordered_map>
+#include <unordered_set>
 #include <memory>
 #include <limits>
+#include <cstdint>
+#include <vector>
+#include <chrono>
+#include <cstring>
+#include <cwchar>
+#include <type_traits>
+#include <utility>
 
 namespace pyopendds {
 
@@ -24,21 +38,43 @@ public:
 }*/
   ; // TODO: Figure out why clang-format wants this like this
 
+/**
+ * Create an instance of a Python class like object.__new__(cls) would, without
+ * calling __init__. Used by generated code that sets all the fields itself.
+ */
+PyObject* new_instance(PyObject* cls)
+{
+  static PyObject* no_args = PyTuple_New(0);
+  if (!no_args) {
+    return nullptr;
+  }
+  PyTypeObject* const type = reinterpret_cast<PyTypeObject*>(cls);
+  return type->tp_new(type, no_args, nullptr);
+}
+
+/**
+ * Integers are converted through long when it can hold every value of T,
+ * otherwise through long long or unsigned long long. Only types that can't
+ * hold every value of the type used for conversion need their range checked.
+ * Small values come from the interpreter's cache of small ints.
+ */
 template <typename T>
 class IntegerType {
 public:
   typedef std::numeric_limits<T> limits;
-  typedef std::conditional<limits::is_signed, long, unsigned long> LongType;
+  typedef typename std::conditional<
+    limits::is_signed ? sizeof(T) <= sizeof(long) : sizeof(T) < sizeof(long), long,
+    typename std::conditional<limits::is_signed, long long, unsigned long long>::type>::type
+    LongType;
+  typedef std::integral_constant<bool,
+    sizeof(T) < sizeof(LongType) || limits::is_signed != std::is_signed<LongType>::value>
+    NeedsRangeCheck;
 
   static PyObject* get_python_class() { return reinterpret_cast<PyObject*>(&PyLong_Type); }
 
   static void cpp_to_python(const T& cpp, PyObject*& py)
   {
-    if (limits::is_signed) {
-      py = PyLong_FromLong(cpp);
-    } else {
-      py = PyLong_FromUnsignedLong(cpp);
-    }
+    py = from_long(static_cast<LongType>(cpp));
     if (!py) {
       throw Exception();
     }
@@ -47,19 +83,64 @@ public:
   static void python_to_cpp(PyObject* py, T& cpp)
   {
     LongType value;
-    if (limits::is_signed) {
-      value = PyLong_AsLong(py);
-    } else {
-      value = PyLong_AsUnsignedLong(py);
+    to_long(py, value);
+    if (value == static_cast<LongType>(-1) && PyErr_Occurred()) {
+      throw Exception();
     }
-    if (value < limits::min() || value > limits::max()) {
+    check_range(value, NeedsRangeCheck());
+    cpp = static_cast<T>(value);
+  }
+
+private:
+  static PyObject* from_long(long value) { return PyLong_FromLong(value); }
+  static PyObject* from_long(long long value) { return PyLong_FromLongLong(value); }
+  static PyObject* from_long(unsigned long long value)
+  {
+    return PyLong_FromUnsignedLongLong(value);
+  }
+
+  static void to_long(PyObject* py, long& value) { value = PyLong_AsLong(py); }
+  static void to_long(PyObject* py, long long& value) { value = PyLong_AsLongLong(py); }
+  static void to_long(PyObject* py, unsigned long long& value)
+  {
+    value = PyLong_AsUnsignedLongLong(py);
+  }
+
+  static void check_range(LongType value, std::true_type)
+  {
+    if (value < static_cast<LongType>(limits::min()) ||
+        value > static_cast<LongType>(limits::max())) {
       throw Exception("Integer Value is Out of Range for IDL Type", PyExc_ValueError);
     }
-    if (value == -1 && PyErr_Occurred()) {
-      throw Exception();
-    }
-    cpp = value;
   }
+
+  static void check_range(LongType, std::false_type) {}
+};
+
+typedef ::CORBA::Octet u8;
+typedef u8 byte;
+template <>
+class Type<u8> : public IntegerType<u8> {
+};
+
+typedef std::int8_t i8;
+template <>
+class Type<i8> : public IntegerType<i8> {
+};
+
+typedef ::CORBA::UShort u16;
+template <>
+class Type<u16> : public IntegerType<u16> {
+};
+
+typedef ::CORBA::Short i16;
+template <>
+class Type<i16> : public IntegerType<i16> {
+};
+
+typedef ::CORBA::ULong u32;
+template <>
+class Type<u32> : public IntegerType<u32> {
 };
 
 typedef ::CORBA::Long i32;
@@ -67,7 +148,121 @@ template <>
 class Type<i32> : public IntegerType<i32> {
 };
 
-// TODO: Put Other Integer Types Here
+typedef ::CORBA::ULongLong u64;
+template <>
+class Type<u64> : public IntegerType<u64> {
+};
+
+typedef ::CORBA::LongLong i64;
+template <>
+class Type<i64> : public IntegerType<i64> {
+};
+
+template <typename T>
+class FloatingType {
+public:
+  static PyObject* get_python_class() { return reinterpret_cast<PyObject*>(&PyFloat_Type); }
+
+  static void cpp_to_python(const T& cpp, PyObject*& py)
+  {
+    py = PyFloat_FromDouble(cpp);
+    if (!py) {
+      throw Exception();
+    }
+  }
+
+  static void python_to_cpp(PyObject* py, T& cpp)
+  {
+    // Avoid the function call for the most likely case of an actual float
+    const double value = PyFloat_CheckExact(py) ? PyFloat_AS_DOUBLE(py) : PyFloat_AsDouble(py);
+    if (value == -1.0 && PyErr_Occurred()) {
+      throw Exception();
+    }
+    cpp = static_cast<T>(value);
+  }
+};
+
+typedef ::CORBA::Float f32;
+template <>
+class Type<f32> : public FloatingType<f32> {
+};
+
+typedef ::CORBA::Double f64;
+template <>
+class Type<f64> : public FloatingType<f64> {
+};
+
+// IDL boolean is C++ bool in both mappings
+template <>
+class Type<bool> {
+public:
+  static PyObject* get_python_class() { return reinterpret_cast<PyObject*>(&PyBool_Type); }
+
+  static void cpp_to_python(const bool& cpp, PyObject*& py)
+  {
+    py = PyBool_FromLong(cpp);
+  }
+
+  static void python_to_cpp(PyObject* py, bool& cpp)
+  {
+    if (py == Py_True) {
+      cpp = true;
+    } else if (py == Py_False) {
+      cpp = false;
+    } else {
+      const int value = PyObject_IsTrue(py);
+      if (value == -1) {
+        throw Exception();
+      }
+      cpp = value;
+    }
+  }
+};
+
+/**
+ * IDL char and wchar map to a str of one character, where char is treated as
+ * ISO-8859-1 so its value is the code point. Max is the largest code point
+ * that fits in the IDL type.
+ */
+template <typename T, Py_UCS4 Max>
+class CharType {
+public:
+  static PyObject* get_python_class() { return reinterpret_cast<PyObject*>(&PyUnicode_Type); }
+
+  static void cpp_to_python(const T& cpp, PyObject*& py)
+  {
+    // Latin-1 characters are cached by the interpreter
+    py = PyUnicode_FromOrdinal(static_cast<typename std::make_unsigned<T>::type>(cpp));
+    if (!py) {
+      throw Exception();
+    }
+  }
+
+  static void python_to_cpp(PyObject* py, T& cpp)
+  {
+    if (!PyUnicode_Check(py)) {
+      throw Exception("Expected a str for IDL Character", PyExc_TypeError);
+    }
+    if (PyUnicode_GET_LENGTH(py) != 1) {
+      throw Exception("Expected a Single Character for IDL Character", PyExc_ValueError);
+    }
+    const Py_UCS4 value = PyUnicode_READ_CHAR(py, 0);
+    if (value > Max) {
+      throw Exception("Character is Out of Range for IDL Type", PyExc_ValueError);
+    }
+    cpp = static_cast<T>(value);
+  }
+};
+
+typedef ::CORBA::Char c8;
+template <>
+class Type<c8> : public CharType<c8, 0xff> {
+};
+
+typedef ::CORBA::WChar c16;
+template <>
+class Type<c16> : public CharType<c16, 0xffff> {
+};
 
 const char* string_data(const std::string& cpp)
 {
@@ -89,12 +284,72 @@ size_t string_length(const char* cpp)
   return std::strlen(cpp);
 }
 
+void string_assign(std::string& cpp, const char* data, size_t length)
+{
+  cpp.assign(data, length);
+}
+
+void string_assign(::TAO::String_Manager& cpp, const char* data, size_t)
+{
+  cpp = data;
+}
+
+const wchar_t* string_data(const std::wstring& cpp)
+{
+  return cpp.data();
+}
+
+const wchar_t* string_data(const wchar_t* cpp)
+{
+  return cpp;
+}
+
+size_t string_length(const std::wstring& cpp)
+{
+  return cpp.size();
+}
+
+size_t string_length(const wchar_t* cpp)
+{
+  return std::wcslen(cpp);
+}
+
+void string_assign(std::wstring& cpp, const wchar_t* data, size_t length)
+{
+  cpp.assign(data, length);
+}
+
+void string_assign(::TAO::WString_Manager& cpp, const wchar_t* data, size_t)
+{
+  cpp = data;
+}
+
 template <typename T>
 class StringType {
 public:
   static PyObject* get_python_class() { return reinterpret_cast<PyObject*>(&PyUnicode_Type); }
 
-  static void cpp_to_python(const T& cpp, PyObject*& py, const char* encoding)
+  /// Decoding functions of the Python C API, like PyUnicode_DecodeUTF8
+  typedef PyObject* (*Decoder)(const char*, Py_ssize_t, const char*);
+
+  /**
+   * Takes anything string_data and string_length accept, which includes the
+   * elements of classic mapping string sequences. Common encodings are decoded
+   * by calling the decoder for them directly, which avoids looking up the
+   * codec by name for every string.
+   */
+  template <typename C>
+  static void cpp_to_python(const C& cpp, PyObject*& py, Decoder decoder = PyUnicode_DecodeUTF8)
+  {
+    PyObject* o = decoder(string_data(cpp), string_length(cpp), "strict");
+    if (!o) {
+      throw Exception();
+    }
+    py = o;
+  }
+
+  template <typename C>
+  static void cpp_to_python(const C& cpp, PyObject*& py, const char* encoding)
   {
     PyObject* o = PyUnicode_Decode(string_data(cpp), string_length(cpp), encoding, "strict");
     if (!o) {
@@ -103,9 +358,27 @@ public:
     py = o;
   }
 
+  /**
+   * Encode as UTF-8 using the UTF-8 representation Python keeps with the str,
+   * so no temporary bytes object has to be created.
+   */
   static void python_to_cpp(PyObject* py, T& cpp)
   {
-    // TODO: Encode or Throw Unicode Error
+    Py_ssize_t length;
+    const char* data = PyUnicode_AsUTF8AndSize(py, &length);
+    if (!data) {
+      throw Exception();
+    }
+    string_assign(cpp, data, length);
+  }
+
+  static void python_to_cpp(PyObject* py, T& cpp, const char* encoding)
+  {
+    Ref bytes = PyUnicode_AsEncodedString(py, encoding, "strict");
+    if (!bytes) {
+      throw Exception();
+    }
+    string_assign(cpp, PyBytes_AS_STRING(*bytes), PyBytes_GET_SIZE(*bytes));
   }
 };
 
@@ -122,126 +395,1528 @@ typedef
 template <>
 class Type<s8> : public StringType<s8> {
 };
-// TODO: Put Other String/Char Types Here
-
-// TODO: FloatingType for floating point type
 
-class TopicTypeBase {
+/**
+ * Bounded least recently used cache of str objects decoded from a string
+ * field, keyed on the raw bytes. For fields that repeat a small number of
+ * values this saves decoding and allocating a new str for every sample. It's
+ * only used with the GIL held.
+ */
+class StringCache {
 public:
-  virtual PyObject* get_python_class() = 0;
-  virtual const char* type_name() = 0;
-  virtual void register_type(PyObject* pyparticipant) = 0;
-  virtual PyObject* take_next_sample(PyObject* pyreader) = 0;
-
-  typedef std::shared_ptr<TopicTypeBase> Ptr;
-  typedef std::map<PyObject*, Ptr> TopicTypes;
-
-  static TopicTypeBase* find(PyObject* pytype)
+  StringCache(const char* name, size_t capacity)
+    : name_(name)
+    , capacity_(capacity)
+    , hits_(0)
+    , misses_(0)
   {
-    TopicTypes::iterator i = topic_types_.find(pytype);
-    if (i == topic_types_.end()) {
-      throw Exception("Not a Valid PyOpenDDS Type", PyExc_TypeError);
-    }
-    return i->second.get();
+    all().push_back(this);
   }
 
-protected:
-  static TopicTypes topic_types_;
-};
-
-template <typename T>
-class TopicType : public TopicTypeBase {
-public:
-  typedef typename OpenDDS::DCPS::DDSTraits<T> Traits;
-
-  typedef T IdlType;
-  typedef typename Traits::MessageSequenceType IdlTypeSequence;
-
-  typedef typename Traits::TypeSupportType TypeSupport;
-  typedef typename
-#if OPENDDS_VERSION_AT_LEAST(3, 19, 0)
-    Traits::TypeSupportImplType
-#else
-    Traits::TypeSupportTypeImpl
-#endif
-      TypeSupportImpl;
-  typedef typename Traits::DataWriterType DataWriter;
-  typedef typename Traits::DataReaderType DataReader;
+  /**
+   * Get the str for the string, decoding it with Type<s8> using any extra
+   * arguments if it's not cached.
+   */
+  template <typename C, typename... Args>
+  void cpp_to_python(const C& cpp, PyObject*& py, Args... args)
+  {
+    key_.assign(string_data(cpp), string_length(cpp));
+    const Index::iterator i = index_.find(key_);
+    if (i != index_.end()) {
+      ++hits_;
+      entries_.splice(entries_.begin(), entries_, i->second);
+      py = i->second->value;
+      Py_INCREF(py);
+      return;
+    }
 
-  const char* type_name() { return Traits::type_name(); }
+    ++misses_;
+    Type<s8>::cpp_to_python(cpp, py, args...);
+    Py_INCREF(py);
+    entries_.push_front(Entry{key_, py});
+    index_.emplace(key_, entries_.begin());
+    if (entries_.size() > capacity_) {
+      Entry& oldest = entries_.back();
+      index_.erase(oldest.key);
+      Py_DECREF(oldest.value);
+      entries_.pop_back();
+    }
+  }
 
   /**
-   * Callback for Python to call when the TypeSupport capsule is deleted
+   * Return a dict with the hits, misses, hit rate, number of entries,
+   * capacity, and an estimate of the memory used in bytes.
    */
-  static void delete_typesupport(PyObject* capsule)
+  PyObject* stats() const
   {
-    if (PyCapsule_CheckExact(capsule)) {
-      delete static_cast<TypeSupportImpl*>(PyCapsule_GetPointer(capsule, nullptr));
+    const unsigned long long lookups = hits_ + misses_;
+    size_t memory = sizeof(*this);
+    for (const Entry& entry : entries_) {
+      // The list and index nodes with their links, both copies of the key,
+      // and the str
+      memory += sizeof(Entry) + sizeof(Index::value_type) + 4 * sizeof(void*) +
+        2 * entry.key.capacity();
+      Ref size = PyObject_CallMethod(entry.value, "__sizeof__", nullptr);
+      if (!size) {
+        throw Exception();
+      }
+      memory += PyLong_AsSize_t(*size);
     }
+    PyObject* const result = Py_BuildValue("{sKsKsdsnsnsn}",
+      "hits", hits_,
+      "misses", misses_,
+      "hit_rate", lookups ? static_cast<double>(hits_) / lookups : 0.0,
+      "entries", static_cast<Py_ssize_t>(entries_.size()),
+      "capacity", static_cast<Py_ssize_t>(capacity_),
+      "memory", static_cast<Py_ssize_t>(memory));
+    if (!result) {
+      throw Exception();
+    }
+    return result;
   }
 
-  void register_type(PyObject* pyparticipant)
+  void reset_stats()
   {
-    // Get DomainParticipant_var
-    DDS::DomainParticipant* participant = get_capsule<DDS::DomainParticipant>(pyparticipant);
-    if (!participant) {
-      throw Exception("Could not get native participant", PyExc_TypeError);
-    }
+    hits_ = 0;
+    misses_ = 0;
+  }
 
-    // Register with OpenDDS
-    TypeSupportImpl* type_support = new TypeSupportImpl;
-    if (type_support->register_type(participant, "") != DDS::RETCODE_OK) {
-      delete type_support;
-      type_support = 0;
-      throw Exception("Could not create register type", Errors::PyOpenDDS_Error());
-    }
+  const char* name() const { return name_; }
 
-    // Store TypeSupport in Python Participant
-    Ref capsule = PyCapsule_New(type_support, nullptr, delete_typesupport);
-    if (!capsule) {
+  /// All the caches in this module that have been used
+  static std::vector<StringCache*>& all()
+  {
+    static std::vector<StringCache*> caches;
+    return caches;
+  }
+
+  /**
+   * Return a dict of the stats of all the caches in this module by the
+   * scoped name of their field.
+   */
+  static PyObject* all_stats()
+  {
+    Ref result = PyDict_New();
+    if (!result) {
       throw Exception();
     }
-    Ref list{PyObject_GetAttrString(pyparticipant, "_registered_typesupport")};
-    if (!list || PyList_Append(*list, *capsule)) {
-      throw Exception();
+    for (const StringCache* cache : all()) {
+      Ref stats = cache->stats();
+      if (PyDict_SetItemString(*result, cache->name(), *stats)) {
+        throw Exception();
+      }
     }
+    result++;
+    return *result;
   }
 
-  PyObject* take_next_sample(PyObject* pyreader)
+private:
+  struct Entry {
+    std::string key;
+    PyObject* value;
+  };
+  typedef std::list<Entry> Entries;
+  typedef std::unordered_map<std::string, Entries::iterator> Index;
+
+  const char* const name_;
+  const size_t capacity_;
+  Entries entries_;
+  Index index_;
+  std::string key_;
+  unsigned long long hits_;
+  unsigned long long misses_;
+};
+
+/**
+ * IDL wstring maps to str. IDL wchar is 16 bits, so characters outside the
+ * Basic Multilingual Plane are rejected.
+ */
+template <typename T>
+class WideStringType {
+public:
+  static PyObject* get_python_class() { return reinterpret_cast<PyObject*>(&PyUnicode_Type); }
+
+  template <typename C>
+  static void cpp_to_python(const C& cpp, PyObject*& py)
   {
-    DDS::DataReader* reader = get_capsule<DDS::DataReader>(pyreader);
-    if (!reader) {
+    py = PyUnicode_FromWideChar(string_data(cpp), string_length(cpp));
+    if (!py) {
       throw Exception();
     }
+  }
 
-    DataReader* reader_impl = DataReader::_narrow(reader);
-    if (!reader_impl) {
-      throw Exception("Could not narrow reader implementation", Errors::PyOpenDDS_Error());
+  static void python_to_cpp(PyObject* py, T& cpp)
+  {
+    if (PyUnicode_Check(py) && PyUnicode_MAX_CHAR_VALUE(py) > 0xffff) {
+      throw Exception("String has Characters Out of Range for IDL wstring", PyExc_ValueError);
     }
-
-    DDS::ReadCondition_var read_condition = reader_impl->create_readcondition(
-      DDS::ANY_SAMPLE_STATE, DDS::ANY_VIEW_STATE, DDS::ANY_SAMPLE_STATE);
-    DDS::WaitSet_var ws = new DDS::WaitSet;
-    ws->attach_condition(read_condition);
-    DDS::ConditionSeq active;
-    const DDS::Duration_t max_wait_time = {10, 0};
-    if (Errors::check_rc(ws->wait(active, max_wait_time))) {
+    Py_ssize_t length;
+    wchar_t* const data = PyUnicode_AsWideCharString(py, &length);
+    if (!data) {
       throw Exception();
     }
-    ws->detach_condition(read_condition);
-    reader_impl->delete_readcondition(read_condition);
+    std::unique_ptr<wchar_t, void (*)(void*)> free_data(data, PyMem_Free);
+    string_assign(cpp, data, length);
+  }
+};
 
-    IdlType sample;
-    DDS::SampleInfo info;
-    if (Errors::check_rc(reader_impl->take_next_sample(sample, info))) {
-      throw Exception();
-    }
+typedef
+#ifdef CPP11_IDL
+  std::wstring
+#else
+  ::TAO::WString_Manager
+#endif
+    s16;
 
-    PyObject* rv = nullptr;
-    Type<IdlType>::cpp_to_python(sample, rv);
+template <>
+class Type<s16> : public WideStringType<s16> {
+};
 
-    return rv;
-  }
+/**
+ * Element access for IDL sequences, which are std::vector in the C++11 mapping
+ * and TAO sequences in the classic mapping.
+ */
+#ifdef CPP11_IDL
+template <typename Seq>
+size_t sequence_length(const Seq& seq)
+{
+  return seq.size();
+}
+
+template <typename Seq>
+void sequence_resize(Seq& seq, size_t length)
+{
+  seq.resize(length);
+}
+
+template <typename Seq>
+auto sequence_data(Seq& seq) -> decltype(seq.data())
+{
+  return seq.data();
+}
+#else
+template <typename Seq>
+size_t sequence_length(const Seq& seq)
+{
+  return seq.length();
+}
+
+template <typename Seq>
+void sequence_resize(Seq& seq, size_t length)
+{
+  seq.length(static_cast< ::CORBA::ULong>(length));
+}
+
+template <typename Seq>
+auto sequence_data(Seq& seq) -> decltype(seq.get_buffer())
+{
+  return seq.get_buffer();
+}
+#endif
+
+/**
+ * Elements of an IDL sequence, which can have a maximum length if it's
+ * bounded. Seq is const for sequences that are only read from.
+ */
+template <typename Seq>
+class SequenceElements {
+public:
+  explicit SequenceElements(Seq& seq, size_t max_length = 0)
+    : seq_(seq)
+    , max_length_(max_length)
+  {
+  }
+
+  size_t size() const { return sequence_length(seq_); }
+
+  void resize(size_t length)
+  {
+    if (max_length_ && length > max_length_) {
+      PyErr_Format(PyExc_ValueError, "Sequence can't have more than %zu elements, got %zu",
+        max_length_, length);
+      throw Exception();
+    }
+    sequence_resize(seq_, length);
+  }
+
+  auto data() -> decltype(sequence_data(std::declval<Seq&>())) { return sequence_data(seq_); }
+
+  auto operator[](size_t i) -> decltype(std::declval<Seq&>()[0]) { return seq_[i]; }
+
+private:
+  Seq& seq_;
+  const size_t max_length_;
+};
+
+template <typename Seq>
+SequenceElements<Seq> sequence_elements(Seq& seq, size_t max_length = 0)
+{
+  return SequenceElements<Seq>(seq, max_length);
+}
+
+/**
+ * Elements of an IDL array. Multidimensional arrays are treated as one flat
+ * array in row-major order. E is const for arrays that are only read from.
+ */
+template <typename E>
+class ArrayElements {
+public:
+  ArrayElements(E* data, size_t count)
+    : data_(data)
+    , count_(count)
+  {
+  }
+
+  size_t size() const { return count_; }
+
+  void resize(size_t length)
+  {
+    if (length != count_) {
+      PyErr_Format(PyExc_ValueError, "Array must have exactly %zu elements, got %zu",
+        count_, length);
+      throw Exception();
+    }
+  }
+
+  E* data() { return data_; }
+
+  E& operator[](size_t i) { return data_[i]; }
+
+private:
+  E* const data_;
+  const size_t count_;
+};
+
+template <typename E>
+ArrayElements<E> array_elements(E* data, size_t count)
+{
+  return ArrayElements<E>(data, count);
+}
+
+/**
+ * Describes element types of sequences and arrays that can be copied to and
+ * from Python in one block using the buffer protocol. kind is 'i', 'u', or 'f'
+ * for signed, unsigned, and floating point numbers. typecode is for the
+ * array.array used for them in Python, except for octets which use bytes.
+ */
+template <typename T>
+struct BufferTraits {
+  static const bool is_number = false;
+};
+
+template <char Kind, char Typecode>
+struct NumberBufferTraits {
+  static const bool is_number = true;
+  static const char kind = Kind;
+  static const char typecode = Typecode;
+};
+
+template <>
+struct BufferTraits<u8> : public NumberBufferTraits<'u', 0> {
+};
+
+template <>
+struct BufferTraits<i8> : public NumberBufferTraits<'i', 'b'> {
+};
+
+template <>
+struct BufferTraits<u16> : public NumberBufferTraits<'u', 'H'> {
+};
+
+template <>
+struct BufferTraits<i16> : public NumberBufferTraits<'i', 'h'> {
+};
+
+template <>
+struct BufferTraits<u32> : public NumberBufferTraits<'u', 'I'> {
+};
+
+template <>
+struct BufferTraits<i32> : public NumberBufferTraits<'i', 'i'> {
+};
+
+template <>
+struct BufferTraits<u64> : public NumberBufferTraits<'u', 'Q'> {
+};
+
+template <>
+struct BufferTraits<i64> : public NumberBufferTraits<'i', 'q'> {
+};
+
+template <>
+struct BufferTraits<f32> : public NumberBufferTraits<'f', 'f'> {
+};
+
+template <>
+struct BufferTraits<f64> : public NumberBufferTraits<'f', 'd'> {
+};
+
+/**
+ * Return 'i', 'u', or 'f' for the kind of number in a buffer using the struct
+ * module format, or 0 if it's something else.
+ */
+char buffer_format_kind(const char* format)
+{
+  if (!format) {
+    return 'u'; // Unsigned bytes
+  }
+  if (format[0] == '@' || format[0] == '=') {
+    ++format;
+  }
+  if (!format[0] || format[1]) {
+    return 0;
+  } else if (std::strchr("bhilqn", format[0])) {
+    return 'i';
+  } else if (std::strchr("BHILQNc", format[0])) {
+    return 'u';
+  } else if (std::strchr("efd", format[0])) {
+    return 'f';
+  }
+  return 0;
+}
+
+PyObject* get_array_class()
+{
+  static PyObject* array_class = nullptr;
+  if (!array_class) {
+    Ref module = PyImport_ImportModule("array");
+    if (!module) {
+      throw Exception();
+    }
+    array_class = PyObject_GetAttrString(*module, "array");
+    if (!array_class) {
+      throw Exception();
+    }
+  }
+  return array_class;
+}
+
+/**
+ * Assign a converted element to its place in a sequence or array. Classic
+ * mapping string sequences return a proxy for their elements that has to be
+ * assigned a plain string.
+ */
+template <typename Target, typename T>
+void move_element(Target&& target, T& value)
+{
+  target = std::move(value);
+}
+
+#ifndef CPP11_IDL
+template <typename Target>
+void move_element(Target&& target, ::TAO::String_Manager& value)
+{
+  target = value.in();
+}
+
+template <typename Target>
+void move_element(Target&& target, ::TAO::WString_Manager& value)
+{
+  target = value.in();
+}
+#endif
+
+/**
+ * Converts sequences and arrays of E, passed as SequenceElements or
+ * ArrayElements. This is the general case where the elements are converted
+ * one at a time to and from a list. Any extra arguments, like the encoding of
+ * strings, are passed on to Type<E>.
+ */
+template <typename E, bool = BufferTraits<E>::is_number>
+class ElementsType {
+public:
+  template <typename Elements, typename... Args>
+  static void cpp_to_python(Elements elements, PyObject*& py, Args... args)
+  {
+    const size_t count = elements.size();
+    Ref list = PyList_New(count);
+    if (!list) {
+      throw Exception();
+    }
+    for (size_t i = 0; i < count; ++i) {
+      PyObject* item = nullptr;
+      Type<E>::cpp_to_python(elements[i], item, args...);
+      PyList_SET_ITEM(*list, i, item);
+    }
+    list++;
+    py = *list;
+  }
+
+  template <typename Elements, typename... Args>
+  static void python_to_cpp(PyObject* py, Elements elements, Args... args)
+  {
+    Ref fast = PySequence_Fast(py, "Expected a sequence");
+    if (!fast) {
+      throw Exception();
+    }
+    const size_t count = PySequence_Fast_GET_SIZE(*fast);
+    elements.resize(count);
+    PyObject** const items = PySequence_Fast_ITEMS(*fast);
+    for (size_t i = 0; i < count; ++i) {
+      E value;
+      Type<E>::python_to_cpp(items[i], value, args...);
+      move_element(elements[i], value);
+    }
+  }
+};
+
+/**
+ * Sequences and arrays of numbers are copied as a block to bytes or an
+ * array.array, and from any object supporting the buffer protocol with the
+ * same kind and size of number, like array.array or a NumPy array. Other
+ * objects are converted one element at a time.
+ */
+template <typename E>
+class ElementsType<E, true> {
+public:
+  typedef BufferTraits<E> Traits;
+
+  template <typename Elements>
+  static void cpp_to_python(Elements elements, PyObject*& py)
+  {
+    const size_t size = elements.size() * sizeof(E);
+    const char* const data = size ? reinterpret_cast<const char*>(elements.data()) : "";
+    if (!Traits::typecode) {
+      py = PyBytes_FromStringAndSize(data, size);
+      if (!py) {
+        throw Exception();
+      }
+      return;
+    }
+
+    Ref array = PyObject_CallFunction(get_array_class(), "C", Traits::typecode);
+    if (!array) {
+      throw Exception();
+    }
+    if (size) {
+      Ref view = PyMemoryView_FromMemory(const_cast<char*>(data), size, PyBUF_READ);
+      if (!view) {
+        throw Exception();
+      }
+      Ref result = PyObject_CallMethod(*array, "frombytes", "O", *view);
+      if (!result) {
+        throw Exception();
+      }
+    }
+    array++;
+    py = *array;
+  }
+
+  template <typename Elements>
+  static void python_to_cpp(PyObject* py, Elements elements)
+  {
+    if (PyObject_CheckBuffer(py)) {
+      Py_buffer view;
+      if (!PyObject_GetBuffer(py, &view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT)) {
+        std::unique_ptr<Py_buffer, void (*)(Py_buffer*)> release(&view, PyBuffer_Release);
+        if (view.itemsize == sizeof(E) && buffer_format_kind(view.format) == Traits::kind) {
+          const size_t count = view.len / sizeof(E);
+          elements.resize(count);
+          if (count) {
+            std::memcpy(elements.data(), view.buf, count * sizeof(E));
+          }
+          return;
+        }
+      } else {
+        // Not contiguous, try converting the elements one at a time
+        PyErr_Clear();
+      }
+    }
+    ElementsType<E, false>::python_to_cpp(py, elements);
+  }
+};
+
+/**
+ * Python object that owns a C++ sample and converts each of its fields to
+ * Python the first time it's accessed, keeping the result. These are the
+ * proxies DataReader.take_lazy returns for types generated by itl2py with
+ * --lazy-samples, where Type<T> has field_count and field_to_python.
+ */
+template <typename T>
+class LazySample {
+public:
+  static const bool enabled = true;
+
+  struct Object {
+    PyObject_HEAD
+    T sample;
+    PyObject* fields[Type<T>::field_count ? Type<T>::field_count : 1];
+  };
+
+  /**
+   * Create the Python type of the proxies when the module is initialized.
+   * Returns true if there was an error.
+   */
+  static bool init(const char* name)
+  {
+    static PyMethodDef methods[] = {
+      {"materialize", materialize, METH_NOARGS,
+        "Convert the whole sample to the regular class of the topic type."},
+      {nullptr, nullptr, 0, nullptr},
+    };
+    static PyType_Slot slots[] = {
+      {Py_tp_dealloc, reinterpret_cast<void*>(dealloc)},
+      {Py_tp_getattro, reinterpret_cast<void*>(getattro)},
+      {Py_tp_methods, methods},
+      {Py_tp_doc, const_cast<char*>("Sample that converts its fields when they're accessed")},
+      {0, nullptr},
+    };
+    static PyType_Spec spec = {name, sizeof(Object), 0, Py_TPFLAGS_DEFAULT, slots};
+    type_ = reinterpret_cast<PyTypeObject*>(PyType_FromSpec(&spec));
+    return !type_;
+  }
+
+  /// Create a proxy with a copy of the sample
+  static PyObject* create(const T& sample)
+  {
+    // Like new_entity, tp_alloc holds the reference to the type that dealloc
+    // releases, which PyObject_New doesn't before Python 3.8.
+    Object* const object = reinterpret_cast<Object*>(type_->tp_alloc(type_, 0));
+    if (!object) {
+      throw Exception();
+    }
+    new (&object->sample) T(sample);
+    std::fill(std::begin(object->fields), std::end(object->fields), nullptr);
+    return reinterpret_cast<PyObject*>(object);
+  }
+
+private:
+  static PyTypeObject* type_;
+
+  static void dealloc(PyObject* self)
+  {
+    Object* const object = reinterpret_cast<Object*>(self);
+    PyTypeObject* const type = Py_TYPE(self);
+    for (PyObject* field : object->fields) {
+      Py_XDECREF(field);
+    }
+    object->sample.~T();
+    type->tp_free(self);
+    Py_DECREF(type);
+  }
+
+  /// Return the index of the field with the name, or -1 if there isn't one
+  static Py_ssize_t field_index(PyObject* name)
+  {
+    PyObject* const* const field_names = Type<T>::get_field_names();
+    // Names used in code are interned, so they're usually the same object
+    for (size_t i = 0; i < Type<T>::field_count; ++i) {
+      if (field_names[i] == name) {
+        return static_cast<Py_ssize_t>(i);
+      }
+    }
+    if (PyUnicode_Check(name)) {
+      for (size_t i = 0; i < Type<T>::field_count; ++i) {
+        if (PyUnicode_Compare(field_names[i], name) == 0) {
+          return static_cast<Py_ssize_t>(i);
+        }
+      }
+    }
+    return -1;
+  }
+
+  static PyObject* getattro(PyObject* self, PyObject* name)
+  {
+    Object* const object = reinterpret_cast<Object*>(self);
+    try {
+      const Py_ssize_t index = field_index(name);
+      if (index < 0) {
+        return PyObject_GenericGetAttr(self, name);
+      }
+      PyObject*& field = object->fields[index];
+      if (!field) {
+        field = Type<T>::field_to_python(object->sample, index);
+      }
+      Py_INCREF(field);
+      return field;
+    } catch (const Exception& e) {
+      return e.set();
+    }
+  }
+
+  static PyObject* materialize(PyObject* self, PyObject*)
+  {
+    Object* const object = reinterpret_cast<Object*>(self);
+    try {
+      Ref sample;
+      Type<T>::cpp_to_python(object->sample, *sample);
+      sample++;
+      return *sample;
+    } catch (const Exception& e) {
+      return e.set();
+    }
+  }
+};
+
+template <typename T>
+PyTypeObject* LazySample<T>::type_ = nullptr;
+
+/// Stands in for LazySample for types generated without --lazy-samples
+class NoLazySample {
+public:
+  static const bool enabled = false;
+
+  template <typename T>
+  static PyObject* create(const T&)
+  {
+    return nullptr;
+  }
+};
+
+class TopicTypeBase {
+public:
+  virtual PyObject* get_python_class() = 0;
+  virtual const char* type_name() = 0;
+  virtual PyObject* register_type(PyObject* pyparticipant) = 0;
+  virtual void bind(EntityObject* entity) = 0;
+  virtual PyObject* take_next_sample(EntityObject* reader) = 0;
+  virtual PyObject* take(EntityObject* reader, ::CORBA::Long max_samples,
+    const DDS::Duration_t& max_wait, bool take, bool with_info) = 0;
+  virtual PyObject* take_array(EntityObject* reader, ::CORBA::Long max_samples,
+    const DDS::Duration_t& max_wait, bool take) = 0;
+  virtual PyObject* take_serialized(EntityObject* reader, ::CORBA::Long max_samples,
+    const DDS::Duration_t& max_wait, bool take) = 0;
+  virtual PyObject* take_lazy(EntityObject* reader, ::CORBA::Long max_samples,
+    const DDS::Duration_t& max_wait, bool take) = 0;
+  virtual PyObject* lookup_instance(EntityObject* reader, PyObject* pysample) = 0;
+  virtual PyObject* take_instance(EntityObject* reader, DDS::InstanceHandle_t handle,
+    ::CORBA::Long max_samples, bool take) = 0;
+  virtual PyObject* take_next_instance(EntityObject* reader, DDS::InstanceHandle_t previous,
+    ::CORBA::Long max_samples, bool take) = 0;
+  virtual void enable_last_value_cache(EntityObject* reader) = 0;
+  virtual PyObject* last_value(EntityObject* reader, DDS::InstanceHandle_t handle) = 0;
+  virtual PyObject* changed_last_values(EntityObject* reader) = 0;
+  virtual void write(EntityObject* writer, PyObject* pysample) = 0;
+  virtual void write_many(EntityObject* writer, PyObject* pysamples) = 0;
+  virtual void dispose(EntityObject* writer, PyObject* pysample) = 0;
+#ifdef PYOPENDDS_BENCHMARKS
+  virtual PyObject* benchmark_conversion(PyObject* pysample, long iterations) = 0;
+#endif
+
+  typedef std::shared_ptr<TopicTypeBase> Ptr;
+  typedef std::map<PyObject*, Ptr> TopicTypes;
+
+  static TopicTypeBase* find(PyObject* pytype)
+  {
+    TopicTypes::iterator i = topic_types_.find(pytype);
+    if (i == topic_types_.end()) {
+      throw Exception("Not a Valid PyOpenDDS Type", PyExc_TypeError);
+    }
+    return i->second.get();
+  }
+
+protected:
+  static TopicTypes topic_types_;
+};
+
+template <typename T>
+class TopicType : public TopicTypeBase {
+public:
+  typedef typename OpenDDS::DCPS::DDSTraits<T> Traits;
+
+  typedef T IdlType;
+  typedef typename Traits::MessageSequenceType IdlTypeSequence;
+
+  typedef typename Traits::TypeSupportType TypeSupport;
+  typedef typename
+#if OPENDDS_VERSION_AT_LEAST(3, 19, 0)
+    Traits::TypeSupportImplType
+#else
+    Traits::TypeSupportTypeImpl
+#endif
+      TypeSupportImpl;
+  typedef typename Traits::DataWriterType DataWriter;
+  typedef typename DataWriter::_var_type DataWriterVar;
+  typedef typename Traits::DataReaderType DataReader;
+  typedef typename DataReader::_var_type DataReaderVar;
+
+  const char* type_name() { return Traits::type_name(); }
+
+  /**
+   * Holds the samples loaned from a reader by take or read and returns them to
+   * the reader when it goes out of scope.
+   */
+  class Loan {
+  public:
+    Loan(DataReader* reader, ReaderStats* stats)
+      : take_time(0)
+      , reader_(reader)
+      , stats_(stats)
+      , loaned_(false)
+    {
+    }
+
+    ~Loan() { release(); }
+
+    DDS::ReturnCode_t get(::CORBA::Long max_samples, bool take)
+    {
+      release();
+      const DDS::ReturnCode_t rc = take ?
+        reader_->take(samples, infos, max_samples, DDS::ANY_SAMPLE_STATE, DDS::ANY_VIEW_STATE,
+          DDS::ANY_INSTANCE_STATE) :
+        reader_->read(samples, infos, max_samples, DDS::ANY_SAMPLE_STATE, DDS::ANY_VIEW_STATE,
+          DDS::ANY_INSTANCE_STATE);
+      loaned_ = rc == DDS::RETCODE_OK;
+      got();
+      return rc;
+    }
+
+    /**
+     * Same as get, but only gets the samples of the instance with the handle,
+     * or with next, of the instance after it. Does not use the GIL.
+     */
+    DDS::ReturnCode_t get_instance(
+      ::CORBA::Long max_samples, DDS::InstanceHandle_t handle, bool take, bool next)
+    {
+      release();
+      const ReaderStats::Clock::time_point start = ReaderStats::Clock::now();
+      DDS::ReturnCode_t rc;
+      if (next) {
+        rc = take ?
+          reader_->take_next_instance(samples, infos, max_samples, handle,
+            DDS::ANY_SAMPLE_STATE, DDS::ANY_VIEW_STATE, DDS::ANY_INSTANCE_STATE) :
+          reader_->read_next_instance(samples, infos, max_samples, handle,
+            DDS::ANY_SAMPLE_STATE, DDS::ANY_VIEW_STATE, DDS::ANY_INSTANCE_STATE);
+      } else {
+        rc = take ?
+          reader_->take_instance(samples, infos, max_samples, handle,
+            DDS::ANY_SAMPLE_STATE, DDS::ANY_VIEW_STATE, DDS::ANY_INSTANCE_STATE) :
+          reader_->read_instance(samples, infos, max_samples, handle,
+            DDS::ANY_SAMPLE_STATE, DDS::ANY_VIEW_STATE, DDS::ANY_INSTANCE_STATE);
+      }
+      loaned_ = rc == DDS::RETCODE_OK;
+      ReaderStats::add_time(stats_->take_ns, start);
+      got();
+      return rc;
+    }
+
+    /**
+     * Same as get, but if there are no samples available, then wait up to
+     * max_wait for some to arrive. Does not use the GIL.
+     */
+    DDS::ReturnCode_t wait_and_get(
+      ::CORBA::Long max_samples, const DDS::Duration_t& max_wait, bool take)
+    {
+      ReaderStats::Clock::time_point start = ReaderStats::Clock::now();
+      DDS::ReturnCode_t rc = get(max_samples, take);
+      start = ReaderStats::add_time(stats_->take_ns, start);
+      if (rc == DDS::RETCODE_NO_DATA && (max_wait.sec || max_wait.nanosec)) {
+        DDS::ReadCondition_var read_condition = reader_->create_readcondition(
+          DDS::ANY_SAMPLE_STATE, DDS::ANY_VIEW_STATE, DDS::ANY_INSTANCE_STATE);
+        DDS::WaitSet_var ws = new DDS::WaitSet;
+        ws->attach_condition(read_condition);
+        DDS::ConditionSeq active;
+        rc = ws->wait(active, max_wait);
+        ws->detach_condition(read_condition);
+        reader_->delete_readcondition(read_condition);
+        start = ReaderStats::add_time(stats_->wait_ns, start);
+        if (rc == DDS::RETCODE_OK) {
+          rc = get(max_samples, take);
+          ReaderStats::add_time(stats_->take_ns, start);
+        }
+      }
+      return rc;
+    }
+
+    ::CORBA::ULong length() const
+    {
+#ifdef CPP11_IDL
+      return static_cast< ::CORBA::ULong>(samples.size());
+#else
+      return samples.length();
+#endif
+    }
+
+    void release()
+    {
+      if (loaned_) {
+        reader_->return_loan(samples, infos);
+        loaned_ = false;
+      }
+    }
+
+    IdlTypeSequence samples;
+    DDS::SampleInfoSeq infos;
+
+    /// When the samples were taken or read, in nanoseconds since the epoch
+    long long take_time;
+
+  private:
+    /// Note when the samples were gotten and record their latency
+    void got()
+    {
+      if (loaned_) {
+        take_time = ReaderStats::wall_ns();
+        stats_->record_latency(infos, length(), take_time);
+      }
+    }
+
+    DataReader* reader_;
+    ReaderStats* stats_;
+    bool loaned_;
+  };
+
+  /**
+   * Callback for Python to call when the TypeSupport capsule is deleted
+   */
+  static void delete_typesupport(PyObject* capsule)
+  {
+    if (PyCapsule_CheckExact(capsule)) {
+      delete static_cast<TypeSupportImpl*>(PyCapsule_GetPointer(capsule, nullptr));
+    }
+  }
+
+  /**
+   * Narrow a native reader or writer to the interface for this type once and
+   * bind it to this TopicType, so calls on it don't have to find either again.
+   */
+  void bind(EntityObject* entity)
+  {
+    if (entity->kind == EntityKind::datareader) {
+      DataReaderVar reader =
+        DataReader::_narrow(static_cast<DDS::DataReader*>(entity->interface));
+      if (!reader) {
+        throw Exception("Could not narrow reader implementation", Errors::PyOpenDDS_Error());
+      }
+      entity->narrowed = reader.in();
+    } else if (entity->kind == EntityKind::datawriter) {
+      DataWriterVar writer =
+        DataWriter::_narrow(static_cast<DDS::DataWriter*>(entity->interface));
+      if (!writer) {
+        throw Exception("Could not narrow writer implementation", Errors::PyOpenDDS_Error());
+      }
+      entity->narrowed = writer.in();
+    } else {
+      throw Exception("Only readers and writers can be bound to a type", PyExc_TypeError);
+    }
+    entity->bound_topic_type = this;
+  }
+
+  static DataReader* reader_of(EntityObject* reader)
+  {
+    return static_cast<DataReader*>(reader->narrowed);
+  }
+
+  static DataWriter* writer_of(EntityObject* writer)
+  {
+    return static_cast<DataWriter*>(writer->narrowed);
+  }
+
+#if OPENDDS_VERSION_AT_LEAST(3, 16, 0)
+  static const OpenDDS::DCPS::Encoding& cdr_encoding()
+  {
+    static const OpenDDS::DCPS::Encoding encoding(
+      OpenDDS::DCPS::Encoding::KIND_XCDR1, OpenDDS::DCPS::ENDIAN_NATIVE);
+    return encoding;
+  }
+#endif
+
+  /// Size of a sample when serialized by serialize_cdr
+  static size_t cdr_size(const IdlType& sample)
+  {
+    size_t size = 0;
+#if OPENDDS_VERSION_AT_LEAST(3, 16, 0)
+    OpenDDS::DCPS::serialized_size(cdr_encoding(), size, sample);
+#else
+    size_t padding = 0;
+    OpenDDS::DCPS::gen_find_size(sample, size, padding);
+    size += padding;
+#endif
+    return size;
+  }
+
+  /**
+   * Serialize a sample as classic CDR in native byte order without an
+   * encapsulation header into the size bytes at data, which must be 8 byte
+   * aligned. Returns false if it didn't fit.
+   */
+  static bool serialize_cdr(const IdlType& sample, char* data, size_t size)
+  {
+    ACE_Message_Block block(data, size);
+#if OPENDDS_VERSION_AT_LEAST(3, 16, 0)
+    OpenDDS::DCPS::Serializer serializer(&block, cdr_encoding());
+#else
+    OpenDDS::DCPS::Serializer serializer(&block, false, OpenDDS::DCPS::Serializer::ALIGN_CDR);
+#endif
+    return serializer << sample;
+  }
+
+  PyObject* register_type(PyObject* pyparticipant)
+  {
+    // Get DomainParticipant_var
+    DDS::DomainParticipant* participant = get_entity<DDS::DomainParticipant>(pyparticipant);
+    if (!participant) {
+      throw Exception();
+    }
+
+    // Register with OpenDDS
+    TypeSupportImpl* type_support = new TypeSupportImpl;
+    DDS::ReturnCode_t rc;
+    {
+      GilRelease release;
+      rc = type_support->register_type(participant, "");
+    }
+    if (rc != DDS::RETCODE_OK) {
+      delete type_support;
+      type_support = 0;
+      throw Exception("Could not create register type", Errors::PyOpenDDS_Error());
+    }
+
+    // Return TypeSupport for the Python Participant to keep
+    PyObject* capsule = PyCapsule_New(type_support, nullptr, delete_typesupport);
+    if (!capsule) {
+      throw Exception();
+    }
+    return capsule;
+  }
+
+  PyObject* take_next_sample(EntityObject* reader)
+  {
+    DataReader* const reader_impl = reader_of(reader);
+    ReaderStats* const stats = reader->reader_stats;
+
+    IdlType sample;
+    DDS::SampleInfo info;
+    DDS::ReturnCode_t rc;
+    {
+      GilRelease release;
+      ReaderStats::Clock::time_point start = ReaderStats::Clock::now();
+      DDS::ReadCondition_var read_condition = reader_impl->create_readcondition(
+        DDS::ANY_SAMPLE_STATE, DDS::ANY_VIEW_STATE, DDS::ANY_SAMPLE_STATE);
+      DDS::WaitSet_var ws = new DDS::WaitSet;
+      ws->attach_condition(read_condition);
+      DDS::ConditionSeq active;
+      const DDS::Duration_t max_wait_time = {10, 0};
+      rc = ws->wait(active, max_wait_time);
+      ws->detach_condition(read_condition);
+      reader_impl->delete_readcondition(read_condition);
+      start = ReaderStats::add_time(stats->wait_ns, start);
+      if (rc == DDS::RETCODE_OK) {
+        rc = reader_impl->take_next_sample(sample, info);
+        ReaderStats::add_time(stats->take_ns, start);
+        if (rc == DDS::RETCODE_OK) {
+          stats->record_latency(info, ReaderStats::wall_ns());
+        }
+      }
+    }
+    if (Errors::check_rc(rc)) {
+      throw Exception();
+    }
+
+    const ReaderStats::Clock::time_point start = ReaderStats::Clock::now();
+    PyObject* rv = nullptr;
+    Type<IdlType>::cpp_to_python(sample, rv);
+    stats->converted(1, start);
+
+    return rv;
+  }
+
+  /**
+   * Fill the loan using wait_and_get without the GIL. Returns false if there
+   * were no samples.
+   */
+  static bool get_samples(
+    Loan& loan, ::CORBA::Long max_samples, const DDS::Duration_t& max_wait, bool take)
+  {
+    DDS::ReturnCode_t rc;
+    {
+      GilRelease release;
+      rc = loan.wait_and_get(max_samples, max_wait, take);
+    }
+    if (rc == DDS::RETCODE_NO_DATA || rc == DDS::RETCODE_TIMEOUT) {
+      return false;
+    }
+    if (Errors::check_rc(rc)) {
+      throw Exception();
+    }
+    return true;
+  }
+
+  /**
+   * Take or read up to max_samples samples from the reader and return them as
+   * a Python list. If there are no samples already available, then wait up to
+   * max_wait for some to arrive. An empty list is returned if none did. With
+   * with_info, the list has a tuple of each sample and its SampleInfoType.
+   */
+  PyObject* take(EntityObject* reader, ::CORBA::Long max_samples,
+    const DDS::Duration_t& max_wait, bool take, bool with_info)
+  {
+    Loan loan(reader_of(reader), reader->reader_stats);
+    if (!get_samples(loan, max_samples, max_wait, take)) {
+      return PyList_New(0);
+    }
+    return to_list(reader, loan, with_info);
+  }
+
+  /**
+   * Convert the valid samples in the loan to a Python list, as tuples with
+   * their SampleInfoType if with_info is true.
+   */
+  static PyObject* to_list(EntityObject* reader, Loan& loan, bool with_info = false)
+  {
+    const ReaderStats::Clock::time_point start = ReaderStats::Clock::now();
+    const ::CORBA::ULong length = loan.length();
+    Ref list = PyList_New(0);
+    if (!list) {
+      throw Exception();
+    }
+    for (::CORBA::ULong i = 0; i < length; ++i) {
+      if (!loan.infos[i].valid_data) {
+        continue;
+      }
+      Ref sample;
+      Type<IdlType>::cpp_to_python(loan.samples[i], *sample);
+      if (with_info) {
+        Ref info = SampleInfoType::create(loan.infos[i], loan.take_time);
+        sample = PyTuple_Pack(2, *sample, *info);
+        if (!sample) {
+          throw Exception();
+        }
+      }
+      if (PyList_Append(*list, *sample)) {
+        throw Exception();
+      }
+    }
+    reader->reader_stats->converted(PyList_GET_SIZE(*list), start);
+    list++;
+    return *list;
+  }
+
+  /**
+   * Same as take, but returns the samples serialized by serialize_cdr as
+   * memoryviews of one bytes object instead of converting them. Each sample
+   * starts 8 byte aligned, so the alignment of its fields is relative to its
+   * start.
+   */
+  PyObject* take_serialized(
+    EntityObject* reader, ::CORBA::Long max_samples, const DDS::Duration_t& max_wait, bool take)
+  {
+    Loan loan(reader_of(reader), reader->reader_stats);
+    if (!get_samples(loan, max_samples, max_wait, take)) {
+      return PyList_New(0);
+    }
+
+    const ReaderStats::Clock::time_point start = ReaderStats::Clock::now();
+    const ::CORBA::ULong length = loan.length();
+    std::vector<size_t> sizes(length);
+    size_t total = 0;
+    for (::CORBA::ULong i = 0; i < length; ++i) {
+      if (loan.infos[i].valid_data) {
+        sizes[i] = cdr_size(loan.samples[i]);
+        total += align8(sizes[i]);
+      }
+    }
+
+    // Extra room to align the start of the first sample
+    Ref buffer = PyBytes_FromStringAndSize(nullptr, total + 7);
+    if (!buffer) {
+      throw Exception();
+    }
+    char* const data = PyBytes_AS_STRING(*buffer);
+    Ref whole = PyMemoryView_FromObject(*buffer);
+    Ref list = PyList_New(0);
+    if (!whole || !list) {
+      throw Exception();
+    }
+    size_t offset = align8(reinterpret_cast<std::uintptr_t>(data)) -
+      reinterpret_cast<std::uintptr_t>(data);
+    size_t bytes = 0;
+    for (::CORBA::ULong i = 0; i < length; ++i) {
+      if (!loan.infos[i].valid_data) {
+        continue;
+      }
+      if (!serialize_cdr(loan.samples[i], data + offset, sizes[i])) {
+        throw Exception("Could not serialize sample", Errors::PyOpenDDS_Error());
+      }
+      Ref view = PySequence_GetSlice(*whole, offset, offset + sizes[i]);
+      if (!view || PyList_Append(*list, *view)) {
+        throw Exception();
+      }
+      offset += align8(sizes[i]);
+      bytes += sizes[i];
+    }
+    reader->reader_stats->converted(PyList_GET_SIZE(*list), bytes, start);
+    list++;
+    return *list;
+  }
+
+  /**
+   * Same as take, but returns LazySample proxies that keep a copy of the C++
+   * sample and only convert the fields that are accessed. The copy is made
+   * from the loan, which belongs to the reader, so it can't be moved.
+   */
+  PyObject* take_lazy(
+    EntityObject* reader, ::CORBA::Long max_samples, const DDS::Duration_t& max_wait, bool take)
+  {
+    typedef typename Type<IdlType>::Proxy Proxy;
+    if (!Proxy::enabled) {
+      throw Exception("Type was generated without itl2py --lazy-samples", PyExc_TypeError);
+    }
+
+    Loan loan(reader_of(reader), reader->reader_stats);
+    if (!get_samples(loan, max_samples, max_wait, take)) {
+      return PyList_New(0);
+    }
+
+    const ReaderStats::Clock::time_point start = ReaderStats::Clock::now();
+    const ::CORBA::ULong length = loan.length();
+    Ref list = PyList_New(0);
+    if (!list) {
+      throw Exception();
+    }
+    for (::CORBA::ULong i = 0; i < length; ++i) {
+      if (!loan.infos[i].valid_data) {
+        continue;
+      }
+      Ref proxy = Proxy::create(loan.samples[i]);
+      if (PyList_Append(*list, *proxy)) {
+        throw Exception();
+      }
+    }
+    reader->reader_stats->converted(PyList_GET_SIZE(*list), start);
+    list++;
+    return *list;
+  }
+
+  static size_t align8(size_t value)
+  {
+    return (value + 7) & ~static_cast<size_t>(7);
+  }
+
+  /**
+   * Fill the loan using get_instance without the GIL. Returns false if there
+   * were no samples.
+   */
+  static bool get_instance_samples(Loan& loan, ::CORBA::Long max_samples,
+    DDS::InstanceHandle_t handle, bool take, bool next)
+  {
+    DDS::ReturnCode_t rc;
+    {
+      GilRelease release;
+      rc = loan.get_instance(max_samples, handle, take, next);
+    }
+    if (rc == DDS::RETCODE_NO_DATA) {
+      return false;
+    }
+    if (Errors::check_rc(rc)) {
+      throw Exception();
+    }
+    return true;
+  }
+
+  /**
+   * Return the handle of the instance with the same key as the sample, or
+   * HANDLE_NIL if the reader doesn't know about it.
+   */
+  PyObject* lookup_instance(EntityObject* reader, PyObject* pysample)
+  {
+    IdlType sample;
+    Type<IdlType>::python_to_cpp(pysample, sample);
+    DDS::InstanceHandle_t handle;
+    {
+      GilRelease release;
+      handle = reader_of(reader)->lookup_instance(sample);
+    }
+    return PyLong_FromLong(handle);
+  }
+
+  /**
+   * Take or read up to max_samples samples of one instance without waiting
+   * and return them as a Python list.
+   */
+  PyObject* take_instance(EntityObject* reader, DDS::InstanceHandle_t handle,
+    ::CORBA::Long max_samples, bool take)
+  {
+    Loan loan(reader_of(reader), reader->reader_stats);
+    if (!get_instance_samples(loan, max_samples, handle, take, false)) {
+      return PyList_New(0);
+    }
+    return to_list(reader, loan);
+  }
+
+  /**
+   * Take or read up to max_samples samples of the instance after previous
+   * without waiting. Returns a tuple of the handle of that instance and a
+   * list of the samples, or HANDLE_NIL and an empty list if there are no
+   * more instances with samples.
+   */
+  PyObject* take_next_instance(EntityObject* reader, DDS::InstanceHandle_t previous,
+    ::CORBA::Long max_samples, bool take)
+  {
+    Loan loan(reader_of(reader), reader->reader_stats);
+    if (!get_instance_samples(loan, max_samples, previous, take, true)) {
+      return Py_BuildValue("(i[])", DDS::HANDLE_NIL);
+    }
+    Ref list = to_list(reader, loan);
+    return Py_BuildValue("(iO)", loan.infos[0].instance_handle, *list);
+  }
+
+  /**
+   * Newest sample of each instance of a reader that enabled the cache. The
+   * samples are taken from the reader and kept as C++ samples until they're
+   * asked for, so only those are converted to Python. The conversion is kept
+   * until a newer sample of the instance replaces it.
+   */
+  class LastValueCache : public LastValueCacheBase {
+  public:
+    /**
+     * Take all the samples the reader has, keeping the newest of each
+     * instance. Disposed instances are removed.
+     */
+    void update(EntityObject* reader)
+    {
+      Loan loan(reader_of(reader), reader->reader_stats);
+      const DDS::Duration_t no_wait = {0, 0};
+      if (!get_samples(loan, DDS::LENGTH_UNLIMITED, no_wait, true)) {
+        return;
+      }
+      const ::CORBA::ULong length = loan.length();
+      for (::CORBA::ULong i = 0; i < length; ++i) {
+        const DDS::SampleInfo& info = loan.infos[i];
+        if (info.valid_data) {
+          Entry& entry = entries_[info.instance_handle];
+          entry.sample = loan.samples[i];
+          entry.converted = nullptr;
+          changed_.insert(info.instance_handle);
+        } else if (info.instance_state == DDS::NOT_ALIVE_DISPOSED_INSTANCE_STATE) {
+          entries_.erase(info.instance_handle);
+          changed_.insert(info.instance_handle);
+        }
+      }
+    }
+
+    /// Return the newest sample of the instance, or None if there isn't one
+    PyObject* value(EntityObject* reader, DDS::InstanceHandle_t handle)
+    {
+      typename Entries::iterator i = entries_.find(handle);
+      if (i == entries_.end()) {
+        Py_RETURN_NONE;
+      }
+      Entry& entry = i->second;
+      if (!entry.converted) {
+        const ReaderStats::Clock::time_point start = ReaderStats::Clock::now();
+        Ref sample;
+        Type<IdlType>::cpp_to_python(entry.sample, *sample);
+        reader->reader_stats->converted(1, start);
+        sample++;
+        entry.converted = *sample;
+      }
+      entry.converted++;
+      return *entry.converted;
+    }
+
+    /**
+     * Return a dict of the newest sample of each instance that changed since
+     * the last call, by handle. Disposed instances are None.
+     */
+    PyObject* changes(EntityObject* reader)
+    {
+      Ref dict = PyDict_New();
+      if (!dict) {
+        throw Exception();
+      }
+      for (DDS::InstanceHandle_t handle : changed_) {
+        Ref key = PyLong_FromLong(handle);
+        if (!key) {
+          throw Exception();
+        }
+        Ref sample = value(reader, handle);
+        if (PyDict_SetItem(*dict, *key, *sample)) {
+          throw Exception();
+        }
+      }
+      changed_.clear();
+      dict++;
+      return *dict;
+    }
+
+  private:
+    struct Entry {
+      IdlType sample;
+      Ref converted;
+    };
+    typedef std::unordered_map<DDS::InstanceHandle_t, Entry> Entries;
+    Entries entries_;
+    std::unordered_set<DDS::InstanceHandle_t> changed_;
+  };
+
+  void enable_last_value_cache(EntityObject* reader)
+  {
+    if (!reader->last_value_cache) {
+      reader->last_value_cache = new LastValueCache;
+    }
+  }
+
+  /// Get the last value cache of the reader, updated with the samples it has
+  static LastValueCache& updated_cache(EntityObject* reader)
+  {
+    if (!reader->last_value_cache) {
+      throw Exception("Last value cache is not enabled", Errors::PyOpenDDS_Error());
+    }
+    LastValueCache& cache = *static_cast<LastValueCache*>(reader->last_value_cache);
+    cache.update(reader);
+    return cache;
+  }
+
+  PyObject* last_value(EntityObject* reader, DDS::InstanceHandle_t handle)
+  {
+    return updated_cache(reader).value(reader, handle);
+  }
+
+  PyObject* changed_last_values(EntityObject* reader)
+  {
+    return updated_cache(reader).changes(reader);
+  }
+
+  /**
+   * Same as take, but returns a (count, records, objects) tuple that
+   * pyopendds.array turns into a NumPy structured array. records is a
+   * bytearray of count packed records of the numeric fields and objects is a
+   * tuple with a list for each of the rest of the fields.
+   */
+  PyObject* take_array(
+    EntityObject* reader, ::CORBA::Long max_samples, const DDS::Duration_t& max_wait, bool take)
+  {
+    Loan loan(reader_of(reader), reader->reader_stats);
+    const bool got_samples = get_samples(loan, max_samples, max_wait, take);
+    const ReaderStats::Clock::time_point start = ReaderStats::Clock::now();
+    const ::CORBA::ULong length = got_samples ? loan.length() : 0;
+
+    Py_ssize_t count = 0;
+    for (::CORBA::ULong i = 0; i < length; ++i) {
+      if (loan.infos[i].valid_data) {
+        ++count;
+      }
+    }
+
+    const size_t record_size = Type<IdlType>::record_size;
+    Ref records = PyByteArray_FromStringAndSize(nullptr, count * record_size);
+    if (!records) {
+      throw Exception();
+    }
+    const Py_ssize_t object_count = Type<IdlType>::object_count;
+    Ref objects = PyTuple_New(object_count);
+    if (!objects) {
+      throw Exception();
+    }
+    for (Py_ssize_t i = 0; i < object_count; ++i) {
+      PyObject* const list = PyList_New(count);
+      if (!list) {
+        throw Exception();
+      }
+      PyTuple_SET_ITEM(*objects, i, list);
+    }
+
+    char* const record_data = PyByteArray_AS_STRING(*records);
+    PyObject* const* const object_lists = object_count ? &PyTuple_GET_ITEM(*objects, 0) : nullptr;
+    Py_ssize_t index = 0;
+    for (::CORBA::ULong i = 0; i < length; ++i) {
+      if (loan.infos[i].valid_data) {
+        Type<IdlType>::to_record(
+          loan.samples[i], record_data + index * record_size, object_lists, index);
+        ++index;
+      }
+    }
+    reader->reader_stats->converted(count, start);
+
+    return Py_BuildValue("(nOO)", count, *records, *objects);
+  }
+
+  void write(EntityObject* writer, PyObject* pysample)
+  {
+    DataWriter* const writer_impl = writer_of(writer);
+
+    IdlType sample;
+    Type<IdlType>::python_to_cpp(pysample, sample);
+
+    DDS::ReturnCode_t rc;
+    {
+      GilRelease release;
+      rc = writer_impl->write(sample, DDS::HANDLE_NIL);
+    }
+    if (Errors::check_rc(rc)) {
+      throw Exception();
+    }
+  }
+
+  /**
+   * Convert all the samples in an iterable first, then write all of them
+   * without the GIL.
+   */
+  void write_many(EntityObject* writer, PyObject* pysamples)
+  {
+    DataWriter* const writer_impl = writer_of(writer);
+
+    Ref pysample_seq = PySequence_Fast(pysamples, "write_many requires an iterable of samples");
+    if (!pysample_seq) {
+      throw Exception();
+    }
+    const Py_ssize_t count = PySequence_Fast_GET_SIZE(*pysample_seq);
+    PyObject** pysample_items = PySequence_Fast_ITEMS(*pysample_seq);
+    std::vector<IdlType> samples(count);
+    for (Py_ssize_t i = 0; i < count; ++i) {
+      Type<IdlType>::python_to_cpp(pysample_items[i], samples[i]);
+    }
+
+    DDS::ReturnCode_t rc = DDS::RETCODE_OK;
+    {
+      GilRelease release;
+      for (Py_ssize_t i = 0; i < count && rc == DDS::RETCODE_OK; ++i) {
+        rc = writer_impl->write(samples[i], DDS::HANDLE_NIL);
+      }
+    }
+    if (Errors::check_rc(rc)) {
+      throw Exception();
+    }
+  }
+
+  void dispose(EntityObject* writer, PyObject* pysample)
+  {
+    DataWriter* const writer_impl = writer_of(writer);
+
+    IdlType sample;
+    Type<IdlType>::python_to_cpp(pysample, sample);
+
+    DDS::ReturnCode_t rc;
+    {
+      GilRelease release;
+      rc = writer_impl->dispose(sample, DDS::HANDLE_NIL);
+    }
+    if (Errors::check_rc(rc)) {
+      throw Exception();
+    }
+  }
+
+#ifdef PYOPENDDS_BENCHMARKS
+  /**
+   * Convert a sample to C++ and then back to Python iterations times. Returns
+   * a tuple of the total nanoseconds spent in each direction. Only in
+   * packages generated with itl2py --benchmarks.
+   */
+  PyObject* benchmark_conversion(PyObject* pysample, long iterations)
+  {
+    typedef std::chrono::steady_clock Clock;
+    IdlType sample;
+
+    const Clock::time_point to_cpp_start = Clock::now();
+    for (long i = 0; i < iterations; ++i) {
+      Type<IdlType>::python_to_cpp(pysample, sample);
+    }
+    const Clock::time_point to_python_start = Clock::now();
+    for (long i = 0; i < iterations; ++i) {
+      Ref result;
+      Type<IdlType>::cpp_to_python(sample, *result);
+    }
+    const Clock::time_point end = Clock::now();
+
+    typedef std::chrono::nanoseconds ns;
+    const ns to_cpp = std::chrono::duration_cast<ns>(to_python_start - to_cpp_start);
+    const ns to_python = std::chrono::duration_cast<ns>(end - to_python_start);
+    return Py_BuildValue("(LL)",
+      static_cast<long long>(to_cpp.count()),
+      static_cast<long long>(to_python.count()));
+  }
+#endif
 
   PyObject* get_python_class() { return Type<IdlType>::get_python_class(); }
 
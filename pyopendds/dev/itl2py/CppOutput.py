@@ -1,6 +1,13 @@
+import codecs
+import sys
+from functools import reduce
+from operator import mul
+
 from jinja2 import Environment
 
-from .ast import PrimitiveType, StructType, EnumType
+from .ast import (
+    PrimitiveType, StructType, EnumType, ArrayType, SequenceType, get_record_field,
+)
 from .Output import Output
 
 
@@ -17,8 +24,24 @@ def cpp_type_name(type_node):
         raise NotImplementedError
 
 
+def is_supported(type_node):
+    '''128-bit numbers have no conversion, fields of them are left out.'''
+    if isinstance(type_node, (ArrayType, SequenceType)):
+        type_node = type_node.base_type
+    return not (isinstance(type_node, PrimitiveType) and type_node.kind.value.element_size > 64)
+
+
 class CppOutput(Output):
 
+    # Encodings that have their own decoding function in the Python C API, so
+    # they can be decoded without looking up the codec by name. UTF-8 is the
+    # default of StringType.
+    string_decoders = {
+        'utf-8': None,
+        'ascii': 'PyUnicode_DecodeASCII',
+        'iso8859-1': 'PyUnicode_DecodeLatin1',
+    }
+
     def __init__(self, context: dict):
         new_context = context.copy()
         jinja_start = '/*{'
@@ -27,6 +50,8 @@ class CppOutput(Output):
             idl_names=[
                 itl_file.name[:-len('.itl')] for itl_file in context['itl_files']],
             types=[],
+            is_utf8=codecs.lookup(context['default_encoding']).name == 'utf-8',
+            intern_strings=set(context.get('intern_strings') or ()),
             jinja=Environment(
                 loader=context['jinja_loader'],
                 block_start_string=jinja_start + '%',
@@ -40,76 +65,238 @@ class CppOutput(Output):
         super().__init__(new_context, context['output'],
             {context['native_package_name'] + '.cpp': 'user.cpp'})
 
-    def visit_struct(self, struct_type):
-        struct_to_lines = [
-            'Ref field_value;',
+    def conversion_lines(self, type_node, to_python, value, indent='', string_cache=None):
+        '''Return the lines of a statement converting the field of cpp
+        described by type_node to or from the Python object value. The lines
+        are templates for line_process in visit_struct. If string_cache is
+        the name of a StringCache accessor, strings are converted to Python
+        through it.
+        '''
+        element_type = type_node
+        elements_open = ''
+        elements_close = ''
+        if isinstance(type_node, SequenceType):
+            element_type = type_node.base_type
+            elements_open = 'sequence_elements('
+            if type_node.max_count and not to_python:
+                elements_close = ', {})'.format(type_node.max_count)
+            else:
+                elements_close = ')'
+        elif isinstance(type_node, ArrayType):
+            # Multidimensional arrays are passed as one flat array
+            element_type = type_node.base_type
+            elements_open = 'array_elements(&'
+            elements_close = '{}, {})'.format(
+                '[0]' * len(type_node.dimensions), reduce(mul, type_node.dimensions, 1))
+        if elements_open:
+            converter = 'ElementsType<{}>::'.format(cpp_type_name(element_type))
+        elif string_cache and to_python:
+            converter = string_cache + '().'
+        else:
+            converter = 'Type<{}>::'.format(cpp_type_name(element_type))
+
+        encoding_arg = ''
+        if isinstance(element_type, PrimitiveType) and element_type.kind == PrimitiveType.Kind.s8:
+            # UTF-8 strings can be encoded without passing the codec name and
+            # some others can be decoded without it.
+            codec_name = codecs.lookup(self.context['default_encoding']).name
+            if to_python and codec_name in self.string_decoders:
+                if self.string_decoders[codec_name]:
+                    encoding_arg = ', ' + self.string_decoders[codec_name]
+            elif to_python or not self.context['is_utf8']:
+                encoding_arg = ', "{default_encoding}"'
+
+        if to_python:
+            first = '{}cpp_to_python({}cpp.{{field_name}}'.format(converter, elements_open)
+            last = '{}, {}{});'.format(elements_close, value, encoding_arg)
+        else:
+            first = '{}python_to_cpp({}, {}cpp.{{field_name}}'.format(
+                converter, value, elements_open)
+            last = '{}{});'.format(elements_close, encoding_arg)
+        return [
+            indent + first,
+            '#ifdef CPP11_IDL',
+            indent + '    ()',
+            '#endif',
+            indent + '    ' + last,
         ]
+
+    def get_string_cache(self, struct_type, field_name, type_node):
+        '''Return the StringCache for the field if it was passed to
+        --intern-strings, otherwise None.
+        '''
+        scoped_name = struct_type.name.join() + '.' + field_name
+        if scoped_name not in self.context['intern_strings']:
+            return None
+        self.context['intern_strings'].remove(scoped_name)
+        if not (isinstance(type_node, PrimitiveType) and type_node.kind == PrimitiveType.Kind.s8):
+            sys.exit('--intern-strings: {} is not a string field'.format(scoped_name))
+        return {
+            'accessor': field_name + '_string_cache',
+            'scoped_name': scoped_name,
+        }
+
+    def write(self):
+        if self.context['intern_strings']:
+            sys.exit('--intern-strings: there are no fields named {}'.format(
+                ', '.join(sorted(self.context['intern_strings']))))
+        return super().write()
+
+    def visit_struct(self, struct_type):
+        struct_to_lines = []
         struct_from_lines = []
-        for field_name, field_node in struct_type.fields.items():
+        record_lines = []
+        lazy_lines = []
+        record_size = 0
+        object_count = 0
+        # With skip_init, fields are set directly in the __dict__ of the
+        # instance, which is faster than going through setattr.
+        skip_init = self.context.get('skip_init', False)
+        set_field = 'PyDict_SetItem' if skip_init else 'PyObject_SetAttr'
+        set_target = '*dict' if skip_init else 'py'
+        if struct_type.fields:
+            struct_to_lines.append('PyObject* const* const field_names = get_field_names();')
+            if skip_init:
+                struct_to_lines.extend([
+                    'Ref dict = PyObject_GenericGetDict(py, nullptr);',
+                    'if (!dict) {',
+                    '  throw Exception();',
+                    '}',
+                ])
+            struct_from_lines.extend([
+                'PyObject* const* const field_names = get_field_names();',
+                'Ref field_value;',
+            ])
+        string_caches = []
+        for field_index, (field_name, field_node) in enumerate(struct_type.fields.items()):
+            type_node = field_node.type_node
+            supported = is_supported(type_node)
+            string_cache = self.get_string_cache(struct_type, field_name, type_node)
+            if string_cache:
+                string_caches.append(string_cache)
+                string_cache = string_cache['accessor']
             to_lines = []
             from_lines = []
-            pyopendds_type = ''
-            is_string = isinstance(field_node.type_node, PrimitiveType) and \
-                field_node.type_node.is_string()
-
-            to_lines = [
-                'Type<{pyopendds_type}>::cpp_to_python(cpp.{field_name}',
-                '#ifdef CPP11_IDL',
-                '    ()',
-                '#endif',
-                '    , *field_value'
-                    + (', "{default_encoding}"' if is_string else '') + ');',
-            ]
-
-            pyopendds_type = cpp_type_name(field_node.type_node)
-
-            if to_lines:
-                to_lines.extend([
-                    'if (!field_value || PyObject_SetAttrString('
-                    'py, "{field_name}", *field_value)) {{',
+            if supported:
+                to_lines = [
+                    '{{',
+                    '  Ref field_value;',
+                ] + self.conversion_lines(
+                    type_node, True, '*field_value', '  ', string_cache) + [
+                    '  if (!field_value ||',
+                    '      {}({}, field_names[{{field_index}}], *field_value)) {{{{'.format(
+                        set_field, set_target),
+                    '    throw Exception();',
+                    '  }}',
+                    '}}',
+                ]
+
+                from_lines = [
+                    'field_value = PyObject_GetAttr(py, field_names[{field_index}]);',
+                    'if (!field_value) {{',
                     '  throw Exception();',
-                    '}}'
-                ])
+                    '}}',
+                ] + self.conversion_lines(type_node, False, '*field_value')
 
-            def line_process(lines):
+            def line_process(lines, **extra):
                 return [''] + [
                     s.format(
                         field_name=field_name,
+                        field_index=field_index,
                         default_encoding=self.context['default_encoding'],
-                        pyopendds_type=pyopendds_type,
+                        **extra,
                     ) for s in (lines if lines else [
                         '// {field_name} was left unimplemented',
                     ])
                 ]
             struct_to_lines.extend(line_process(to_lines))
             struct_from_lines.extend(line_process(from_lines))
+            if supported:
+                # Cases of the switch in field_to_python for --lazy-samples
+                lazy_lines.extend(line_process(['case {field_index}:'] + self.conversion_lines(
+                    type_node, True, 'field_value', '  ', string_cache) + ['  break;']))
+
+            # Numbers are copied into the record for take_array, everything
+            # else is converted to Python objects.
+            record_field = get_record_field(type_node)
+            if record_field:
+                record_lines.extend(line_process([
+                    '{{',
+                    '  const {cpp_type} value = static_cast<{cpp_type}>(cpp.{field_name}',
+                    '#ifdef CPP11_IDL',
+                    '    ()',
+                    '#endif',
+                    '  );',
+                    '  std::memcpy(record + {offset}, &value, sizeof value);',
+                    '}}',
+                ], cpp_type=record_field.cpp_type, offset=record_size))
+                record_size += record_field.size
+            elif not supported:
+                record_lines.extend(line_process([
+                    'Py_INCREF(Py_None);',
+                    'PyList_SET_ITEM(objects[{object_index}], index, Py_None);',
+                ], object_index=object_count))
+                object_count += 1
+            else:
+                record_lines.extend(line_process([
+                    '{{',
+                    '  PyObject* field_value = nullptr;',
+                ] + self.conversion_lines(
+                    type_node, True, 'field_value', '  ', string_cache) + [
+                    '  if (!field_value) {{',
+                    '    throw Exception();',
+                    '  }}',
+                    '  PyList_SET_ITEM(objects[{object_index}], index, field_value);',
+                    '}}',
+                ], object_index=object_count))
+                object_count += 1
 
         self.context['types'].append({
             'cpp_name': cpp_name(struct_type.name.parts),
             'name_parts': struct_type.parent_name().parts,
             'local_name': struct_type.local_name(),
+            'py_name': struct_type.name.join(),
+            'field_names': list(struct_type.fields.keys()),
             'to_lines': '\n'.join(struct_to_lines),
             'from_lines': '\n'.join(struct_from_lines),
-            'new_lines': '\n'.join([
-                'args = nullptr;'
-            ]),
+            'record_lines': '\n'.join(record_lines),
+            'lazy_lines': '\n'.join(lazy_lines),
+            'record_size': record_size,
+            'object_count': object_count,
+            'string_caches': string_caches,
             'is_topic_type': struct_type.is_topic_type,
             'to_replace': False,
         })
 
     def visit_enum(self, enum_type):
+        # Only the values of members can be written, not any integer or
+        # combination of IntFlag members
+        member_cases = [
+            'case {}:'.format(value)
+            for value in sorted({int(value) for value in enum_type.members.values()})]
         self.context['types'].append({
             'cpp_name': cpp_name(enum_type.name.parts),
             'name_parts': enum_type.parent_name().parts,
             'local_name': enum_type.local_name(),
+            'py_name': enum_type.name.join(),
+            'field_names': [],
+            'string_caches': [],
             'to_replace': True,
-            'new_lines': '\n'.join([
-                'args = PyTuple_Pack(1, PyLong_FromLong(static_cast<long>(cpp)));',
-            ]),
             'to_lines': '',
             'from_lines': '\n'.join([
-                '',
-                '// left unimplemented'
+                'const long value = PyLong_AsLong(py);',
+                'if (value == -1 && PyErr_Occurred()) {',
+                '  throw Exception();',
+                '}',
+                'switch (value) {',
+            ] + member_cases + [
+                '  break;',
+                'default:',
+                '  PyErr_Format(PyExc_ValueError, "%ld is not a valid {}", value);'.format(
+                    enum_type.name.join()),
+                '  throw Exception();',
+                '}',
+                'cpp = static_cast<{}>(value);'.format(cpp_name(enum_type.name.parts)),
             ]),
             'is_topic_type': False,
         })
@@ -1,8 +1,22 @@
 from pathlib import Path
+from typing import List
 
 from .ast import NodeVisitor
 
 
+def write_if_changed(path: Path, content: str) -> bool:
+    '''Write the file unless it already has the content. Returns True if it
+    was written.
+    '''
+    try:
+        if path.read_text() == content:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    path.write_text(content)
+    return True
+
+
 class Output(NodeVisitor):
 
     def __init__(self, context: dict, path: Path, templates: dict):
@@ -12,7 +26,11 @@ class Output(NodeVisitor):
         for filename, template in templates.items():
             self.templates[path / filename] = context['jinja'].get_template(template)
 
-    def write(self):
+    def write(self) -> List[Path]:
+        '''Render the templates and write the files that don't already have
+        the same contents, so the rest keep their modification times and don't
+        cause rebuilds. Returns the paths of all the files.
+        '''
         if self.context['dry_run']:
             print('######################################## Create Dir', self.path)
         else:
@@ -23,4 +41,13 @@ class Output(NodeVisitor):
                 print('======================================== Write file', path)
                 print(content)
             else:
-                path.write_text(content)
+                write_if_changed(path, content)
+        return list(self.templates)
+
+    def visit_array(self, array_type):
+        # Named arrays and sequences are just aliases, they are converted where
+        # they are used as fields.
+        pass
+
+    def visit_sequence(self, sequence_type):
+        pass
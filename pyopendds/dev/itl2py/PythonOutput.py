@@ -1,6 +1,11 @@
-from typing import List
+import codecs
+from functools import reduce
+from operator import mul
+from typing import List, Set
 
-from .ast import PrimitiveType, StructType, EnumType
+from .ast import (
+    PrimitiveType, StructType, EnumType, ArrayType, SequenceType, get_record_field,
+)
 from .Output import Output
 
 
@@ -13,6 +18,7 @@ class PythonOutput(Output):
 
     primitive_types = {  # (Python Type, Default Default Value)
         PrimitiveType.Kind.bool: ('bool', 'False'),
+        PrimitiveType.Kind.byte: ('int', '0'),
         PrimitiveType.Kind.u8: ('int', '0'),
         PrimitiveType.Kind.i8: ('int', '0'),
         PrimitiveType.Kind.u16: ('int', '0'),
@@ -21,54 +27,154 @@ class PythonOutput(Output):
         PrimitiveType.Kind.i32: ('int', '0'),
         PrimitiveType.Kind.u64: ('int', '0'),
         PrimitiveType.Kind.i64: ('int', '0'),
+        PrimitiveType.Kind.u128: ('int', '0'),
+        PrimitiveType.Kind.i128: ('int', '0'),
         PrimitiveType.Kind.f32: ('float', '0.0'),
         PrimitiveType.Kind.f64: ('float', '0.0'),
+        PrimitiveType.Kind.f128: ('float', '0.0'),
         PrimitiveType.Kind.c8: ('str', "'\\x00'"),
         PrimitiveType.Kind.c16: ('str', "'\\x00'"),
         PrimitiveType.Kind.s8: ('str', "''"),
         PrimitiveType.Kind.s16: ('str', "''"),
     }
 
+    # array.array typecodes for sequences and arrays of numbers, which are
+    # converted as a block. Octets use bytes and everything else uses lists.
+    array_typecodes = {
+        PrimitiveType.Kind.i8: 'b',
+        PrimitiveType.Kind.u16: 'H',
+        PrimitiveType.Kind.i16: 'h',
+        PrimitiveType.Kind.u32: 'I',
+        PrimitiveType.Kind.i32: 'i',
+        PrimitiveType.Kind.u64: 'Q',
+        PrimitiveType.Kind.i64: 'q',
+        PrimitiveType.Kind.f32: 'f',
+        PrimitiveType.Kind.f64: 'd',
+    }
+
+    # pyopendds.cdr decoders of the primitive types, as generated code
+    cdr_decoders = {
+        PrimitiveType.Kind.bool: 'Bool()',
+        PrimitiveType.Kind.byte: "Primitive('B', 1)",
+        PrimitiveType.Kind.u8: "Primitive('B', 1)",
+        PrimitiveType.Kind.i8: "Primitive('b', 1)",
+        PrimitiveType.Kind.u16: "Primitive('H', 2)",
+        PrimitiveType.Kind.i16: "Primitive('h', 2)",
+        PrimitiveType.Kind.u32: "Primitive('I', 4)",
+        PrimitiveType.Kind.i32: "Primitive('i', 4)",
+        PrimitiveType.Kind.u64: "Primitive('Q', 8)",
+        PrimitiveType.Kind.i64: "Primitive('q', 8)",
+        PrimitiveType.Kind.f32: "Primitive('f', 4)",
+        PrimitiveType.Kind.f64: "Primitive('d', 8)",
+        PrimitiveType.Kind.c8: 'Char()',
+        PrimitiveType.Kind.c16: 'WChar()',
+        PrimitiveType.Kind.s16: 'WString()',
+    }
+
     def __init__(self, context: dict, name: str):
         self.submodules: List[PythonOutput] = []
         self.module = None
+        self.local_names: Set[str] = set()
         new_context = context.copy()
         new_context.update(dict(
             output=context['output'] / name,
             types=[],
+            submodules=[],
             has_struct=False,
             has_enum=False,
+            has_number_array=False,
+            has_package_reference=False,
+            has_cdr_fields=False,
         ))
+        # If each struct can be decoded from CDR, shared by all the modules
+        new_context.setdefault('cdr_decodable', {})
         super().__init__(new_context, new_context['output'],
             {'__init__.py': 'user.py'})
 
     def write(self):
-        super().write()
+        paths = super().write()
         for submodule in self.submodules:
-            submodule.write()
+            paths += submodule.write()
+        return paths
 
     def visit_root_module(self, root_module):
         self.module = root_module
+        self.local_names = {node.local_name() for node in root_module.types.values()}
         super().visit_module(root_module)
 
     def visit_module(self, module):
         submodule = PythonOutput(self.context, module.local_name())
         self.submodules.append(submodule)
+        self.context['submodules'].append(module.local_name())
         submodule.visit_root_module(module)
 
     def is_local_type(self, type_node):
-        return type_node in self.module.types.values()
+        name = type_node.name
+        return name is not None and self.module.types.get(name.itl_name) is type_node
+
+    def get_elements_kind(self, field_type):
+        '''Return if the elements of a sequence or array are in Python bytes,
+        an array.array, or a list.
+        '''
+        element_type = field_type.base_type
+        if isinstance(element_type, PrimitiveType):
+            if element_type.kind in (PrimitiveType.Kind.u8, PrimitiveType.Kind.byte):
+                return 'bytes'
+            elif element_type.kind in self.array_typecodes:
+                return 'array'
+        elif isinstance(element_type, (ArrayType, SequenceType)):
+            raise NotImplementedError(repr(field_type) + " is not supported")
+        return 'list'
 
     def get_python_type_string(self, field_type):
-        if isinstance(field_type, PrimitiveType):
+        if isinstance(field_type, (SequenceType, ArrayType)):
+            kind = self.get_elements_kind(field_type)
+            return '_pyopendds_array' if kind == 'array' else kind
+        elif isinstance(field_type, PrimitiveType):
             return self.primitive_types[field_type.kind][0]
         elif self.is_local_type(field_type):
             return field_type.local_name()
         else:
-            return field_type.name.join()
+            # Types in other modules are reached through the package, which
+            # imports the module the first time it's used.
+            self.context['has_package_reference'] = True
+            return '_pyopendds_package.' + field_type.name.join()
+
+    def get_elements_default_value_string(self, field_type):
+        count = None
+        if isinstance(field_type, ArrayType):
+            # Multidimensional arrays are flattened
+            count = reduce(mul, field_type.dimensions, 1)
+        kind = self.get_elements_kind(field_type)
+        if kind == 'bytes':
+            return "b'\\x00' * {}".format(count) if count else "b''"
+        elif kind == 'array':
+            self.context['has_number_array'] = True
+            typecode = self.array_typecodes[field_type.base_type.kind]
+            if count:
+                default = "_pyopendds_array('{}', [{}] * {})".format(
+                    typecode, self.get_python_default_value_string(field_type.base_type), count)
+            else:
+                default = "_pyopendds_array('{}')".format(typecode)
+            return default
+        elif not count:
+            return '[]'
+        elif isinstance(field_type.base_type, StructType):
+            return '[{}() for i in [None] * {}]'.format(
+                self.get_python_type_string(field_type.base_type), count)
+        else:
+            return '[{}] * {}'.format(
+                self.get_python_default_value_string(field_type.base_type), count)
 
     def get_python_default_value_string(self, field_type):
-        if isinstance(field_type, PrimitiveType):
+        '''Return the code that creates the default value of a field. It's
+        evaluated each time __init__ needs it, so mutable values aren't shared.
+        It doesn't use builtins, because the arguments of __init__ are named
+        after the fields and could hide them.
+        '''
+        if isinstance(field_type, (SequenceType, ArrayType)):
+            return self.get_elements_default_value_string(field_type)
+        elif isinstance(field_type, PrimitiveType):
             return self.primitive_types[field_type.kind][1]
         else:
             type_name = self.get_python_type_string(field_type)
@@ -79,18 +185,96 @@ class PythonOutput(Output):
             else:
                 raise NotImplementedError(repr(field_type) + " is not supported")
 
+    def get_cdr_decoder_string(self, field_type):
+        '''Return the code that creates the pyopendds.cdr decoder of a field,
+        or None if it can't be decoded, like 128-bit numbers and anything with
+        them.
+        '''
+        if isinstance(field_type, PrimitiveType):
+            if field_type.kind == PrimitiveType.Kind.s8:
+                codec_name = codecs.lookup(self.context['default_encoding']).name
+                if codec_name == 'utf-8':
+                    return '_pyopendds_cdr.String()'
+                return "_pyopendds_cdr.String('{}')".format(codec_name)
+            decoder = self.cdr_decoders.get(field_type.kind)
+            return None if decoder is None else '_pyopendds_cdr.' + decoder
+        elif isinstance(field_type, (SequenceType, ArrayType)):
+            element = self.get_cdr_decoder_string(field_type.base_type)
+            if element is None:
+                return None
+            kind = self.get_elements_kind(field_type)
+            if isinstance(field_type, SequenceType):
+                return "_pyopendds_cdr.Sequence({}, '{}')".format(element, kind)
+            return "_pyopendds_cdr.Array({}, {}, '{}')".format(
+                element, reduce(mul, field_type.dimensions, 1), kind)
+        elif isinstance(field_type, EnumType):
+            return '_pyopendds_cdr.Enum({})'.format(self.get_python_type_string(field_type))
+        elif isinstance(field_type, StructType):
+            if not self.is_cdr_decodable(field_type):
+                return None
+            return '_pyopendds_cdr.Struct({})'.format(self.get_python_type_string(field_type))
+        raise NotImplementedError(repr(field_type) + " is not supported")
+
+    def is_cdr_decodable(self, struct_type):
+        '''Return True if all the fields of the struct can be decoded from
+        CDR. Fields after one that can't be couldn't be either, because where
+        they start isn't known.
+        '''
+        cache = self.context['cdr_decodable']
+        decodable = cache.get(id(struct_type))
+        if decodable is None:
+            decodable = all(
+                self.get_cdr_decoder_string(node.type_node) is not None
+                for node in struct_type.fields.values())
+            cache[id(struct_type)] = decodable
+        return decodable
+
+    def get_view_name(self, struct_type):
+        '''Return the name of the pyopendds.cdr.SampleView generated for a
+        topic type.
+        '''
+        name = struct_type.local_name() + 'View'
+        if name in self.local_names:
+            raise NotImplementedError(
+                'Can not generate {} for {}, there is already a type with that name'.format(
+                    name, struct_type.repr_name()))
+        return name
+
+    def get_array_field_type(self, field_type):
+        record_field = get_record_field(field_type)
+        return record_field.numpy_type if record_field else 'O'
+
     def visit_struct(self, struct_type):
         self.context['has_struct'] = True
+        cdr_decodable = self.is_cdr_decodable(struct_type)
+        if cdr_decodable:
+            self.context['has_cdr_fields'] = True
         self.context['types'].append(dict(
             local_name=struct_type.local_name(),
+            # Like dataclasses, don't let a field named self clash with self
+            self_name='_pyopendds_self' if 'self' in struct_type.fields else 'self',
+            repr_format='{{}}({})'.format(
+                ', '.join(name + '={!r}' for name in struct_type.fields)),
             type_support=self.context['native_package_name'] if struct_type.is_topic_type else None,
+            # NumPy types of the fields for DataReader.take_array
+            array_fields=[
+                (name, self.get_array_field_type(node.type_node))
+                for name, node in struct_type.fields.items()
+            ],
             struct=dict(
                 fields=[dict(
                     name=name,
                     type=self.get_python_type_string(node.type_node),
                     default_value=self.get_python_default_value_string(node.type_node),
+                    # Only primitives are immutable and cheap enough to be the
+                    # default argument itself, the rest are created for None.
+                    default_argument=isinstance(node.type_node, PrimitiveType),
+                    cdr_decoder=self.get_cdr_decoder_string(node.type_node),
                 ) for name, node in struct_type.fields.items()],
+                cdr_decodable=cdr_decodable,
             ),
+            view_name=self.get_view_name(struct_type)
+            if struct_type.is_topic_type and cdr_decodable else None,
         ))
 
     def visit_enum(self, enum_type):
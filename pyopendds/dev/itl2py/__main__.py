@@ -38,6 +38,38 @@ the exepcted config file is not there, then this option becomes required.'''),
     argparser.add_argument('--default-encoding',
         type=str, default='utf_8',
         help='Default encoding of strings. By default this is UTF-8.')
+    argparser.add_argument('--skip-init', action='store_true',
+        help='''\
+Create received samples without calling __init__ of the Python classes, setting
+the fields directly in the instance __dict__. This makes taking samples faster,
+but means any custom __init__ or __post_init__ is not run on them.''')
+    argparser.add_argument('--lazy-samples', action='store_true',
+        help='''\
+Generate a native proxy class for each topic type for DataReader.take_lazy.
+The proxies keep the C++ sample and only convert the fields that are accessed,
+which is faster for wide types when only a few fields are used.''')
+    argparser.add_argument('--intern-strings',
+        metavar='FIELD', action='append',
+        help='''\
+Scoped name of a string field, like my_module.MyStruct.my_field, to cache the
+decoded str values of. Received samples with the same value will then share
+the same str object instead of decoding and allocating a new one each time.
+This is for fields that repeat a small number of values. Can be passed
+multiple times.''')
+    argparser.add_argument('--intern-cache-size',
+        type=int, default=256,
+        help='''\
+Maximum number of values each --intern-strings cache holds before the least
+recently used are dropped. By default this is 256.''')
+    argparser.add_argument('--benchmarks', action='store_true',
+        help='''\
+Add the functions the benchmarks in the PyOpenDDS tests use to the native
+package. These are not needed otherwise.''')
+    argparser.add_argument('-j', '--jobs',
+        type=int, default=0,
+        help='''\
+Number of processes to parse multiple ITL files with. By default this is the
+number of CPUs.''')
     argparser.add_argument('--dry-run', action='store_true',
         help='Don\'t create any files or directories, print out what would be done.')
     argparser.add_argument('--dump-ast', action='store_true',
@@ -51,6 +83,10 @@ the exepcted config file is not there, then this option becomes required.'''),
         if len(args.itl_files) > 1:
             sys.exit('--package-name is required when using multiple ITL files')
         args.package_name = 'py' + args.itl_files[0].stem
+    if args.intern_cache_size < 1:
+        sys.exit('--intern-cache-size must be at least 1')
+    if args.jobs < 0:
+        sys.exit('--jobs can not be negative')
     if args.native_package_name is None:
         args.native_package_name = '_' + args.package_name
     if args.idl_library_build_dir is None:
@@ -1,6 +1,6 @@
 from enum import Enum, unique
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, NamedTuple
 
 
 class Name:
@@ -135,6 +135,11 @@ class PrimitiveType(Node):
     def is_string(self):
         return self.kind.value.is_text and not self.kind.value.is_scalar
 
+    def is_number(self):
+        traits = self.kind.value
+        return (traits.is_unsigned_int or traits.is_signed_int or traits.is_float
+            or traits.is_bool or traits.is_raw) and traits.element_size <= 64
+
     def __repr__(self):
         contents = self.kind.name
         if self.element_count_limit:
@@ -238,6 +243,35 @@ class NodeVisitor:
         raise NotImplementedError
 
 
+class RecordField(NamedTuple):
+    numpy_type: str
+    cpp_type: str
+    size: int
+
+
+def get_record_field(type_node: Node) -> Optional[RecordField]:
+    '''Return how a field of this type is copied into the packed records used
+    by DataReader.take_array, or None if it's converted to a Python object
+    instead.
+    '''
+    if isinstance(type_node, PrimitiveType) and type_node.is_number():
+        traits = type_node.kind.value
+        size = traits.element_size // 8
+        if traits.is_bool:
+            numpy_type = '?'
+        elif traits.is_float:
+            numpy_type = 'f{}'.format(size)
+        elif traits.is_signed_int:
+            numpy_type = 'i{}'.format(size)
+        else:
+            numpy_type = 'u{}'.format(size)
+        return RecordField(numpy_type, type_node.kind.name, size)
+    elif isinstance(type_node, EnumType):
+        size = type_node.size // 8
+        return RecordField('u{}'.format(size), 'u{}'.format(type_node.size), size)
+    return None
+
+
 def get_ast(types: dict) -> Module:
     root_module = Module(None, '')
     for type_node in types.values():
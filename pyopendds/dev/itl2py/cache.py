@@ -0,0 +1,120 @@
+'''Lets itl2py skip the work it did last time when nothing changed.
+
+The cache is a file in the output directory with a hash of the ITL files and
+the generator, the AST parsed from them, and a hash of those with the options
+the package was generated with, along with the hashes of the files that were
+written. If all of that still matches, there's nothing to do. If only the
+options changed, the AST is reused instead of parsing the ITL files again.
+'''
+
+import hashlib
+import json
+import pickle
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .ast import Module
+
+CACHE_FILENAME = '.itl2py_cache'
+
+# Changed when what's in the cache changes
+_cache_format = 2
+
+# Options that don't change what's generated
+_ignored_options = {'itl_files', 'jobs', 'dry_run', 'dump_ast', 'just_dump_ast'}
+
+_generator_hash: Optional[str] = None
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def generator_hash() -> str:
+    '''Return a hash of the source and templates of itl2py, which stands in
+    for its version, because the output changes with them whether or not the
+    version of pyopendds changed.
+    '''
+    global _generator_hash
+    if _generator_hash is None:
+        this_dir = Path(__file__).resolve().parent
+        h = hashlib.sha256()
+        templates = [path for path in (this_dir / 'templates').iterdir() if path.is_file()]
+        for path in sorted(this_dir.glob('*.py')) + sorted(templates):
+            h.update(path.name.encode())
+            h.update(path.read_bytes())
+        _generator_hash = h.hexdigest()
+    return _generator_hash
+
+
+def inputs_hash(itl_files: Iterable[Path]) -> str:
+    '''Return a hash of the names and contents of the ITL files and the
+    generator, which is what the AST depends on.
+    '''
+    h = hashlib.sha256(generator_hash().encode())
+    for itl_file in itl_files:
+        h.update(itl_file.name.encode())
+        h.update(itl_file.read_bytes())
+    return h.hexdigest()
+
+
+def outputs_hash(inputs: str, context: dict) -> str:
+    '''Return a hash of what the generated files depend on, the inputs hash
+    and the options in the context.
+    '''
+    options = {k: v for k, v in context.items() if k not in _ignored_options}
+    return hashlib.sha256(
+        (inputs + json.dumps(options, sort_keys=True, default=str)).encode()).hexdigest()
+
+
+class Cache:
+    '''Cache file at path. A file that can't be read is treated as empty, so a
+    damaged or old cache just means everything is generated again.
+    '''
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.data: dict = {}
+        try:
+            with path.open('rb') as f:
+                data = pickle.load(f)
+            if data.get('format') == _cache_format:
+                self.data = data
+        except Exception:
+            pass
+
+    def ast(self, inputs: str) -> Optional[Module]:
+        '''Return the AST if it was parsed from the same inputs.
+        '''
+        if self.data.get('inputs') != inputs:
+            return None
+        return pickle.loads(self.data['ast'])
+
+    def is_current(self, outputs: str) -> bool:
+        '''Return True if the files were generated with the same inputs and
+        options and haven't been changed since.
+        '''
+        if self.data.get('outputs') != outputs:
+            return False
+        files: Dict[str, str] = self.data.get('files', {})
+        for path, expected in files.items():
+            try:
+                if file_hash(Path(path)) != expected:
+                    return False
+            except OSError:
+                return False
+        return bool(files)
+
+    def save(self, inputs: str, ast: Module, outputs: str, files: List[Path]) -> None:
+        self.data = dict(
+            format=_cache_format,
+            inputs=inputs,
+            # Pickled on its own so it's only loaded when it's needed
+            ast=pickle.dumps(ast),
+            outputs=outputs,
+            files={str(path): file_hash(path) for path in files},
+        )
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with temp_path.open('wb') as f:
+            pickle.dump(self.data, f)
+        temp_path.replace(self.path)
@@ -1,28 +1,77 @@
+import gc
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 import codecs
 import json
 
 from jinja2 import Environment, PackageLoader, StrictUndefined
 
-from .itl import parse_itl
+from .itl import parse_itl, link_types
 from .ast import get_ast, Module, Node
 from .Output import Output
+from .cache import CACHE_FILENAME, Cache, inputs_hash, outputs_hash
 from .PythonOutput import PythonOutput
 from .CppOutput import CppOutput
 
 
-def parse_itl_files(itl_files: List[Path]) -> Module:
+@contextmanager
+def gc_disabled():
+    '''Turn off the cycle collector, which would otherwise go through the
+    whole AST and everything made from it over and over as they grow, making
+    big packages take more than linear time.
+    '''
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def parse_itl_file(itl_file: Path) -> Optional[Dict[str, Node]]:
+    '''Parse one ITL file on its own in a worker process. Returns None if it
+    uses types it doesn't define, so it has to be parsed with the others.
+    '''
+    types: Dict[str, Node] = {}
+    with itl_file.open() as f, gc_disabled():
+        try:
+            parse_itl(types, json.load(f))
+        except ValueError:
+            return None
+    return types
+
+
+def parse_itl_files(itl_files: List[Path], jobs: Optional[int] = 1) -> Module:
     '''Read and parse a list of ITL file paths, collecting the results and
     return an assembled AST.
+
+    With more than one job, the files are parsed in that many processes, or
+    one per CPU if jobs is 0 or None. Each file has the types of the IDL files
+    it includes, so they can be parsed on their own. The duplicates are
+    dropped when the results are put together in order.
     '''
 
     types: Dict[str, Node] = {}
-    for itl_file in itl_files:
-        with itl_file.open() as f:
-            parse_itl(types, json.load(f))
-    return get_ast(types)
+    if not jobs:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(itl_files))
+    results: List[Optional[Dict[str, Node]]] = [None] * len(itl_files)
+    if jobs > 1:
+        with ProcessPoolExecutor(jobs) as executor:
+            results = list(executor.map(parse_itl_file, itl_files))
+    with gc_disabled():
+        for itl_file, file_types in zip(itl_files, results):
+            if file_types is None:
+                with itl_file.open() as f:
+                    parse_itl(types, json.load(f))
+            else:
+                link_types(types, file_types)
+        return get_ast(types)
 
 
 class PackageOutput(Output):
@@ -46,9 +95,7 @@ class PackageOutput(Output):
             self.cppout.visit_root_module(root_module)
 
     def write(self):
-        super().write()
-        self.pyout.write()
-        self.cppout.write()
+        return super().write() + self.pyout.write() + self.cppout.write()
 
     def visit_struct(self, struct_type):
         print(repr(struct_type))
@@ -77,13 +124,33 @@ def generate(context: dict) -> None:
         - package_name
         - native_package_name
         - default_encoding
+        - skip_init
+        - lazy_samples
+        - intern_strings
+        - intern_cache_size
+        - benchmarks
+        - jobs
         - dry_run
         - dump_ast
         - just_dump_ast
+
+    The ITL files and the options are hashed with the generator and compared
+    to the cache from the last run in the output directory. Nothing is done if
+    they and the generated files didn't change, and the ITL files aren't
+    parsed again if only the options changed. Files are only written if their
+    contents changed.
     '''
 
     if context['just_dump_ast']:
         context['dump_ast'] = True
+    use_cache = not (context['dry_run'] or context['dump_ast'])
+    if use_cache:
+        cache = Cache(context['output'] / CACHE_FILENAME)
+        inputs = inputs_hash(context['itl_files'])
+        outputs = outputs_hash(inputs, context)
+        if cache.is_current(outputs):
+            print('{} is up to date'.format(context['output']))
+            return
 
     try:
         codecs.lookup(context['default_encoding'])
@@ -96,7 +163,13 @@ def generate(context: dict) -> None:
         undefined=StrictUndefined,
     )
 
-    out = PackageOutput(context)
-    out.visit_root_module(parse_itl_files(context['itl_files']))
-    if not context['just_dump_ast']:
-        out.write()
+    with gc_disabled():
+        root_module = cache.ast(inputs) if use_cache else None
+        if root_module is None:
+            root_module = parse_itl_files(context['itl_files'], context.get('jobs', 1))
+        out = PackageOutput(context)
+        out.visit_root_module(root_module)
+        if not context['just_dump_ast']:
+            files = out.write()
+            if use_cache:
+                cache.save(inputs, root_module, outputs, files)
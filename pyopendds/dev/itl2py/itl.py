@@ -143,8 +143,36 @@ def parse_type(types, details):
 
 def parse_itl(types, itl):
     for itl_type in itl['types']:
-        parsed_type = parse_type(types, itl_type)
         # opendds_idl produces ITL that includes types from included IDL files, so
-        # just use the first definition we found.
+        # just use the first definition we found and don't parse the others.
+        if type(itl_type) is dict and itl_type.get('name') in types:
+            continue
+        parsed_type = parse_type(types, itl_type)
         if parsed_type.name.itl_name not in types:
             types[parsed_type.name.itl_name] = parsed_type
+
+
+def link_types(types, file_types):
+    '''Add the types parsed from another ITL file on their own to types,
+    skipping the ones already there. The added types are changed to refer to
+    the types already there instead of their own copies of them.
+    '''
+    def resolve(node):
+        name = node.name
+        if name is not None:
+            return types.get(name.itl_name, node)
+        if isinstance(node, (ArrayType, SequenceType)):
+            node.base_type = resolve(node.base_type)
+        return node
+
+    added = []
+    for name, node in file_types.items():
+        if name not in types:
+            types[name] = node
+            added.append(node)
+    for node in added:
+        if isinstance(node, StructType):
+            for field in node.fields.values():
+                field.type_node = resolve(field.type_node)
+        elif isinstance(node, (ArrayType, SequenceType)):
+            node.base_type = resolve(node.base_type)
@@ -1,3 +1,6 @@
+/*{% if benchmarks -%}*/
+#define PYOPENDDS_BENCHMARKS
+/*{% endif -%}*/
 #include <pyopendds/user.hpp> // Must always be first include
 /*{% for name in idl_names %}*/
 #include </*{{ name }}*/TypeSupportImpl.h>
@@ -8,6 +11,8 @@ namespace pyopendds {
 PyObject* Errors::pyopendds_ = nullptr;
 PyObject* Errors::PyOpenDDS_Error_ = nullptr;
 PyObject* Errors::ReturnCodeError_ = nullptr;
+PyTypeObject* EntityObject::type = nullptr;
+PyTypeObject* SampleInfoType::type = nullptr;
 
 TopicTypeBase::TopicTypes TopicTypeBase::topic_types_;
 
@@ -40,33 +45,159 @@ public:
     return python_class;
   }
 
+  /*{% if type.field_names %}*/
+  /**
+   * Interned Python strings of the field names, so attribute access doesn't
+   * have to create and hash new strings for every field of every sample.
+   */
+  static PyObject* const* get_field_names()
+  {
+    static PyObject* field_names[/*{{ type.field_names | length }}*/] = {};
+    if (!field_names[0]) {
+      const char* const names[] = {
+        /*{%- for name in type.field_names %}*/
+        "/*{{ name }}*/",
+        /*{%- endfor %}*/
+      };
+      // Fill in backwards so the check above only passes once all are set
+      for (size_t i = /*{{ type.field_names | length }}*/; i-- > 0;) {
+        field_names[i] = PyUnicode_InternFromString(names[i]);
+        if (!field_names[i]) {
+          throw Exception();
+        }
+      }
+    }
+    return field_names;
+  }
+  /*{% endif %}*/
+
+  /*{% for cache in type.string_caches %}*/
+  static StringCache& /*{{ cache.accessor }}*/()
+  {
+    static StringCache* const cache =
+      new StringCache("/*{{ cache.scoped_name }}*/", /*{{ intern_cache_size }}*/);
+    return *cache;
+  }
+  /*{% endfor %}*/
+
+  /*{% if type.to_replace %}*/
+  /**
+   * The dict Enum keeps of values to members, so members can be looked up
+   * without calling the class. Null if the class doesn't have one.
+   */
+  static PyObject* get_members()
+  {
+    static PyObject* members = nullptr;
+    static bool looked_up = false;
+    if (!looked_up) {
+      PyObject* const cls = get_python_class();
+      looked_up = true;
+      members = PyObject_GetAttrString(cls, "_value2member_map_");
+      if (!members || !PyDict_Check(members)) {
+        PyErr_Clear();
+        Py_XDECREF(members);
+        members = nullptr;
+      }
+    }
+    return members;
+  }
+  /*{% endif %}*/
+
   static void cpp_to_python(const /*{{ type.cpp_name }}*/& cpp, PyObject*& py)
   {
     PyObject* const cls = get_python_class();
     /*{% if type.to_replace %}*/
     if (py) {
       Py_DECREF(py);
+      py = nullptr;
+    }
+    Ref value = PyLong_FromLong(static_cast<long>(cpp));
+    if (!value) {
+      throw Exception();
+    }
+    PyObject* const members = get_members();
+    if (members && (py = PyDict_GetItem(members, *value))) {
+      Py_INCREF(py);
+    } else {
+      py = PyObject_CallFunctionObjArgs(cls, *value, nullptr);
+      if (!py) {
+        throw Exception();
+      }
     }
-    PyObject* args;
-    /*{{ type.new_lines | indent(4) }}*/
-    py = PyObject_CallObject(cls, args);
     /*{% else %}*/
     if (py) {
-      if (PyObject_IsInstance(cls, py) != 1) {
+      if (PyObject_IsInstance(py, cls) != 1) {
         throw Exception("Not a /*{{ type.py_name }}*/", PyExc_TypeError);
       }
     } else {
-      PyObject* args;
-      /*{{ type.new_lines | indent(6) }}*/
-      py = PyObject_CallObject(cls, args);
+      /*{% if skip_init %}*/
+      py = new_instance(cls);
+      /*{% else %}*/
+      py = PyObject_CallObject(cls, nullptr);
+      /*{% endif %}*/
+      if (!py) {
+        throw Exception();
+      }
     }
     /*{% if type.to_lines %}*//*{{ type.to_lines | indent(4) }}*//*{% endif %}*/
     /*{% endif %}*/
   }
+  /*{% if not type.to_replace %}*/
+  /*{% if lazy_samples and type.is_topic_type and type.field_names %}*/
+
+  typedef LazySample</*{{ type.cpp_name }}*/> Proxy;
+
+  static const size_t field_count = /*{{ type.field_names | length }}*/;
+
+  /**
+   * Convert the field at index in get_field_names to Python for a
+   * LazySample. Fields that aren't converted are None.
+   */
+  static PyObject* field_to_python(const /*{{ type.cpp_name }}*/& cpp, size_t index)
+  {
+    PyObject* field_value = nullptr;
+    switch (index) {
+    /*{{ type.lazy_lines | indent(4) }}*/
+    default:
+      Py_RETURN_NONE;
+    }
+    if (!field_value) {
+      throw Exception();
+    }
+    return field_value;
+  }
+  /*{% else %}*/
+
+  typedef NoLazySample Proxy;
+  /*{% endif %}*/
+
+  /// Size of the packed records of the numeric fields written by to_record
+  static const size_t record_size = /*{{ type.record_size }}*/;
+
+  /// Number of fields that to_record converts to Python objects
+  static const Py_ssize_t object_count = /*{{ type.object_count }}*/;
+
+  /**
+   * Copy the numeric fields of a sample into a packed record for a NumPy
+   * structured array and convert the rest to Python objects, setting them at
+   * index in each of the object_count lists in objects.
+   */
+  static void to_record(const /*{{ type.cpp_name }}*/& cpp, char* record, PyObject* const* objects,
+    Py_ssize_t index)
+  {
+    /*{{ type.record_lines | indent(4) }}*/
+  }
+  /*{% endif %}*/
 
   static void python_to_cpp(PyObject* py, /*{{ type.cpp_name }}*/& cpp)
   {
+    /*{% if not type.to_replace %}*/
     PyObject* const cls = get_python_class();
+    if (Py_TYPE(py) != reinterpret_cast<PyTypeObject*>(cls) &&
+        PyObject_IsInstance(py, cls) != 1) {
+      throw Exception("Not a /*{{ type.py_name }}*/", PyExc_TypeError);
+    }
+    /*{% endif %}*/
     /*{{ type.from_lines | indent(4) }}*/
   }
 };
@@ -90,8 +221,7 @@ PyObject* pyregister_type(PyObject* self, PyObject* args)
   pytype++;
 
   try {
-    TopicTypeBase::find(*pytype)->register_type(*pyparticipant);
-    Py_RETURN_NONE;
+    return TopicTypeBase::find(*pytype)->register_type(*pyparticipant);
   } catch (const Exception& e) {
     return e.set();
   }
@@ -112,35 +242,469 @@ PyObject* pytype_name(PyObject* self, PyObject* args)
   }
 }
 
-PyObject* pytake_next_sample(PyObject* self, PyObject* args)
+/**
+ * bind(entity: Entity) -> None
+ *
+ * Bind a native reader or writer created with a topic of one of the types in
+ * this module to the type, so later calls can use it directly.
+ */
+PyObject* pybind(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("bind", nargs, 1)) {
+    return nullptr;
+  }
+  EntityObject* const entity = get_entity_object(args[0]);
+  if (!entity) {
+    return nullptr;
+  }
+  if (!entity->topic_type) {
+    PyErr_SetString(PyExc_TypeError, "Native PyOpenDDS entity has no topic type");
+    return nullptr;
+  }
+
+  try {
+    TopicTypeBase::find(entity->topic_type)->bind(entity);
+    Py_RETURN_NONE;
+  } catch (const Exception& e) {
+    return e.set();
+  }
+}
+
+/**
+ * Get a native reader or writer that was bound to its type. Returns null and
+ * sets a Python TypeError if it isn't one.
+ */
+EntityObject* get_bound(PyObject* pyentity, EntityKind kind)
+{
+  EntityObject* const entity = get_entity_object(pyentity);
+  if (entity && (entity->kind != kind || !entity->bound_topic_type)) {
+    PyErr_SetString(PyExc_TypeError, kind == EntityKind::datareader ?
+        "Native PyOpenDDS entity is not a bound DataReader" :
+        "Native PyOpenDDS entity is not a bound DataWriter");
+    return nullptr;
+  }
+  return entity;
+}
+
+TopicTypeBase* topic_type_of(EntityObject* entity)
+{
+  return static_cast<TopicTypeBase*>(entity->bound_topic_type);
+}
+
+/**
+ * take_next_sample(reader: Entity) -> Any
+ */
+PyObject* pytake_next_sample(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("take_next_sample", nargs, 1)) {
+    return nullptr;
+  }
+  EntityObject* const reader = get_bound(args[0], EntityKind::datareader);
+  if (!reader) {
+    return nullptr;
+  }
+
+  try {
+    return topic_type_of(reader)->take_next_sample(reader);
+  } catch (const Exception& e) {
+    return e.set();
+  }
+}
+
+/**
+ * take(reader: Entity, max_samples: int, seconds: int, nanoseconds: int) -> list
+ * read(reader: Entity, max_samples: int, seconds: int, nanoseconds: int) -> list
+ * take_with_info(reader: Entity, max_samples: int, seconds: int, nanoseconds: int)
+ *     -> List[Tuple[Any, SampleInfo]]
+ * read_with_info(reader: Entity, max_samples: int, seconds: int, nanoseconds: int)
+ *     -> List[Tuple[Any, SampleInfo]]
+ * take_array(reader: Entity, max_samples: int, seconds: int, nanoseconds: int)
+ *     -> (int, bytearray, tuple)
+ * read_array(reader: Entity, max_samples: int, seconds: int, nanoseconds: int)
+ *     -> (int, bytearray, tuple)
+ * take_serialized(reader: Entity, max_samples: int, seconds: int, nanoseconds: int)
+ *     -> List[memoryview]
+ * read_serialized(reader: Entity, max_samples: int, seconds: int, nanoseconds: int)
+ *     -> List[memoryview]
+ * take_lazy(reader: Entity, max_samples: int, seconds: int, nanoseconds: int) -> list
+ * read_lazy(reader: Entity, max_samples: int, seconds: int, nanoseconds: int) -> list
+ */
+enum class TakeResult {
+  samples,
+  with_info,
+  array,
+  serialized,
+  lazy,
+};
+
+PyObject* take_or_read(const char* name, PyObject* const* args, Py_ssize_t nargs, bool take,
+  TakeResult result = TakeResult::samples)
+{
+  if (check_nargs(name, nargs, 4)) {
+    return nullptr;
+  }
+  EntityObject* const reader = get_bound(args[0], EntityKind::datareader);
+  ::CORBA::Long max_samples;
+  DDS::Duration_t max_wait;
+  if (!reader || int_arg(args[1], max_samples) || int_arg(args[2], max_wait.sec) ||
+      int_arg(args[3], max_wait.nanosec)) {
+    return nullptr;
+  }
+
+  try {
+    TopicTypeBase* const topic_type = topic_type_of(reader);
+    switch (result) {
+    case TakeResult::array:
+      return topic_type->take_array(reader, max_samples, max_wait, take);
+    case TakeResult::serialized:
+      return topic_type->take_serialized(reader, max_samples, max_wait, take);
+    case TakeResult::lazy:
+      return topic_type->take_lazy(reader, max_samples, max_wait, take);
+    default:
+      return topic_type->take(
+        reader, max_samples, max_wait, take, result == TakeResult::with_info);
+    }
+  } catch (const Exception& e) {
+    return e.set();
+  }
+}
+
+PyObject* pytake(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read("take", args, nargs, true);
+}
+
+PyObject* pyread(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read("read", args, nargs, false);
+}
+
+PyObject* pytake_with_info(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read("take_with_info", args, nargs, true, TakeResult::with_info);
+}
+
+PyObject* pyread_with_info(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read("read_with_info", args, nargs, false, TakeResult::with_info);
+}
+
+PyObject* pytake_array(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read("take_array", args, nargs, true, TakeResult::array);
+}
+
+PyObject* pyread_array(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read("read_array", args, nargs, false, TakeResult::array);
+}
+
+PyObject* pytake_serialized(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read("take_serialized", args, nargs, true, TakeResult::serialized);
+}
+
+PyObject* pyread_serialized(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read("read_serialized", args, nargs, false, TakeResult::serialized);
+}
+
+PyObject* pytake_lazy(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read("take_lazy", args, nargs, true, TakeResult::lazy);
+}
+
+PyObject* pyread_lazy(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read("read_lazy", args, nargs, false, TakeResult::lazy);
+}
+
+/**
+ * lookup_instance(reader: Entity, sample: Any) -> int
+ */
+PyObject* pylookup_instance(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("lookup_instance", nargs, 2)) {
+    return nullptr;
+  }
+  EntityObject* const reader = get_bound(args[0], EntityKind::datareader);
+  if (!reader) {
+    return nullptr;
+  }
+
+  try {
+    return topic_type_of(reader)->lookup_instance(reader, args[1]);
+  } catch (const Exception& e) {
+    return e.set();
+  }
+}
+
+/**
+ * take_instance(reader: Entity, handle: int, max_samples: int) -> list
+ * read_instance(reader: Entity, handle: int, max_samples: int) -> list
+ * take_next_instance(reader: Entity, previous: int, max_samples: int) -> (int, list)
+ * read_next_instance(reader: Entity, previous: int, max_samples: int) -> (int, list)
+ */
+PyObject* take_or_read_instance(
+  const char* name, PyObject* const* args, Py_ssize_t nargs, bool take, bool next)
+{
+  if (check_nargs(name, nargs, 3)) {
+    return nullptr;
+  }
+  EntityObject* const reader = get_bound(args[0], EntityKind::datareader);
+  DDS::InstanceHandle_t handle;
+  ::CORBA::Long max_samples;
+  if (!reader || int_arg(args[1], handle) || int_arg(args[2], max_samples)) {
+    return nullptr;
+  }
+
+  try {
+    TopicTypeBase* const topic_type = topic_type_of(reader);
+    return next ? topic_type->take_next_instance(reader, handle, max_samples, take) :
+                  topic_type->take_instance(reader, handle, max_samples, take);
+  } catch (const Exception& e) {
+    return e.set();
+  }
+}
+
+PyObject* pytake_instance(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read_instance("take_instance", args, nargs, true, false);
+}
+
+PyObject* pyread_instance(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read_instance("read_instance", args, nargs, false, false);
+}
+
+PyObject* pytake_next_instance(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read_instance("take_next_instance", args, nargs, true, true);
+}
+
+PyObject* pyread_next_instance(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  return take_or_read_instance("read_next_instance", args, nargs, false, true);
+}
+
+/**
+ * enable_last_value_cache(reader: Entity) -> None
+ */
+PyObject* pyenable_last_value_cache(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("enable_last_value_cache", nargs, 1)) {
+    return nullptr;
+  }
+  EntityObject* const reader = get_bound(args[0], EntityKind::datareader);
+  if (!reader) {
+    return nullptr;
+  }
+
+  topic_type_of(reader)->enable_last_value_cache(reader);
+  Py_RETURN_NONE;
+}
+
+/**
+ * last_value(reader: Entity, handle: int) -> Optional[Any]
+ */
+PyObject* pylast_value(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("last_value", nargs, 2)) {
+    return nullptr;
+  }
+  EntityObject* const reader = get_bound(args[0], EntityKind::datareader);
+  DDS::InstanceHandle_t handle;
+  if (!reader || int_arg(args[1], handle)) {
+    return nullptr;
+  }
+
+  try {
+    return topic_type_of(reader)->last_value(reader, handle);
+  } catch (const Exception& e) {
+    return e.set();
+  }
+}
+
+/**
+ * changed_last_values(reader: Entity) -> Dict[int, Optional[Any]]
+ */
+PyObject* pychanged_last_values(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("changed_last_values", nargs, 1)) {
+    return nullptr;
+  }
+  EntityObject* const reader = get_bound(args[0], EntityKind::datareader);
+  if (!reader) {
+    return nullptr;
+  }
+
+  try {
+    return topic_type_of(reader)->changed_last_values(reader);
+  } catch (const Exception& e) {
+    return e.set();
+  }
+}
+
+/**
+ * write(writer: Entity, sample: Any) -> None
+ */
+PyObject* pywrite(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("write", nargs, 2)) {
+    return nullptr;
+  }
+  EntityObject* const writer = get_bound(args[0], EntityKind::datawriter);
+  if (!writer) {
+    return nullptr;
+  }
+
+  try {
+    topic_type_of(writer)->write(writer, args[1]);
+    Py_RETURN_NONE;
+  } catch (const Exception& e) {
+    return e.set();
+  }
+}
+
+/**
+ * write_many(writer: Entity, samples: Iterable[Any]) -> None
+ */
+PyObject* pywrite_many(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("write_many", nargs, 2)) {
+    return nullptr;
+  }
+  EntityObject* const writer = get_bound(args[0], EntityKind::datawriter);
+  if (!writer) {
+    return nullptr;
+  }
+
+  try {
+    topic_type_of(writer)->write_many(writer, args[1]);
+    Py_RETURN_NONE;
+  } catch (const Exception& e) {
+    return e.set();
+  }
+}
+
+/**
+ * dispose(writer: Entity, sample: Any) -> None
+ */
+PyObject* pydispose(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
 {
-  Ref pyreader;
-  if (!PyArg_ParseTuple(args, "O", &*pyreader)) {
+  if (check_nargs("dispose", nargs, 2)) {
+    return nullptr;
+  }
+  EntityObject* const writer = get_bound(args[0], EntityKind::datawriter);
+  if (!writer) {
     return nullptr;
   }
-  pyreader++;
 
-  // Try to Get Topic Type and Do Read
-  Ref pytopic = PyObject_GetAttrString(*pyreader, "topic");
-  if (!pytopic) {
+  try {
+    topic_type_of(writer)->dispose(writer, args[1]);
+    Py_RETURN_NONE;
+  } catch (const Exception& e) {
+    return e.set();
+  }
+}
+/*{%- if benchmarks %}*/
+
+/**
+ * benchmark_conversion(type: type, sample: Any, iterations: int) -> (int, int)
+ *
+ * Returns the nanoseconds it took to convert the sample to C++ and back to
+ * Python the given number of times.
+ */
+PyObject* pybenchmark_conversion(PyObject* self, PyObject* args)
+{
+  Ref pytype;
+  Ref pysample;
+  long iterations;
+  if (!PyArg_ParseTuple(args, "OOl", &*pytype, &*pysample, &iterations)) {
     return nullptr;
   }
-  Ref pytype = PyObject_GetAttrString(*pytopic, "type");
-  if (!pytype) {
+  pytype++;
+  pysample++;
+
+  try {
+    return TopicTypeBase::find(*pytype)->benchmark_conversion(*pysample, iterations);
+  } catch (const Exception& e) {
+    return e.set();
+  }
+}
+/*{%- endif %}*/
+
+/**
+ * string_cache_stats() -> dict
+ *
+ * Returns the stats of the caches of the fields passed to --intern-strings,
+ * by the scoped name of the field. Caches are only included once they have
+ * been used.
+ */
+PyObject* pystring_cache_stats(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("string_cache_stats", nargs, 0)) {
     return nullptr;
   }
 
   try {
-    return TopicTypeBase::find(*pytype)->take_next_sample(*pyreader);
+    return StringCache::all_stats();
   } catch (const Exception& e) {
     return e.set();
   }
 }
 
+/**
+ * reset_string_cache_stats() -> None
+ *
+ * Resets the hit and miss counts of all the string caches.
+ */
+PyObject* pyreset_string_cache_stats(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("reset_string_cache_stats", nargs, 0)) {
+    return nullptr;
+  }
+
+  for (StringCache* cache : StringCache::all()) {
+    cache->reset_stats();
+  }
+  Py_RETURN_NONE;
+}
+
+/// Cast a METH_FASTCALL function for a PyMethodDef
+#define PYOPENDDS_FASTCALL(function) reinterpret_cast<PyCFunction>(function), METH_FASTCALL
+
 PyMethodDef /*{{ native_package_name }}*/_Methods[] = {
   {"register_type", pyregister_type, METH_VARARGS, ""},
   {"type_name", pytype_name, METH_VARARGS, ""},
-  {"take_next_sample", pytake_next_sample, METH_VARARGS, ""},
+  {"bind", PYOPENDDS_FASTCALL(pybind), ""},
+  {"take_next_sample", PYOPENDDS_FASTCALL(pytake_next_sample), ""},
+  {"take", PYOPENDDS_FASTCALL(pytake), ""},
+  {"read", PYOPENDDS_FASTCALL(pyread), ""},
+  {"take_with_info", PYOPENDDS_FASTCALL(pytake_with_info), ""},
+  {"read_with_info", PYOPENDDS_FASTCALL(pyread_with_info), ""},
+  {"take_array", PYOPENDDS_FASTCALL(pytake_array), ""},
+  {"read_array", PYOPENDDS_FASTCALL(pyread_array), ""},
+  {"take_serialized", PYOPENDDS_FASTCALL(pytake_serialized), ""},
+  {"read_serialized", PYOPENDDS_FASTCALL(pyread_serialized), ""},
+  {"take_lazy", PYOPENDDS_FASTCALL(pytake_lazy), ""},
+  {"read_lazy", PYOPENDDS_FASTCALL(pyread_lazy), ""},
+  {"lookup_instance", PYOPENDDS_FASTCALL(pylookup_instance), ""},
+  {"take_instance", PYOPENDDS_FASTCALL(pytake_instance), ""},
+  {"read_instance", PYOPENDDS_FASTCALL(pyread_instance), ""},
+  {"take_next_instance", PYOPENDDS_FASTCALL(pytake_next_instance), ""},
+  {"read_next_instance", PYOPENDDS_FASTCALL(pyread_next_instance), ""},
+  {"enable_last_value_cache", PYOPENDDS_FASTCALL(pyenable_last_value_cache), ""},
+  {"last_value", PYOPENDDS_FASTCALL(pylast_value), ""},
+  {"changed_last_values", PYOPENDDS_FASTCALL(pychanged_last_values), ""},
+  {"write", PYOPENDDS_FASTCALL(pywrite), ""},
+  {"write_many", PYOPENDDS_FASTCALL(pywrite_many), ""},
+  {"dispose", PYOPENDDS_FASTCALL(pydispose), ""},
+  /*{%- if benchmarks %}*/
+  {"benchmark_conversion", pybenchmark_conversion, METH_VARARGS, ""},
+  /*{%- endif %}*/
+  {"string_cache_stats", PYOPENDDS_FASTCALL(pystring_cache_stats), ""},
+  {"reset_string_cache_stats", PYOPENDDS_FASTCALL(pyreset_string_cache_stats), ""},
   {nullptr, nullptr, 0, nullptr},
 };
 
@@ -157,11 +721,17 @@ PyModuleDef /*{{ native_package_name }}*/_Module = {
 PyMODINIT_FUNC PyInit_/*{{ native_package_name }}*/()
 {
   PyObject* module = PyModule_Create(&/*{{ native_package_name }}*/_Module);
-  if (!module || pyopendds::Errors::cache()) {
+  if (!module || pyopendds::Errors::cache() || pyopendds::EntityObject::cache_type() ||
+      pyopendds::SampleInfoType::cache_type()) {
     return nullptr;
   }
   /*{% for type in types %}*//*{% if type.is_topic_type %}*/
   TopicType</*{{ type.cpp_name }}*/>::init();
+  /*{%- if lazy_samples and type.field_names %}*/
+  if (LazySample</*{{ type.cpp_name }}*/>::init("/*{{ native_package_name }}*/./*{{ type.py_name }}*/Proxy")) {
+    return nullptr;
+  }
+  /*{%- endif %}*/
   /*{%- endif %}*//*{% endfor %}*/
 
   return module;
@@ -1,21 +1,125 @@
-{% if has_struct -%}
-from dataclasses import dataclass as _pyopendds_struct
+from __future__ import annotations
+{%- if submodules %}
+from importlib import import_module as _pyopendds_import_module
 {%- endif %}
-{% if has_enum -%}
+{%- if has_package_reference %}
+import {{ package_name }} as _pyopendds_package
+{%- endif %}
+{%- if has_cdr_fields %}
+from pyopendds import cdr as _pyopendds_cdr
+{%- endif %}
+{%- if has_number_array %}
+from array import array as _pyopendds_array
+{%- endif %}
+{%- if has_enum %}
 from enum import IntFlag as _pyopendds_enum
 {%- endif %}
+{%- if submodules %}
+
+# Submodules are imported the first time they're used
+_pyopendds_submodules = (
+{%- for name in submodules %}
+    '{{ name }}',
+{%- endfor %}
+)
+
+
+def __getattr__(name):
+    if name in _pyopendds_submodules:
+        return _pyopendds_import_module('.' + name, __name__)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_pyopendds_submodules))
+{%- endif %}
 {% for type in types -%}
 {%- if type.struct is defined %}
+{%- set this = type.self_name %}
 
-@_pyopendds_struct
 class {{ type.local_name }}:
 {%- if type.type_support %}
     _pyopendds_typesupport_packge_name = '{{ type.type_support }}'
-{% endif -%}
+    _pyopendds_array_fields = (
+{%- for name, numpy_type in type.array_fields %}
+        ('{{ name }}', '{{ numpy_type }}'),
+{%- endfor %}
+    )
+{%- endif %}
+    _pyopendds_fields = (
+{%- for field in type.struct.fields %}
+        '{{ field.name }}',
+{%- endfor %}
+    )
+{% for field in type.struct.fields %}
+    {{ field.name }}: {{ field.type }}
+{%- endfor %}
+
+    def __init__(
+        {{ this }},
+{%- for field in type.struct.fields %}
+        {{ field.name }}={{ field.default_value if field.default_argument else 'None' }},
+{%- endfor %}
+    ):
+{%- for field in type.struct.fields %}
+{%- if field.default_argument %}
+        {{ this }}.{{ field.name }} = {{ field.name }}
+{%- else %}
+        {{ this }}.{{ field.name }} = {{ field.default_value }} if {{ field.name }} is None else {{ field.name }}
+{%- endif %}
+{%- else %}
+        pass
+{%- endfor %}
+
+    def __repr__({{ this }}):
+        return '{{ type.repr_format }}'.format(
+            type({{ this }}).__qualname__,
 {%- for field in type.struct.fields %}
-    {{ field.name }}: {{ field.type }} = {{ field.default_value }}
+            {{ this }}.{{ field.name }},
 {%- endfor %}
+        )
+
+    def __eq__({{ this }}, other):
+        if other.__class__ is not {{ this }}.__class__:
+            return NotImplemented
+        return (
+{%- for field in type.struct.fields %}
+            {{ this }}.{{ field.name }},
+{%- endfor %}
+        ) == (
+{%- for field in type.struct.fields %}
+            other.{{ field.name }},
+{%- endfor %}
+        )
+
+    # Mutable, so not hashable
+    __hash__ = None
+{%- if type.struct.cdr_decodable %}
+
+    @staticmethod
+    def _pyopendds_cdr_fields():
+        return (
+{%- for field in type.struct.fields %}
+            ('{{ field.name }}', {{ field.cdr_decoder }}),
+{%- endfor %}
+        )
+{%- endif %}
+{%- if type.view_name %}
+
+
+class {{ type.view_name }}(_pyopendds_cdr.SampleView):
+    '''Serialized {{ type.local_name }} returned by DataReader.take_serialized,
+    which decodes a field when it's first accessed.
+    '''
+    __slots__ = (
+{%- for field in type.struct.fields %}
+        '{{ field.name }}',
+{%- endfor %}
+    )
+    _pyopendds_type = {{ type.local_name }}
+{%- endif %}
 {%- elif type.enum is defined %}
+
 class {{ type.local_name }}(_pyopendds_enum):
 {%- for member in type.enum.members %}
     {{ member.name }} = {{ member.value }}
@@ -23,4 +127,4 @@ class {{ type.local_name }}(_pyopendds_enum):
 {%- else %}
 # {{ type.local_name }} was left unimplmented
 {% endif -%}
-{%- endfor -%}
+{%- endfor %}
@@ -1,5 +1,5 @@
 from .constants import ReturnCode
-from typing import Dict
+from typing import Dict, Optional
 
 
 class PyOpenDDS_Error(Exception):
@@ -12,15 +12,18 @@ class ReturnCodeError(PyOpenDDS_Error):
     OpenDDS function that returns ReturnCode_t.
 
     There are subclasses for each ReturnCode, for example
-    ImmutablePolicyReturnCodeError for ReturnCode.IMMUTABLE_POLICY.
+    ImmutablePolicyReturnCodeError for ReturnCode.IMMUTABLE_POLICY. PyOpenDDS
+    also raises them with a message when it finds a problem OpenDDS would have
+    returned the code for, like an invalid QoS policy.
     '''
 
     return_code = None
     dds_name = None
     subclasses: Dict[int, type] = {}
 
-    def __init__(self, unknown_code: int = None):
+    def __init__(self, unknown_code: Optional[int] = None, message: Optional[str] = None):
         self.unknown_code = unknown_code
+        self.message = message
 
     @classmethod
     def generate_subclasses(cls) -> None:
@@ -32,6 +35,12 @@ class ReturnCodeError(PyOpenDDS_Error):
                 globals()[name] = cls
                 cls.subclasses[value] = cls
 
+    @classmethod
+    def for_code(cls, rc: ReturnCode, message: str) -> 'ReturnCodeError':
+        '''Return the subclass for rc with a message explaining why.
+        '''
+        return cls.subclasses[rc](message=message)
+
     @classmethod
     def check(cls, rc: ReturnCode) -> None:
         try:
@@ -42,10 +51,12 @@ class ReturnCodeError(PyOpenDDS_Error):
             raise cls.subclasses[rc]
 
     def __str__(self):
+        if self.message:
+            return '{}: {}'.format(self.dds_name, self.message)
         if self.return_code:
             return 'OpenDDS has returned ' + self.dds_name
         return 'OpenDDS has returned an ReturnCode_t unkown to PyOpenDDS: ' + \
-            self.unknown_code
+            str(self.unknown_code)
 
 
 ReturnCodeError.generate_subclasses()
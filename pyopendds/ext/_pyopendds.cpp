@@ -6,18 +6,38 @@
 
 #include <dds/DdsDcpsInfrastructureC.h>
 #include <dds/DdsDcpsCoreC.h>
+#include <dds/DdsDcpsSubscriptionC.h>
+#include <dds/DdsDcpsPublicationC.h>
+#include <dds/DCPS/LocalObject.h>
 #include <dds/DCPS/Service_Participant.h>
 #include <dds/DCPS/Marked_Default_Qos.h>
 #include <dds/DCPS/WaitSet.h>
+#include <dds/DCPS/GuardCondition.h>
+#include <dds/DCPS/DataReaderImpl.h>
+#include <dds/DCPS/Qos_Helper.h>
 #include <dds/Version.h>
 
 #include <ace/Init_ACE.h>
+#include <ace/Pipe.h>
+
+#include <algorithm>
+#include <array>
+#include <atomic>
+#include <condition_variable>
+#include <cstring>
+#include <deque>
+#include <memory>
+#include <mutex>
+#include <thread>
+#include <vector>
 
 using namespace pyopendds;
 
 PyObject* Errors::pyopendds_ = nullptr;
 PyObject* Errors::PyOpenDDS_Error_ = nullptr;
 PyObject* Errors::ReturnCodeError_ = nullptr;
+PyTypeObject* EntityObject::type = nullptr;
+PyTypeObject* SampleInfoType::type = nullptr;
 
 namespace {
 
@@ -152,333 +172,1802 @@ PyObject* init_opendds_impl(PyObject* self, PyObject* args, PyObject* kw)
   Py_RETURN_NONE;
 }
 
+void entity_dealloc(PyObject* self)
+{
+  EntityObject* const entity = reinterpret_cast<EntityObject*>(self);
+  PyTypeObject* const type = Py_TYPE(self);
+  Py_XDECREF(entity->topic_type);
+  delete entity->last_value_cache;
+  delete entity->reader_stats;
+  CORBA::release(entity->entity);
+  type->tp_free(self);
+  Py_DECREF(type);
+}
+
+/// Documentation for Internal Python Objects
+const char* internal_docstr = "Internal to PyOpenDDS, not for use directly!";
+
+PyType_Slot entity_slots[] = {
+  {Py_tp_dealloc, reinterpret_cast<void*>(entity_dealloc)},
+  {Py_tp_doc, const_cast<char*>(internal_docstr)},
+  {0, nullptr},
+};
+
+PyType_Spec entity_spec = {
+  "_pyopendds.Entity",
+  sizeof(EntityObject),
+  0,
+  Py_TPFLAGS_DEFAULT,
+  entity_slots,
+};
+
+/**
+ * Create a _pyopendds.Entity that takes ownership of the reference to the
+ * entity. The entity is released if this fails.
+ */
+template <typename T>
+PyObject* new_entity(T* ptr, PyObject* topic_type = nullptr)
+{
+  // tp_alloc holds a reference to the heap type for entity_dealloc to
+  // release. PyObject_New doesn't before Python 3.8.
+  EntityObject* const entity = reinterpret_cast<EntityObject*>(
+    EntityObject::type->tp_alloc(EntityObject::type, 0));
+  if (!entity) {
+    CORBA::release(ptr);
+    return nullptr;
+  }
+  entity->kind = EntityTraits<T>::kind;
+  entity->entity = ptr;
+  entity->interface = ptr;
+  Py_XINCREF(topic_type);
+  entity->topic_type = topic_type;
+  entity->bound_topic_type = nullptr;
+  entity->narrowed = nullptr;
+  entity->reader_stats = nullptr;
+  entity->last_value_cache = nullptr;
+  return reinterpret_cast<PyObject*>(entity);
+}
+
+/**
+ * Copy a tuple of str into a StringSeq. Returns true if there was an error.
+ */
+bool to_string_seq(PyObject* strings, DDS::StringSeq& seq)
+{
+  const Py_ssize_t count = PyTuple_Size(strings);
+  if (count < 0) {
+    return true;
+  }
+  seq.length(static_cast<CORBA::ULong>(count));
+  for (Py_ssize_t i = 0; i < count; ++i) {
+    const char* const string = PyUnicode_AsUTF8(PyTuple_GET_ITEM(strings, i));
+    if (!string) {
+      return true;
+    }
+    seq[static_cast<CORBA::ULong>(i)] = string;
+  }
+  return false;
+}
+
+/*
+ * The QoS of the entities are passed as None or a dict of the policies that
+ * were set, made by the _native methods of the classes in pyopendds.qos. The
+ * set_policy overloads copy a policy into the QoS struct if it's in the dict.
+ * They return true if there was an error.
+ */
+
+PyObject* get_policy(PyObject* policies, const char* name)
+{
+  return policies == Py_None ? nullptr : PyDict_GetItemString(policies, name);
+}
+
+bool set_policy(PyObject* policies, DDS::HistoryQosPolicy& policy)
+{
+  PyObject* const args = get_policy(policies, "history");
+  int kind;
+  if (!args || !PyArg_ParseTuple(args, "ii", &kind, &policy.depth)) {
+    return args;
+  }
+  policy.kind = static_cast<DDS::HistoryQosPolicyKind>(kind);
+  return false;
+}
+
+bool set_policy(PyObject* policies, DDS::ResourceLimitsQosPolicy& policy)
+{
+  PyObject* const args = get_policy(policies, "resource_limits");
+  return args && !PyArg_ParseTuple(args, "iii",
+    &policy.max_samples, &policy.max_instances, &policy.max_samples_per_instance);
+}
+
+bool set_policy(PyObject* policies, DDS::ReliabilityQosPolicy& policy)
+{
+  PyObject* const args = get_policy(policies, "reliability");
+  int kind;
+  if (!args || !PyArg_ParseTuple(args, "iiI",
+      &kind, &policy.max_blocking_time.sec, &policy.max_blocking_time.nanosec)) {
+    return args;
+  }
+  policy.kind = static_cast<DDS::ReliabilityQosPolicyKind>(kind);
+  return false;
+}
+
+bool set_policy(PyObject* policies, DDS::LatencyBudgetQosPolicy& policy)
+{
+  PyObject* const args = get_policy(policies, "latency_budget");
+  return args && !PyArg_ParseTuple(args, "iI", &policy.duration.sec, &policy.duration.nanosec);
+}
+
+bool set_policy(PyObject* policies, DDS::TransportPriorityQosPolicy& policy)
+{
+  PyObject* const args = get_policy(policies, "transport_priority");
+  return args && !PyArg_ParseTuple(args, "i", &policy.value);
+}
+
+bool set_policy(PyObject* policies, DDS::TimeBasedFilterQosPolicy& policy)
+{
+  PyObject* const args = get_policy(policies, "time_based_filter");
+  return args && !PyArg_ParseTuple(args, "iI",
+    &policy.minimum_separation.sec, &policy.minimum_separation.nanosec);
+}
+
+bool set_policy(PyObject* policies, DDS::PartitionQosPolicy& policy)
+{
+  PyObject* const names = get_policy(policies, "partition");
+  return names && to_string_seq(names, policy.name);
+}
+
+bool set_policy(PyObject* policies, DDS::UserDataQosPolicy& policy)
+{
+  PyObject* const args = get_policy(policies, "user_data");
+  const char* value;
+  Py_ssize_t size;
+  if (!args || !PyArg_ParseTuple(args, "y#", &value, &size)) {
+    return args;
+  }
+  policy.value.length(static_cast<CORBA::ULong>(size));
+  if (size) {
+    std::memcpy(policy.value.get_buffer(), value, size);
+  }
+  return false;
+}
+
+bool set_qos(PyObject* policies, DDS::DomainParticipantQos& qos)
+{
+  return set_policy(policies, qos.user_data);
+}
+
+bool set_qos(PyObject* policies, DDS::TopicQos& qos)
+{
+  return set_policy(policies, qos.history) || set_policy(policies, qos.resource_limits) ||
+    set_policy(policies, qos.reliability) || set_policy(policies, qos.latency_budget) ||
+    set_policy(policies, qos.transport_priority);
+}
+
+bool set_qos(PyObject* policies, DDS::SubscriberQos& qos)
+{
+  return set_policy(policies, qos.partition);
+}
+
+bool set_qos(PyObject* policies, DDS::PublisherQos& qos)
+{
+  return set_policy(policies, qos.partition);
+}
+
+bool set_qos(PyObject* policies, DDS::DataReaderQos& qos)
+{
+  return set_policy(policies, qos.history) || set_policy(policies, qos.resource_limits) ||
+    set_policy(policies, qos.reliability) || set_policy(policies, qos.latency_budget) ||
+    set_policy(policies, qos.time_based_filter);
+}
+
+bool set_qos(PyObject* policies, DDS::DataWriterQos& qos)
+{
+  return set_policy(policies, qos.history) || set_policy(policies, qos.resource_limits) ||
+    set_policy(policies, qos.reliability) || set_policy(policies, qos.latency_budget) ||
+    set_policy(policies, qos.transport_priority);
+}
+
 /**
- * Callback for Python to Call when the Python Participant is Deleted
+ * Copy the policies into a QoS struct that has the defaults and check it the
+ * same way OpenDDS would when creating an entity with it, raising the
+ * ReturnCodeError OpenDDS would return. Returns true if there was an error.
  */
-void delete_participant_var(PyObject* part_capsule)
+template <typename Qos>
+bool policies_to_qos(PyObject* policies, Qos& qos)
 {
-  if (PyCapsule_CheckExact(part_capsule)) {
-    DDS::DomainParticipant_var participant =
-      static_cast<DDS::DomainParticipant*>(PyCapsule_GetPointer(part_capsule, nullptr));
-    participant = nullptr;
+  if (policies != Py_None && !PyDict_Check(policies)) {
+    PyErr_SetString(PyExc_TypeError, "QoS policies must be None or a dict");
+    return true;
+  }
+  if (set_qos(policies, qos)) {
+    return true;
   }
+  if (!OpenDDS::DCPS::Qos_Helper::valid(qos)) {
+    return Errors::check_rc(DDS::RETCODE_BAD_PARAMETER);
+  }
+  if (!OpenDDS::DCPS::Qos_Helper::consistent(qos)) {
+    return Errors::check_rc(DDS::RETCODE_INCONSISTENT_POLICY);
+  }
+  return false;
 }
 
 /**
- * create_participant(participant: DomainParticipant, domain: int) -> None
+ * create_participant(domain: int, qos: Optional[dict]) -> Entity
  */
 PyObject* create_participant(PyObject* self, PyObject* args)
 {
-  Ref pyparticipant;
   unsigned domain;
-  if (!PyArg_ParseTuple(args, "OI", &*pyparticipant, &domain)) {
+  PyObject* pyqos;
+  if (!PyArg_ParseTuple(args, "IO", &domain, &pyqos)) {
     return nullptr;
   }
-  pyparticipant++;
 
-  // Create Participant
   DDS::DomainParticipantQos qos;
   participant_factory->get_default_participant_qos(qos);
-  DDS::DomainParticipant* participant = participant_factory->create_participant(
-    domain, qos, DDS::DomainParticipantListener::_nil(), OpenDDS::DCPS::DEFAULT_STATUS_MASK);
-  if (!participant) {
-    PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create Participant");
+  if (policies_to_qos(pyqos, qos)) {
     return nullptr;
   }
 
-  // Attach OpenDDS Participant to Participant Python Object
-  if (set_capsule(*pyparticipant, participant, delete_participant_var)) {
+  // Create Participant
+  DDS::DomainParticipant* participant;
+  {
+    GilRelease release;
+    participant = participant_factory->create_participant(
+      domain, qos, DDS::DomainParticipantListener::_nil(), OpenDDS::DCPS::DEFAULT_STATUS_MASK);
+  }
+  if (!participant) {
+    PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create Participant");
     return nullptr;
   }
 
-  Py_RETURN_NONE;
+  return new_entity(participant);
 }
 
+/**
+ * participant_cleanup(participant: Entity) -> None
+ */
 PyObject* participant_cleanup(PyObject* self, PyObject* args)
 {
-  Ref pyparticipant;
-  if (!PyArg_ParseTuple(args, "O", &*pyparticipant)) {
+  PyObject* pyparticipant;
+  if (!PyArg_ParseTuple(args, "O", &pyparticipant)) {
     return nullptr;
   }
-  pyparticipant++;
 
-  // Get DomainParticipant_var
-  DDS::DomainParticipant* participant = get_capsule<DDS::DomainParticipant>(*pyparticipant);
+  DDS::DomainParticipant* participant = get_entity<DDS::DomainParticipant>(pyparticipant);
   if (!participant) {
     return nullptr;
   }
 
-  participant->delete_contained_entities();
-  Py_RETURN_NONE;
-}
-
-/**
- * Callback for Python to Call when the Topic Capsule is Deleted
- */
-void delete_topic_var(PyObject* topic_capsule)
-{
-  if (PyCapsule_CheckExact(topic_capsule)) {
-    DDS::Topic_var topic = static_cast<DDS::Topic*>(PyCapsule_GetPointer(topic_capsule, nullptr));
-    topic = nullptr;
+  {
+    GilRelease release;
+    participant->delete_contained_entities();
   }
+  Py_RETURN_NONE;
 }
 
 /*
- * create_topic(topic: Topic, participant: DomainParticipant, topic_name: str, topic_type: str) -> None
+ * create_topic(participant: Entity, topic_name: str, topic_type_name: str,
+ *     topic_type: type, qos: Optional[dict]) -> Entity
  *
- * Assumes all the arguments are the types listed above and the participant has
- * a OpenDDS DomainParticipant with the type named by topic_type has already
- * been registered with it.
+ * Assumes the type named by topic_type_name has already been registered with
+ * the participant.
  */
 PyObject* create_topic(PyObject* self, PyObject* args)
 {
-  Ref pytopic;
-  Ref pyparticipant;
+  PyObject* pyparticipant;
   char* name;
   char* type;
-  if (!PyArg_ParseTuple(args, "OOss", &*pytopic, &*pyparticipant, &name, &type)) {
+  PyObject* pytype;
+  PyObject* pyqos;
+  if (!PyArg_ParseTuple(args, "OssOO", &pyparticipant, &name, &type, &pytype, &pyqos)) {
     return nullptr;
   }
-  pytopic++;
-  pyparticipant++;
 
-  // Get DomainParticipant
-  DDS::DomainParticipant* participant = get_capsule<DDS::DomainParticipant>(*pyparticipant);
+  DDS::DomainParticipant* participant = get_entity<DDS::DomainParticipant>(pyparticipant);
   if (!participant) {
     return nullptr;
   }
 
-  // Create Topic
-  DDS::Topic* topic = participant->create_topic(
-    name, type, TOPIC_QOS_DEFAULT, nullptr, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
-  if (!topic) {
-    PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create Topic");
+  DDS::TopicQos qos;
+  participant->get_default_topic_qos(qos);
+  if (policies_to_qos(pyqos, qos)) {
     return nullptr;
   }
 
-  // Attach OpenDDS Topic to Topic Python Object
-  if (set_capsule(*pytopic, topic, delete_topic_var)) {
+  // Create Topic
+  DDS::Topic* topic;
+  {
+    GilRelease release;
+    topic = participant->create_topic(
+      name, type, qos, nullptr, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
+  }
+  if (!topic) {
+    PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create Topic");
     return nullptr;
   }
 
-  Py_RETURN_NONE;
+  return new_entity(topic, pytype);
 }
 
 /**
- * Callback for Python to Call when the Subscriber Capsule is Deleted
+ * create_contentfilteredtopic(participant: Entity, name: str, topic: Entity,
+ *     expression: str, parameters: Tuple[str, ...]) -> Entity
  */
-void delete_subscriber_var(PyObject* subscriber_capsule)
+PyObject* create_contentfilteredtopic(PyObject* self, PyObject* args)
 {
-  if (PyCapsule_CheckExact(subscriber_capsule)) {
-    DDS::Subscriber_var subscriber =
-      static_cast<DDS::Subscriber*>(PyCapsule_GetPointer(subscriber_capsule, nullptr));
-    subscriber = nullptr;
+  PyObject* pyparticipant;
+  char* name;
+  PyObject* pytopic;
+  char* expression;
+  PyObject* pyparameters;
+  if (!PyArg_ParseTuple(args, "OsOsO!", &pyparticipant, &name, &pytopic, &expression,
+      &PyTuple_Type, &pyparameters)) {
+    return nullptr;
+  }
+
+  DDS::DomainParticipant* participant = get_entity<DDS::DomainParticipant>(pyparticipant);
+  if (!participant) {
+    return nullptr;
+  }
+
+  DDS::Topic* topic = get_entity<DDS::Topic>(pytopic);
+  if (!topic) {
+    return nullptr;
+  }
+
+  DDS::StringSeq parameters;
+  if (to_string_seq(pyparameters, parameters)) {
+    return nullptr;
+  }
+
+  // Create ContentFilteredTopic
+  DDS::ContentFilteredTopic* cft;
+  {
+    GilRelease release;
+    cft = participant->create_contentfilteredtopic(name, topic, expression, parameters);
+  }
+  if (!cft) {
+    PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create ContentFilteredTopic");
+    return nullptr;
   }
+
+  return new_entity(cft, get_entity_object(pytopic)->topic_type);
 }
 
 /**
- * create_subscriber(subscriber: Subscriber, participant: DomainParticipant) -> None
+ * contentfilteredtopic_set_expression_parameters(
+ *     cft: Entity, parameters: Tuple[str, ...]) -> None
  */
-PyObject* create_subscriber(PyObject* self, PyObject* args)
+PyObject* contentfilteredtopic_set_expression_parameters(
+  PyObject* self, PyObject* const* args, Py_ssize_t nargs)
 {
-  Ref pyparticipant;
-  Ref pysubscriber;
-  if (!PyArg_ParseTuple(args, "OO", &*pysubscriber, &*pyparticipant)) {
+  if (check_nargs("contentfilteredtopic_set_expression_parameters", nargs, 2)) {
     return nullptr;
   }
-  pyparticipant++;
-  pysubscriber++;
 
-  // Get DomainParticipant_var
-  DDS::DomainParticipant* participant = get_capsule<DDS::DomainParticipant>(*pyparticipant);
-  if (!participant) {
+  DDS::ContentFilteredTopic* cft = get_entity<DDS::ContentFilteredTopic>(args[0]);
+  if (!cft) {
     return nullptr;
   }
 
-  // Create Subscriber
-  DDS::Subscriber* subscriber = participant->create_subscriber(
-    SUBSCRIBER_QOS_DEFAULT, nullptr, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
-  if (!subscriber) {
-    PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create Subscriber");
+  DDS::StringSeq parameters;
+  if (to_string_seq(args[1], parameters)) {
     return nullptr;
   }
 
-  // Attach OpenDDS Subscriber to Subscriber Python Object
-  if (set_capsule(*pysubscriber, subscriber, delete_subscriber_var)) {
+  DDS::ReturnCode_t rc;
+  {
+    GilRelease release;
+    rc = cft->set_expression_parameters(parameters);
+  }
+  if (Errors::check_rc(rc)) {
     return nullptr;
   }
-
   Py_RETURN_NONE;
 }
 
 /**
- * Callback for Python to Call when the Publisher Capsule is Deleted
+ * Get the Topic or ContentFilteredTopic a _pyopendds.Entity holds, for
+ * creating readers. Returns null and sets a Python TypeError if it doesn't
+ * hold either.
+ */
+DDS::TopicDescription* get_topic_description(PyObject* obj)
+{
+  EntityObject* const entity = get_entity_object(obj);
+  if (!entity) {
+    return nullptr;
+  }
+  if (entity->kind == EntityKind::contentfilteredtopic) {
+    return get_entity<DDS::ContentFilteredTopic>(obj);
+  }
+  return get_entity<DDS::Topic>(obj);
+}
+
+/**
+ * create_subscriber(participant: Entity, qos: Optional[dict]) -> Entity
  */
-void delete_publisher_var(PyObject* publisher_capsule)
+PyObject* create_subscriber(PyObject* self, PyObject* args)
 {
-  if (PyCapsule_CheckExact(publisher_capsule)) {
-    DDS::Publisher_var publisher =
-      static_cast<DDS::Publisher*>(PyCapsule_GetPointer(publisher_capsule, nullptr));
-    publisher = nullptr;
+  PyObject* pyparticipant;
+  PyObject* pyqos;
+  if (!PyArg_ParseTuple(args, "OO", &pyparticipant, &pyqos)) {
+    return nullptr;
+  }
+
+  DDS::DomainParticipant* participant = get_entity<DDS::DomainParticipant>(pyparticipant);
+  if (!participant) {
+    return nullptr;
+  }
+
+  DDS::SubscriberQos qos;
+  participant->get_default_subscriber_qos(qos);
+  if (policies_to_qos(pyqos, qos)) {
+    return nullptr;
+  }
+
+  // Create Subscriber
+  DDS::Subscriber* subscriber;
+  {
+    GilRelease release;
+    subscriber = participant->create_subscriber(
+      qos, nullptr, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
+  }
+  if (!subscriber) {
+    PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create Subscriber");
+    return nullptr;
   }
+
+  return new_entity(subscriber);
 }
 
 /**
- * create_publisher(publisher: Publisher, participant: DomainParticipant) -> None
+ * create_publisher(participant: Entity, qos: Optional[dict]) -> Entity
  */
 PyObject* create_publisher(PyObject* self, PyObject* args)
 {
-  Ref pyparticipant;
-  Ref pypublisher;
-  if (!PyArg_ParseTuple(args, "OO", &*pypublisher, &*pyparticipant)) {
+  PyObject* pyparticipant;
+  PyObject* pyqos;
+  if (!PyArg_ParseTuple(args, "OO", &pyparticipant, &pyqos)) {
     return nullptr;
   }
-  pyparticipant++;
-  pypublisher++;
 
-  // Get DomainParticipant_var
-  DDS::DomainParticipant* participant = get_capsule<DDS::DomainParticipant>(*pyparticipant);
+  DDS::DomainParticipant* participant = get_entity<DDS::DomainParticipant>(pyparticipant);
   if (!participant) {
     return nullptr;
   }
 
-  // Create Publisher
-  DDS::Publisher* publisher = participant->create_publisher(
-    PUBLISHER_QOS_DEFAULT, nullptr, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
-  if (!publisher) {
-    PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create Publisher");
+  DDS::PublisherQos qos;
+  participant->get_default_publisher_qos(qos);
+  if (policies_to_qos(pyqos, qos)) {
     return nullptr;
   }
 
-  // Attach OpenDDS Publisher to Publisher Python Object
-  if (set_capsule(*pypublisher, publisher, delete_publisher_var)) {
+  // Create Publisher
+  DDS::Publisher* publisher;
+  {
+    GilRelease release;
+    publisher = participant->create_publisher(
+      qos, nullptr, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
+  }
+  if (!publisher) {
+    PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create Publisher");
     return nullptr;
   }
 
-  Py_RETURN_NONE;
+  return new_entity(publisher);
 }
 
 /**
- * Callback for Python to Call when the DataReader Capsule is Deleted
+ * create_datawriter(publisher: Entity, topic: Entity, qos: Optional[dict]) -> Entity
  */
-void delete_datareader_var(PyObject* reader_capsule)
+PyObject* create_datawriter(PyObject* self, PyObject* args)
 {
-  if (PyCapsule_CheckExact(reader_capsule)) {
-    DDS::DataReader_var reader =
-      static_cast<DDS::DataReader*>(PyCapsule_GetPointer(reader_capsule, nullptr));
-    reader = nullptr;
+  PyObject* pypublisher;
+  PyObject* pytopic;
+  PyObject* pyqos;
+  if (!PyArg_ParseTuple(args, "OOO", &pypublisher, &pytopic, &pyqos)) {
+    return nullptr;
+  }
+
+  DDS::Publisher* publisher = get_entity<DDS::Publisher>(pypublisher);
+  if (!publisher) {
+    return nullptr;
+  }
+
+  DDS::Topic* topic = get_entity<DDS::Topic>(pytopic);
+  if (!topic) {
+    return nullptr;
+  }
+
+  DDS::DataWriterQos qos;
+  publisher->get_default_datawriter_qos(qos);
+  if (policies_to_qos(pyqos, qos)) {
+    return nullptr;
   }
+
+  // Create DataWriter
+  DDS::DataWriter* datawriter;
+  {
+    GilRelease release;
+    datawriter = publisher->create_datawriter(
+      topic, qos, nullptr, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
+  }
+  if (!datawriter) {
+    PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create DataWriter");
+    return nullptr;
+  }
+
+  return new_entity(datawriter, get_entity_object(pytopic)->topic_type);
 }
 
 /**
- * create_datareader(datareader: DataReader, subscriber: Subscriber, topic: Topic) -> None
+ * create_datareader(subscriber: Entity, topic: Entity, qos: Optional[dict]) -> Entity
+ *
+ * topic can be a Topic or ContentFilteredTopic.
  */
 PyObject* create_datareader(PyObject* self, PyObject* args)
 {
-  Ref pydatareader;
-  Ref pysubscriber;
-  Ref pytopic;
-  if (!PyArg_ParseTuple(args, "OOO", &*pydatareader, &*pysubscriber, &*pytopic)) {
+  PyObject* pysubscriber;
+  PyObject* pytopic;
+  PyObject* pyqos;
+  if (!PyArg_ParseTuple(args, "OOO", &pysubscriber, &pytopic, &pyqos)) {
     return nullptr;
   }
-  pydatareader++;
-  pysubscriber++;
-  pytopic++;
 
-  // Get Subscriber
-  DDS::Subscriber* subscriber = get_capsule<DDS::Subscriber>(*pysubscriber);
+  DDS::Subscriber* subscriber = get_entity<DDS::Subscriber>(pysubscriber);
   if (!subscriber) {
     return nullptr;
   }
 
-  // Get Topic
-  DDS::Topic* topic = get_capsule<DDS::Topic>(*pytopic);
+  DDS::TopicDescription* topic = get_topic_description(pytopic);
   if (!topic) {
     return nullptr;
   }
 
+  DDS::DataReaderQos qos;
+  subscriber->get_default_datareader_qos(qos);
+  if (policies_to_qos(pyqos, qos)) {
+    return nullptr;
+  }
+
   // Create DataReader
-  DDS::DataReader* datareader = subscriber->create_datareader(
-    topic, DATAREADER_QOS_DEFAULT, nullptr, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
+  DDS::DataReader* datareader;
+  {
+    GilRelease release;
+    datareader = subscriber->create_datareader(
+      topic, qos, nullptr, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
+  }
   if (!datareader) {
     PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create DataReader");
     return nullptr;
   }
 
-  // Attach OpenDDS DataReader to DataReader Python Object
-  if (set_capsule(*pydatareader, datareader, delete_datareader_var)) {
-    return nullptr;
+  PyObject* const pydatareader =
+    new_entity(datareader, get_entity_object(pytopic)->topic_type);
+  if (pydatareader) {
+    reinterpret_cast<EntityObject*>(pydatareader)->reader_stats = new ReaderStats;
   }
-
-  Py_RETURN_NONE;
+  return pydatareader;
 }
 
 /**
- * datareader_wait_for(
- *     datareader: DataReader, status: StatusKind,
- *     seconds: int, nanoseconds: int) -> None
+ * Wait for one of the statuses in the status mask to become active on an
+ * entity. Returns true if there was an error.
  */
-PyObject* datareader_wait_for(PyObject* self, PyObject* args)
+template <typename Entity>
+bool wait_for(PyObject* args)
 {
-  Ref pydatareader;
+  PyObject* pyentity;
   unsigned status;
   int seconds;
   unsigned nanoseconds;
-  if (!PyArg_ParseTuple(args, "OIiI", &*pydatareader, &status, &seconds, &nanoseconds)) {
-    return nullptr;
+  if (!PyArg_ParseTuple(args, "OIiI", &pyentity, &status, &seconds, &nanoseconds)) {
+    return true;
   }
-  pydatareader++;
 
-  // Get DataReader
-  DDS::DataReader* reader = get_capsule<DDS::DataReader>(*pydatareader);
-  if (!reader) {
-    return nullptr;
+  Entity* entity = get_entity<Entity>(pyentity);
+  if (!entity) {
+    return true;
   }
 
   // Wait
-  DDS::StatusCondition_var condition = reader->get_statuscondition();
-  condition->set_enabled_statuses(status);
   DDS::WaitSet_var waitset = new DDS::WaitSet;
   if (!waitset) {
-    return PyErr_NoMemory();
+    PyErr_NoMemory();
+    return true;
   }
+  // The condition is shared with anything else using it, like a WaitSet the
+  // entity is attached to, so its enabled statuses are put back afterwards.
+  DDS::StatusCondition_var condition = entity->get_statuscondition();
+  const DDS::StatusMask enabled = condition->get_enabled_statuses();
+  condition->set_enabled_statuses(status);
   waitset->attach_condition(condition);
   DDS::ConditionSeq active;
   DDS::Duration_t max_duration = {seconds, nanoseconds};
-  if (Errors::check_rc(waitset->wait(active, max_duration))) {
-    return nullptr;
+  DDS::ReturnCode_t rc;
+  {
+    GilRelease release;
+    rc = waitset->wait(active, max_duration);
   }
+  waitset->detach_condition(condition);
+  condition->set_enabled_statuses(enabled);
+  return Errors::check_rc(rc);
+}
 
+/**
+ * datareader_wait_for(
+ *     datareader: DataReader, status: StatusKind,
+ *     seconds: int, nanoseconds: int) -> None
+ */
+PyObject* datareader_wait_for(PyObject* self, PyObject* args)
+{
+  if (wait_for<DDS::DataReader>(args)) {
+    return nullptr;
+  }
   Py_RETURN_NONE;
 }
 
-/// Documentation for Internal Python Objects
-const char* internal_docstr = "Internal to PyOpenDDS, not for use directly!";
+/**
+ * datawriter_wait_for(
+ *     datawriter: DataWriter, status: StatusKind,
+ *     seconds: int, nanoseconds: int) -> None
+ */
+PyObject* datawriter_wait_for(PyObject* self, PyObject* args)
+{
+  if (wait_for<DDS::DataWriter>(args)) {
+    return nullptr;
+  }
+  Py_RETURN_NONE;
+}
 
-PyMethodDef pyopendds_Methods[] = {
-  {"opendds_version_str", opendds_version_str, METH_NOARGS, internal_docstr},
-  {"opendds_version_tuple", opendds_version_tuple, METH_NOARGS, internal_docstr},
-  {"opendds_version_dict", opendds_version_dict, METH_NOARGS, internal_docstr},
+/**
+ * DataReaderListener that makes a pipe readable when data is available, so
+ * readers can be waited on using select and asyncio. At most one byte is
+ * written to the pipe until the notification is reset, so the pipe can't fill
+ * up no matter how many samples arrive.
+ */
+class DataAvailableNotifier : public OpenDDS::DCPS::LocalObject<DDS::DataReaderListener> {
+public:
+  DataAvailableNotifier()
+    : signaled_(false)
   {
-    "init_opendds_impl",
-    reinterpret_cast<PyCFunction>(init_opendds_impl),
-    METH_VARARGS | METH_KEYWORDS,
-    internal_docstr,
-  },
-  {"create_participant", create_participant, METH_VARARGS, internal_docstr},
-  {"participant_cleanup", participant_cleanup, METH_VARARGS, internal_docstr},
-  {"create_subscriber", create_subscriber, METH_VARARGS, internal_docstr},
-  {"create_publisher", create_publisher, METH_VARARGS, internal_docstr},
-  {"create_topic", create_topic, METH_VARARGS, internal_docstr},
-  {"create_datareader", create_datareader, METH_VARARGS, internal_docstr},
-  {"datareader_wait_for", datareader_wait_for, METH_VARARGS, internal_docstr},
-  {nullptr, nullptr, 0, nullptr},
-};
+  }
 
-PyModuleDef pyopendds_Module = {
-  PyModuleDef_HEAD_INIT,
-  "_pyopendds",
-  "Internal Python Bindings for OpenDDS",
+  ~DataAvailableNotifier() { pipe_.close(); }
+
+  bool open() { return pipe_.open() == 0; }
+
+  ACE_HANDLE handle() const { return pipe_.read_handle(); }
+
+  void reset()
+  {
+    if (signaled_.exchange(false)) {
+      char byte;
+      pipe_.recv(&byte, 1);
+    }
+  }
+
+  void on_data_available(DDS::DataReader_ptr)
+  {
+    if (!signaled_.exchange(true)) {
+      const char byte = 0;
+      pipe_.send(&byte, 1);
+    }
+  }
+
+  void on_requested_deadline_missed(
+    DDS::DataReader_ptr, const DDS::RequestedDeadlineMissedStatus&)
+  {
+  }
+
+  void on_requested_incompatible_qos(
+    DDS::DataReader_ptr, const DDS::RequestedIncompatibleQosStatus&)
+  {
+  }
+
+  void on_sample_rejected(DDS::DataReader_ptr, const DDS::SampleRejectedStatus&) {}
+
+  void on_liveliness_changed(DDS::DataReader_ptr, const DDS::LivelinessChangedStatus&) {}
+
+  void on_subscription_matched(DDS::DataReader_ptr, const DDS::SubscriptionMatchedStatus&) {}
+
+  void on_sample_lost(DDS::DataReader_ptr, const DDS::SampleLostStatus&) {}
+
+private:
+  ACE_Pipe pipe_;
+  std::atomic<bool> signaled_;
+};
+
+/**
+ * Get the DataAvailableNotifier of a reader if it has one.
+ */
+DataAvailableNotifier* get_notifier(DDS::DataReader* reader)
+{
+  DDS::DataReaderListener_var listener = reader->get_listener();
+  return dynamic_cast<DataAvailableNotifier*>(listener.in());
+}
+
+/**
+ * datareader_notify_fileno(datareader: DataReader) -> int
+ *
+ * Get the file descriptor that becomes readable when the reader has data
+ * available, creating it if this is the first time this was called.
+ */
+PyObject* datareader_notify_fileno(PyObject* self, PyObject* args)
+{
+  PyObject* pydatareader;
+  if (!PyArg_ParseTuple(args, "O", &pydatareader)) {
+    return nullptr;
+  }
+
+  DDS::DataReader* reader = get_entity<DDS::DataReader>(pydatareader);
+  if (!reader) {
+    return nullptr;
+  }
+
+  DataAvailableNotifier* notifier = get_notifier(reader);
+  if (!notifier) {
+    DDS::DataReaderListener_var existing = reader->get_listener();
+    if (existing) {
+      PyErr_SetString(Errors::PyOpenDDS_Error(), "Readers with a listener can't use fileno");
+      return nullptr;
+    }
+    DataAvailableNotifier* new_notifier = new DataAvailableNotifier;
+    DDS::DataReaderListener_var listener = new_notifier;
+    if (!new_notifier->open()) {
+      PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create Notification Pipe");
+      return nullptr;
+    }
+    if (Errors::check_rc(reader->set_listener(listener, DDS::DATA_AVAILABLE_STATUS))) {
+      return nullptr;
+    }
+    notifier = new_notifier;
+  }
+
+  // ACE_HANDLE is a pointer on Windows, so this has to be a C-style cast
+  return PyLong_FromSsize_t((Py_ssize_t) notifier->handle());
+}
+
+/**
+ * datareader_reset_notification(datareader: DataReader) -> None
+ *
+ * Make the file descriptor from datareader_notify_fileno unreadable until more
+ * data is available.
+ */
+PyObject* datareader_reset_notification(
+  PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("datareader_reset_notification", nargs, 1)) {
+    return nullptr;
+  }
+
+  DDS::DataReader* reader = get_entity<DDS::DataReader>(args[0]);
+  if (!reader) {
+    return nullptr;
+  }
+
+  DataAvailableNotifier* notifier = get_notifier(reader);
+  if (notifier) {
+    notifier->reset();
+  }
+
+  Py_RETURN_NONE;
+}
+
+/**
+ * Get the Condition a _pyopendds.Entity holds. Returns null and sets a Python
+ * TypeError if it doesn't hold one.
+ */
+DDS::Condition* get_condition(PyObject* obj)
+{
+  EntityObject* const entity = get_entity_object(obj);
+  if (!entity) {
+    return nullptr;
+  }
+  if (entity->interface) {
+    switch (entity->kind) {
+    case EntityKind::readcondition:
+      return static_cast<DDS::ReadCondition*>(entity->interface);
+    case EntityKind::guardcondition:
+      return static_cast<DDS::GuardCondition*>(entity->interface);
+    case EntityKind::statuscondition:
+      return static_cast<DDS::StatusCondition*>(entity->interface);
+    default:
+      break;
+    }
+  }
+  PyErr_SetString(PyExc_TypeError, "Native PyOpenDDS entity is not a Condition");
+  return nullptr;
+}
+
+/**
+ * condition_id(condition: Entity) -> int
+ *
+ * Get a number that identifies the condition in the results of waitset_wait.
+ */
+PyObject* condition_id(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("condition_id", nargs, 1)) {
+    return nullptr;
+  }
+  DDS::Condition* const condition = get_condition(args[0]);
+  return condition ? PyLong_FromVoidPtr(condition) : nullptr;
+}
+
+/**
+ * condition_get_trigger_value(condition: Entity) -> bool
+ */
+PyObject* condition_get_trigger_value(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("condition_get_trigger_value", nargs, 1)) {
+    return nullptr;
+  }
+  DDS::Condition* const condition = get_condition(args[0]);
+  if (!condition) {
+    return nullptr;
+  }
+  return PyBool_FromLong(condition->get_trigger_value());
+}
+
+/**
+ * create_guardcondition() -> Entity
+ */
+PyObject* create_guardcondition(PyObject* self, PyObject*)
+{
+  return new_entity(new DDS::GuardCondition);
+}
+
+/**
+ * guardcondition_set_trigger_value(condition: Entity, value: bool) -> None
+ */
+PyObject* guardcondition_set_trigger_value(
+  PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("guardcondition_set_trigger_value", nargs, 2)) {
+    return nullptr;
+  }
+  DDS::GuardCondition* const condition = get_entity<DDS::GuardCondition>(args[0]);
+  if (!condition) {
+    return nullptr;
+  }
+  const int value = PyObject_IsTrue(args[1]);
+  if (value < 0 || Errors::check_rc(condition->set_trigger_value(value))) {
+    return nullptr;
+  }
+  Py_RETURN_NONE;
+}
+
+/**
+ * datareader_create_readcondition(datareader: DataReader, sample_states: int,
+ *     view_states: int, instance_states: int) -> Entity
+ */
+PyObject* datareader_create_readcondition(PyObject* self, PyObject* args)
+{
+  PyObject* pydatareader;
+  unsigned sample_states;
+  unsigned view_states;
+  unsigned instance_states;
+  if (!PyArg_ParseTuple(
+      args, "OIII", &pydatareader, &sample_states, &view_states, &instance_states)) {
+    return nullptr;
+  }
+
+  DDS::DataReader* reader = get_entity<DDS::DataReader>(pydatareader);
+  if (!reader) {
+    return nullptr;
+  }
+
+  DDS::ReadCondition* const condition =
+    reader->create_readcondition(sample_states, view_states, instance_states);
+  if (!condition) {
+    PyErr_SetString(Errors::PyOpenDDS_Error(), "Failed to Create ReadCondition");
+    return nullptr;
+  }
+  return new_entity(condition);
+}
+
+/**
+ * datareader_delete_readcondition(datareader: DataReader, condition: Entity) -> None
+ */
+PyObject* datareader_delete_readcondition(
+  PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("datareader_delete_readcondition", nargs, 2)) {
+    return nullptr;
+  }
+  DDS::DataReader* const reader = get_entity<DDS::DataReader>(args[0]);
+  if (!reader) {
+    return nullptr;
+  }
+  DDS::ReadCondition* const condition = get_entity<DDS::ReadCondition>(args[1]);
+  if (!condition) {
+    return nullptr;
+  }
+  if (Errors::check_rc(reader->delete_readcondition(condition))) {
+    return nullptr;
+  }
+  Py_RETURN_NONE;
+}
+
+/**
+ * datareader_get_statuscondition(datareader: DataReader) -> Entity
+ */
+PyObject* datareader_get_statuscondition(
+  PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("datareader_get_statuscondition", nargs, 1)) {
+    return nullptr;
+  }
+  DDS::DataReader* const reader = get_entity<DDS::DataReader>(args[0]);
+  if (!reader) {
+    return nullptr;
+  }
+  return new_entity(reader->get_statuscondition());
+}
+
+/**
+ * statuscondition_set_enabled_statuses(condition: Entity, mask: StatusKind) -> None
+ */
+PyObject* statuscondition_set_enabled_statuses(PyObject* self, PyObject* args)
+{
+  PyObject* pycondition;
+  unsigned mask;
+  if (!PyArg_ParseTuple(args, "OI", &pycondition, &mask)) {
+    return nullptr;
+  }
+
+  DDS::StatusCondition* const condition = get_entity<DDS::StatusCondition>(pycondition);
+  if (!condition || Errors::check_rc(condition->set_enabled_statuses(mask))) {
+    return nullptr;
+  }
+  Py_RETURN_NONE;
+}
+
+/**
+ * statuscondition_get_enabled_statuses(condition: Entity) -> int
+ */
+PyObject* statuscondition_get_enabled_statuses(
+  PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("statuscondition_get_enabled_statuses", nargs, 1)) {
+    return nullptr;
+  }
+  DDS::StatusCondition* const condition = get_entity<DDS::StatusCondition>(args[0]);
+  if (!condition) {
+    return nullptr;
+  }
+  return PyLong_FromUnsignedLong(condition->get_enabled_statuses());
+}
+
+/**
+ * create_waitset() -> Entity
+ */
+PyObject* create_waitset(PyObject* self, PyObject*)
+{
+  return new_entity(new DDS::WaitSet);
+}
+
+/**
+ * waitset_attach(waitset: Entity, condition: Entity) -> None
+ */
+PyObject* waitset_attach(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("waitset_attach", nargs, 2)) {
+    return nullptr;
+  }
+  DDS::WaitSet* const waitset = get_entity<DDS::WaitSet>(args[0]);
+  if (!waitset) {
+    return nullptr;
+  }
+  DDS::Condition* const condition = get_condition(args[1]);
+  if (!condition || Errors::check_rc(waitset->attach_condition(condition))) {
+    return nullptr;
+  }
+  Py_RETURN_NONE;
+}
+
+/**
+ * waitset_detach(waitset: Entity, condition: Entity) -> None
+ */
+PyObject* waitset_detach(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("waitset_detach", nargs, 2)) {
+    return nullptr;
+  }
+  DDS::WaitSet* const waitset = get_entity<DDS::WaitSet>(args[0]);
+  if (!waitset) {
+    return nullptr;
+  }
+  DDS::Condition* const condition = get_condition(args[1]);
+  if (!condition || Errors::check_rc(waitset->detach_condition(condition))) {
+    return nullptr;
+  }
+  Py_RETURN_NONE;
+}
+
+/**
+ * waitset_wait(waitset: Entity, seconds: int, nanoseconds: int) -> Tuple[int, ...]
+ *
+ * Wait without the GIL for attached conditions to trigger and return the
+ * condition_id of each one that did. The tuple is empty if the wait timed out.
+ */
+PyObject* waitset_wait(PyObject* self, PyObject* args)
+{
+  PyObject* pywaitset;
+  int seconds;
+  unsigned nanoseconds;
+  if (!PyArg_ParseTuple(args, "OiI", &pywaitset, &seconds, &nanoseconds)) {
+    return nullptr;
+  }
+
+  DDS::WaitSet* const waitset = get_entity<DDS::WaitSet>(pywaitset);
+  if (!waitset) {
+    return nullptr;
+  }
+
+  DDS::ConditionSeq active;
+  const DDS::Duration_t max_wait = {seconds, nanoseconds};
+  DDS::ReturnCode_t rc;
+  {
+    GilRelease release;
+    rc = waitset->wait(active, max_wait);
+  }
+  if (rc == DDS::RETCODE_TIMEOUT) {
+    return PyTuple_New(0);
+  }
+  if (Errors::check_rc(rc)) {
+    return nullptr;
+  }
+
+  Ref ids = PyTuple_New(active.length());
+  if (!ids) {
+    return nullptr;
+  }
+  for (CORBA::ULong i = 0; i < active.length(); ++i) {
+    PyObject* const id = PyLong_FromVoidPtr(active[i].in());
+    if (!id) {
+      return nullptr;
+    }
+    PyTuple_SET_ITEM(*ids, i, id);
+  }
+  ids++;
+  return *ids;
+}
+
+/// What ListenerDispatcher does with an event when its queue is full
+enum class OverflowPolicy { block, drop_oldest, count_and_drop };
+
+/**
+ * A status of a reader changing, to pass to the Python listener of the reader.
+ * values has the fields of the status, if there is one.
+ */
+struct ListenerEvent {
+  DDS::DataReaderListener_var listener;
+  DDS::StatusKind kind;
+  std::array<long long, 5> values;
+  size_t value_count;
+};
+
+/// Called when an event is dropped instead of dispatched
+void event_dropped(const ListenerEvent& event);
+
+/// Call the Python listener for the event, taking the GIL to do it
+void dispatch_event(const ListenerEvent& event);
+
+/**
+ * Pool of threads that call Python listeners with the events that OpenDDS
+ * threads push to a bounded queue. Only the threads calling Python take the
+ * GIL, so OpenDDS threads never wait for it.
+ */
+class ListenerDispatcher {
+public:
+  typedef std::shared_ptr<ListenerDispatcher> Ptr;
+
+  ListenerDispatcher(size_t capacity, OverflowPolicy policy)
+    : capacity_(capacity)
+    , policy_(policy)
+    , stopped_(false)
+    , dispatched_(0)
+    , dropped_(0)
+  {
+  }
+
+  ~ListenerDispatcher()
+  {
+    if (releasing_ == this) {
+      // A worker released the last reference to this with an event
+      destroyed_ = true;
+    }
+    stop();
+  }
+
+  void start(size_t threads)
+  {
+    for (size_t i = 0; i < threads; ++i) {
+      workers_.emplace_back(&ListenerDispatcher::run, this);
+    }
+  }
+
+  /**
+   * Queue an event, applying the overflow policy if the queue is full. Events
+   * pushed after the dispatcher was stopped are dropped.
+   */
+  void push(ListenerEvent&& event)
+  {
+    ListenerEvent dropped;
+    {
+      std::unique_lock<std::mutex> lock(mutex_);
+      if (policy_ == OverflowPolicy::block) {
+        not_full_.wait(lock, [this] { return stopped_ || queue_.size() < capacity_; });
+      }
+      if (stopped_ || (queue_.size() >= capacity_ && policy_ == OverflowPolicy::count_and_drop)) {
+        ++dropped_;
+        dropped = std::move(event);
+      } else {
+        if (queue_.size() >= capacity_) {
+          ++dropped_;
+          dropped = std::move(queue_.front());
+          queue_.pop_front();
+        }
+        queue_.push_back(std::move(event));
+        not_empty_.notify_one();
+      }
+    }
+    if (dropped.listener) {
+      event_dropped(dropped);
+    }
+  }
+
+  /**
+   * Queue a Python object to be released with the GIL by one of the threads,
+   * so OpenDDS threads never take the GIL. Objects queued after the
+   * dispatcher was stopped are leaked instead, because that can be during the
+   * shutdown of the interpreter, when taking the GIL isn't safe.
+   */
+  void release(PyObject* object)
+  {
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      if (stopped_) {
+        return;
+      }
+      releases_.push_back(object);
+    }
+    not_empty_.notify_one();
+  }
+
+  /**
+   * Stop the threads once they finish the event they're on and drop the rest
+   * of the events. Objects still waiting to be released are leaked. Must be
+   * called without the GIL.
+   */
+  void stop()
+  {
+    std::deque<ListenerEvent> dropped;
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      stopped_ = true;
+      dropped_ += queue_.size();
+      dropped.swap(queue_);
+    }
+    not_empty_.notify_all();
+    not_full_.notify_all();
+    for (std::thread& worker : workers_) {
+      if (worker.get_id() == std::this_thread::get_id()) {
+        worker.detach();
+      } else if (worker.joinable()) {
+        worker.join();
+      }
+    }
+    for (const ListenerEvent& event : dropped) {
+      event_dropped(event);
+    }
+  }
+
+  PyObject* stats()
+  {
+    size_t queued;
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      queued = queue_.size();
+    }
+    return Py_BuildValue("{sKsKsn}",
+      "dispatched", dispatched_.load(std::memory_order_relaxed),
+      "dropped", dropped_.load(std::memory_order_relaxed),
+      "queued", static_cast<Py_ssize_t>(queued));
+  }
+
+private:
+  void run()
+  {
+    for (;;) {
+      ListenerEvent event;
+      std::vector<PyObject*> releases;
+      {
+        std::unique_lock<std::mutex> lock(mutex_);
+        not_empty_.wait(lock, [this] {
+          return stopped_ || !queue_.empty() || !releases_.empty();
+        });
+        if (stopped_) {
+          return;
+        }
+        releases.swap(releases_);
+        if (!queue_.empty()) {
+          event = std::move(queue_.front());
+          queue_.pop_front();
+        }
+      }
+      if (!releases.empty()) {
+        const PyGILState_STATE gil = PyGILState_Ensure();
+        for (PyObject* object : releases) {
+          Py_DECREF(object);
+        }
+        PyGILState_Release(gil);
+      }
+      if (!event.listener) {
+        continue;
+      }
+      not_full_.notify_one();
+      dispatch_event(event);
+      dispatched_.fetch_add(1, std::memory_order_relaxed);
+
+      // Releasing the listener can release the last reference to this, which
+      // is then destroyed on this thread and detaches it. Nothing of this can
+      // be used after that.
+      releasing_ = this;
+      event = ListenerEvent();
+      releasing_ = nullptr;
+      if (destroyed_) {
+        destroyed_ = false;
+        return;
+      }
+    }
+  }
+
+  /// The dispatcher a worker on this thread is releasing an event of
+  static thread_local ListenerDispatcher* releasing_;
+
+  /// Set if that destroyed the dispatcher
+  static thread_local bool destroyed_;
+
+  const size_t capacity_;
+  const OverflowPolicy policy_;
+  std::mutex mutex_;
+  std::condition_variable not_empty_;
+  std::condition_variable not_full_;
+  std::deque<ListenerEvent> queue_;
+  std::vector<PyObject*> releases_;
+  bool stopped_;
+  std::vector<std::thread> workers_;
+  std::atomic<unsigned long long> dispatched_;
+  std::atomic<unsigned long long> dropped_;
+};
+
+thread_local ListenerDispatcher* ListenerDispatcher::releasing_ = nullptr;
+thread_local bool ListenerDispatcher::destroyed_ = false;
+
+/**
+ * DataReaderListener that passes the statuses of the reader to a Python
+ * callback through a ListenerDispatcher. The callback is called with the
+ * StatusKind and a tuple of the fields of the status. Data available events
+ * are batched: there is at most one queued for the reader, and the callback
+ * takes all the samples that arrived up to when it's called.
+ */
+class PythonListener : public OpenDDS::DCPS::LocalObject<DDS::DataReaderListener> {
+public:
+  PythonListener(const ListenerDispatcher::Ptr& dispatcher, PyObject* callback)
+    : dispatcher_(dispatcher)
+    , callback_(callback)
+    , data_pending_(false)
+  {
+    Py_INCREF(callback_);
+  }
+
+  ~PythonListener()
+  {
+    // This can be released by an OpenDDS thread, which can't take the GIL
+    dispatcher_->release(callback_);
+  }
+
+  void on_data_available(DDS::DataReader_ptr)
+  {
+    if (!data_pending_.exchange(true)) {
+      push(DDS::DATA_AVAILABLE_STATUS, {});
+    }
+  }
+
+  void on_requested_deadline_missed(
+    DDS::DataReader_ptr, const DDS::RequestedDeadlineMissedStatus& status)
+  {
+    push(DDS::REQUESTED_DEADLINE_MISSED_STATUS,
+      {status.total_count, status.total_count_change, status.last_instance_handle});
+  }
+
+  void on_requested_incompatible_qos(
+    DDS::DataReader_ptr, const DDS::RequestedIncompatibleQosStatus& status)
+  {
+    push(DDS::REQUESTED_INCOMPATIBLE_QOS_STATUS,
+      {status.total_count, status.total_count_change, status.last_policy_id});
+  }
+
+  void on_sample_rejected(DDS::DataReader_ptr, const DDS::SampleRejectedStatus& status)
+  {
+    push(DDS::SAMPLE_REJECTED_STATUS, {status.total_count, status.total_count_change,
+      status.last_reason, status.last_instance_handle});
+  }
+
+  void on_liveliness_changed(DDS::DataReader_ptr, const DDS::LivelinessChangedStatus& status)
+  {
+    push(DDS::LIVELINESS_CHANGED_STATUS, {status.alive_count, status.not_alive_count,
+      status.alive_count_change, status.not_alive_count_change,
+      status.last_publication_handle});
+  }
+
+  void on_subscription_matched(DDS::DataReader_ptr, const DDS::SubscriptionMatchedStatus& status)
+  {
+    push(DDS::SUBSCRIPTION_MATCHED_STATUS, {status.total_count, status.total_count_change,
+      status.current_count, status.current_count_change, status.last_publication_handle});
+  }
+
+  void on_sample_lost(DDS::DataReader_ptr, const DDS::SampleLostStatus& status)
+  {
+    push(DDS::SAMPLE_LOST_STATUS, {status.total_count, status.total_count_change});
+  }
+
+  void dispatch(const ListenerEvent& event)
+  {
+    if (event.kind == DDS::DATA_AVAILABLE_STATUS) {
+      // Samples arriving from now on need another event
+      data_pending_ = false;
+    }
+
+    const PyGILState_STATE gil = PyGILState_Ensure();
+    {
+      Ref values = PyTuple_New(event.value_count);
+      for (size_t i = 0; values && i < event.value_count; ++i) {
+        PyObject* const value = PyLong_FromLongLong(event.values[i]);
+        if (!value) {
+          values = nullptr;
+          break;
+        }
+        PyTuple_SET_ITEM(*values, i, value);
+      }
+      Ref result;
+      if (values) {
+        result = PyObject_CallFunction(callback_, "kO", event.kind, *values);
+      }
+      if (!result) {
+        PyErr_WriteUnraisable(callback_);
+      }
+    }
+    PyGILState_Release(gil);
+  }
+
+  void dropped(const ListenerEvent& event)
+  {
+    if (event.kind == DDS::DATA_AVAILABLE_STATUS) {
+      data_pending_ = false;
+    }
+  }
+
+private:
+  void push(DDS::StatusKind kind, std::initializer_list<long long> values)
+  {
+    ListenerEvent event;
+    event.listener = DDS::DataReaderListener::_duplicate(this);
+    event.kind = kind;
+    event.value_count = values.size();
+    std::copy(values.begin(), values.end(), event.values.begin());
+    dispatcher_->push(std::move(event));
+  }
+
+  ListenerDispatcher::Ptr dispatcher_;
+  PyObject* const callback_;
+  std::atomic<bool> data_pending_;
+};
+
+void event_dropped(const ListenerEvent& event)
+{
+  static_cast<PythonListener*>(event.listener.in())->dropped(event);
+}
+
+void dispatch_event(const ListenerEvent& event)
+{
+  static_cast<PythonListener*>(event.listener.in())->dispatch(event);
+}
+
+const char* dispatcher_capsule_name = "pyopendds.ListenerDispatcher";
+
+void delete_dispatcher(PyObject* capsule)
+{
+  ListenerDispatcher::Ptr* const dispatcher = static_cast<ListenerDispatcher::Ptr*>(
+    PyCapsule_GetPointer(capsule, dispatcher_capsule_name));
+  if (dispatcher) {
+    // The threads might be waiting for the GIL
+    GilRelease release;
+    delete dispatcher;
+  }
+}
+
+ListenerDispatcher::Ptr* get_dispatcher(PyObject* capsule)
+{
+  return static_cast<ListenerDispatcher::Ptr*>(
+    PyCapsule_GetPointer(capsule, dispatcher_capsule_name));
+}
+
+/**
+ * create_dispatcher(threads: int, capacity: int, overflow: OverflowPolicy) -> capsule
+ */
+PyObject* create_dispatcher(PyObject* self, PyObject* args)
+{
+  unsigned threads;
+  unsigned capacity;
+  unsigned policy;
+  if (!PyArg_ParseTuple(args, "III", &threads, &capacity, &policy)) {
+    return nullptr;
+  }
+  if (!threads || !capacity) {
+    PyErr_SetString(PyExc_ValueError, "Dispatcher threads and capacity must be at least 1");
+    return nullptr;
+  }
+  if (policy > static_cast<unsigned>(OverflowPolicy::count_and_drop)) {
+    PyErr_SetString(PyExc_ValueError, "Invalid overflow policy");
+    return nullptr;
+  }
+
+  ListenerDispatcher::Ptr* const dispatcher = new ListenerDispatcher::Ptr(
+    std::make_shared<ListenerDispatcher>(capacity, static_cast<OverflowPolicy>(policy)));
+  PyObject* const capsule = PyCapsule_New(dispatcher, dispatcher_capsule_name, delete_dispatcher);
+  if (!capsule) {
+    delete dispatcher;
+    return nullptr;
+  }
+  (*dispatcher)->start(threads);
+  return capsule;
+}
+
+/**
+ * dispatcher_stats(dispatcher: capsule) -> dict
+ */
+PyObject* dispatcher_stats(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("dispatcher_stats", nargs, 1)) {
+    return nullptr;
+  }
+  ListenerDispatcher::Ptr* const dispatcher = get_dispatcher(args[0]);
+  return dispatcher ? (*dispatcher)->stats() : nullptr;
+}
+
+/**
+ * dispatcher_stop(dispatcher: capsule) -> None
+ */
+PyObject* dispatcher_stop(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("dispatcher_stop", nargs, 1)) {
+    return nullptr;
+  }
+  ListenerDispatcher::Ptr* const dispatcher = get_dispatcher(args[0]);
+  if (!dispatcher) {
+    return nullptr;
+  }
+  {
+    GilRelease release;
+    (*dispatcher)->stop();
+  }
+  Py_RETURN_NONE;
+}
+
+/**
+ * datareader_set_listener(datareader: DataReader, dispatcher: Optional[capsule],
+ *     callback: Optional[Callable[[StatusKind, tuple], None]], mask: StatusKind) -> None
+ *
+ * Set the listener of a reader to one that calls callback through the
+ * dispatcher for the statuses in mask, or remove it if dispatcher is None.
+ */
+PyObject* datareader_set_listener(PyObject* self, PyObject* args)
+{
+  PyObject* pydatareader;
+  PyObject* pydispatcher;
+  PyObject* callback;
+  unsigned mask;
+  if (!PyArg_ParseTuple(args, "OOOI", &pydatareader, &pydispatcher, &callback, &mask)) {
+    return nullptr;
+  }
+
+  DDS::DataReader* reader = get_entity<DDS::DataReader>(pydatareader);
+  if (!reader) {
+    return nullptr;
+  }
+
+  if (get_notifier(reader)) {
+    PyErr_SetString(Errors::PyOpenDDS_Error(), "Readers using fileno can't have a listener");
+    return nullptr;
+  }
+
+  DDS::DataReaderListener_var listener;
+  if (pydispatcher != Py_None) {
+    ListenerDispatcher::Ptr* const dispatcher = get_dispatcher(pydispatcher);
+    if (!dispatcher) {
+      return nullptr;
+    }
+    if (!PyCallable_Check(callback)) {
+      PyErr_SetString(PyExc_TypeError, "Listener callback must be callable");
+      return nullptr;
+    }
+    listener = new PythonListener(*dispatcher, callback);
+  } else {
+    mask = 0;
+  }
+
+  DDS::ReturnCode_t rc;
+  {
+    GilRelease release;
+    rc = reader->set_listener(listener, mask);
+  }
+  if (Errors::check_rc(rc)) {
+    return nullptr;
+  }
+  Py_RETURN_NONE;
+}
+
+/**
+ * Get the EntityObject of a reader for the stats functions. Returns null and
+ * sets a Python exception if it isn't a reader.
+ */
+EntityObject* get_reader_object(PyObject* pydatareader)
+{
+  if (!get_entity<DDS::DataReader>(pydatareader)) {
+    return nullptr;
+  }
+  return reinterpret_cast<EntityObject*>(pydatareader);
+}
+
+/**
+ * datareader_stats(datareader: DataReader) -> dict
+ *
+ * Get the counters of a reader, along with its backlog, the number of samples
+ * it holds that haven't been taken yet.
+ */
+PyObject* datareader_stats(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("datareader_stats", nargs, 1)) {
+    return nullptr;
+  }
+
+  EntityObject* const reader = get_reader_object(args[0]);
+  if (!reader) {
+    return nullptr;
+  }
+
+  OpenDDS::DCPS::DataReaderImpl* const reader_impl =
+    dynamic_cast<OpenDDS::DCPS::DataReaderImpl*>(static_cast<DDS::DataReader*>(reader->interface));
+  if (!reader_impl) {
+    PyErr_SetString(Errors::PyOpenDDS_Error(), "Could not get reader implementation");
+    return nullptr;
+  }
+  CORBA::Long backlog;
+  {
+    GilRelease release;
+    ACE_Guard<ACE_Recursive_Thread_Mutex> guard(reader_impl->get_sample_lock());
+    backlog = reader_impl->total_samples();
+  }
+
+  return reader->reader_stats->to_dict(backlog);
+}
+
+/**
+ * datareader_reset_stats(datareader: DataReader) -> None
+ */
+PyObject* datareader_reset_stats(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("datareader_reset_stats", nargs, 1)) {
+    return nullptr;
+  }
+
+  EntityObject* const reader = get_reader_object(args[0]);
+  if (!reader) {
+    return nullptr;
+  }
+
+  reader->reader_stats->reset();
+  Py_RETURN_NONE;
+}
+
+/**
+ * datareader_enable_latency_stats(datareader: DataReader) -> None
+ */
+PyObject* datareader_enable_latency_stats(
+  PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("datareader_enable_latency_stats", nargs, 1)) {
+    return nullptr;
+  }
+
+  EntityObject* const reader = get_reader_object(args[0]);
+  if (!reader) {
+    return nullptr;
+  }
+
+  reader->reader_stats->enable_latency();
+  Py_RETURN_NONE;
+}
+
+/**
+ * datareader_latency_stats(datareader: DataReader) -> Optional[dict]
+ *
+ * Get the percentiles of the latency histogram of a reader, or None if it
+ * wasn't enabled.
+ */
+PyObject* datareader_latency_stats(PyObject* self, PyObject* const* args, Py_ssize_t nargs)
+{
+  if (check_nargs("datareader_latency_stats", nargs, 1)) {
+    return nullptr;
+  }
+
+  EntityObject* const reader = get_reader_object(args[0]);
+  if (!reader) {
+    return nullptr;
+  }
+
+  LatencyHistogram* const histogram = reader->reader_stats->latency.load();
+  if (!histogram) {
+    Py_RETURN_NONE;
+  }
+  return histogram->to_dict();
+}
+
+PyStructSequence_Field sample_info_fields[] = {
+  {"source_timestamp", "Nanoseconds since the epoch when the sample was written"},
+  {"take_timestamp", "Nanoseconds since the epoch when the sample was taken or read"},
+  {"instance_handle", nullptr},
+  {"publication_handle", nullptr},
+  {"sample_state", nullptr},
+  {"view_state", nullptr},
+  {"instance_state", nullptr},
+  {nullptr, nullptr},
+};
+
+PyStructSequence_Desc sample_info_desc = {
+  "_pyopendds.SampleInfo",
+  "Part of the DDS SampleInfo of a sample returned by DataReader.take(with_info=True)",
+  sample_info_fields,
+  7,
+};
+
+PyTypeObject sample_info_type;
+
+PyMethodDef pyopendds_Methods[] = {
+  {"opendds_version_str", opendds_version_str, METH_NOARGS, internal_docstr},
+  {"opendds_version_tuple", opendds_version_tuple, METH_NOARGS, internal_docstr},
+  {"opendds_version_dict", opendds_version_dict, METH_NOARGS, internal_docstr},
+  {
+    "init_opendds_impl",
+    reinterpret_cast<PyCFunction>(init_opendds_impl),
+    METH_VARARGS | METH_KEYWORDS,
+    internal_docstr,
+  },
+  {"create_participant", create_participant, METH_VARARGS, internal_docstr},
+  {"participant_cleanup", participant_cleanup, METH_VARARGS, internal_docstr},
+  {"create_subscriber", create_subscriber, METH_VARARGS, internal_docstr},
+  {"create_publisher", create_publisher, METH_VARARGS, internal_docstr},
+  {"create_topic", create_topic, METH_VARARGS, internal_docstr},
+  {"create_contentfilteredtopic", create_contentfilteredtopic, METH_VARARGS, internal_docstr},
+  {
+    "contentfilteredtopic_set_expression_parameters",
+    reinterpret_cast<PyCFunction>(contentfilteredtopic_set_expression_parameters),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {"create_datareader", create_datareader, METH_VARARGS, internal_docstr},
+  {"create_datawriter", create_datawriter, METH_VARARGS, internal_docstr},
+  {"datareader_wait_for", datareader_wait_for, METH_VARARGS, internal_docstr},
+  {"datawriter_wait_for", datawriter_wait_for, METH_VARARGS, internal_docstr},
+  {"datareader_notify_fileno", datareader_notify_fileno, METH_VARARGS, internal_docstr},
+  {"datareader_set_listener", datareader_set_listener, METH_VARARGS, internal_docstr},
+  {"create_dispatcher", create_dispatcher, METH_VARARGS, internal_docstr},
+  {
+    "dispatcher_stats",
+    reinterpret_cast<PyCFunction>(dispatcher_stats),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "dispatcher_stop",
+    reinterpret_cast<PyCFunction>(dispatcher_stop),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "datareader_reset_notification",
+    reinterpret_cast<PyCFunction>(datareader_reset_notification),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "datareader_stats",
+    reinterpret_cast<PyCFunction>(datareader_stats),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "datareader_reset_stats",
+    reinterpret_cast<PyCFunction>(datareader_reset_stats),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "datareader_enable_latency_stats",
+    reinterpret_cast<PyCFunction>(datareader_enable_latency_stats),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "datareader_latency_stats",
+    reinterpret_cast<PyCFunction>(datareader_latency_stats),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {"create_waitset", create_waitset, METH_NOARGS, internal_docstr},
+  {"waitset_wait", waitset_wait, METH_VARARGS, internal_docstr},
+  {"create_guardcondition", create_guardcondition, METH_NOARGS, internal_docstr},
+  {"datareader_create_readcondition", datareader_create_readcondition, METH_VARARGS,
+    internal_docstr},
+  {"statuscondition_set_enabled_statuses", statuscondition_set_enabled_statuses, METH_VARARGS,
+    internal_docstr},
+  {
+    "statuscondition_get_enabled_statuses",
+    reinterpret_cast<PyCFunction>(statuscondition_get_enabled_statuses),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "condition_id",
+    reinterpret_cast<PyCFunction>(condition_id),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "condition_get_trigger_value",
+    reinterpret_cast<PyCFunction>(condition_get_trigger_value),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "guardcondition_set_trigger_value",
+    reinterpret_cast<PyCFunction>(guardcondition_set_trigger_value),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "datareader_delete_readcondition",
+    reinterpret_cast<PyCFunction>(datareader_delete_readcondition),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "datareader_get_statuscondition",
+    reinterpret_cast<PyCFunction>(datareader_get_statuscondition),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "waitset_attach",
+    reinterpret_cast<PyCFunction>(waitset_attach),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {
+    "waitset_detach",
+    reinterpret_cast<PyCFunction>(waitset_detach),
+    METH_FASTCALL,
+    internal_docstr,
+  },
+  {nullptr, nullptr, 0, nullptr},
+};
+
+PyModuleDef pyopendds_Module = {
+  PyModuleDef_HEAD_INIT,
+  "_pyopendds",
+  "Internal Python Bindings for OpenDDS",
   -1, // Global State Module, because OpenDDS uses Singletons
   pyopendds_Methods,
 };
@@ -493,5 +1982,29 @@ PyMODINIT_FUNC PyInit__pyopendds()
     return nullptr;
   }
 
+  // Add Entity Type
+  PyObject* entity_type = PyType_FromSpec(&entity_spec);
+  if (!entity_type) {
+    return nullptr;
+  }
+  EntityObject::type = reinterpret_cast<PyTypeObject*>(entity_type);
+  Py_INCREF(entity_type);
+  if (PyModule_AddObject(native_module, "Entity", entity_type)) {
+    Py_DECREF(entity_type);
+    return nullptr;
+  }
+
+  // Add SampleInfo Type
+  if (PyStructSequence_InitType2(&sample_info_type, &sample_info_desc)) {
+    return nullptr;
+  }
+  PyObject* const sample_info = reinterpret_cast<PyObject*>(&sample_info_type);
+  SampleInfoType::type = &sample_info_type;
+  Py_INCREF(sample_info);
+  if (PyModule_AddObject(native_module, "SampleInfo", sample_info)) {
+    Py_DECREF(sample_info);
+    return nullptr;
+  }
+
   return native_module;
 }
@@ -0,0 +1,194 @@
+'''Listeners for the statuses of readers.
+
+OpenDDS reports statuses on its own threads, which put them in the bounded
+queue of a ListenerDispatcher without taking the GIL. The threads of the
+dispatcher take the events off the queue and call the listener. For data
+available, the dispatcher thread takes the samples from the reader, which only
+holds the GIL to convert them, and passes them to the listener in one batch.
+'''
+
+from __future__ import annotations
+
+import atexit
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from .constants import StatusKind, OverflowPolicy, LENGTH_UNLIMITED
+if TYPE_CHECKING:
+    from .DataReader import DataReader
+
+
+@dataclass
+class RequestedDeadlineMissedStatus:
+    total_count: int
+    total_count_change: int
+    last_instance_handle: int
+
+
+@dataclass
+class RequestedIncompatibleQosStatus:
+    total_count: int
+    total_count_change: int
+    last_policy_id: int
+
+
+@dataclass
+class SampleRejectedStatus:
+    total_count: int
+    total_count_change: int
+    last_reason: int
+    last_instance_handle: int
+
+
+@dataclass
+class LivelinessChangedStatus:
+    alive_count: int
+    not_alive_count: int
+    alive_count_change: int
+    not_alive_count_change: int
+    last_publication_handle: int
+
+
+@dataclass
+class SubscriptionMatchedStatus:
+    total_count: int
+    total_count_change: int
+    current_count: int
+    current_count_change: int
+    last_publication_handle: int
+
+
+@dataclass
+class SampleLostStatus:
+    total_count: int
+    total_count_change: int
+
+
+class ListenerDispatcher:
+    '''Pool of native threads that call listeners, fed by a queue of at most
+    queue_size events. overflow decides what happens to events when the queue
+    is full. The dispatchers are stopped when Python exits.
+    '''
+
+    def __init__(self, threads: int = 1, queue_size: int = 1024,
+            overflow: OverflowPolicy = OverflowPolicy.BLOCK):
+        from _pyopendds import create_dispatcher
+        self._native = create_dispatcher(threads, queue_size, OverflowPolicy(overflow))
+        _dispatchers.add(self)
+
+    def stats(self) -> Dict[str, int]:
+        '''Return the number of events dispatched, dropped because of the
+        overflow policy or stopping, and queued right now.
+        '''
+        from _pyopendds import dispatcher_stats
+        return dispatcher_stats(self._native)
+
+    def stop(self) -> None:
+        '''Wait for the threads to finish the events they're on and stop them.
+        The events left in the queue and any that come after are dropped.
+        '''
+        from _pyopendds import dispatcher_stop
+        dispatcher_stop(self._native)
+
+
+_dispatchers: weakref.WeakSet = weakref.WeakSet()
+_default_dispatcher: Optional[ListenerDispatcher] = None
+
+
+def default_dispatcher() -> ListenerDispatcher:
+    '''Return the dispatcher used by listeners that don't have their own,
+    which has one thread.
+    '''
+    global _default_dispatcher
+    if _default_dispatcher is None:
+        _default_dispatcher = ListenerDispatcher()
+    return _default_dispatcher
+
+
+@atexit.register
+def _stop_dispatchers():
+    for dispatcher in list(_dispatchers):
+        dispatcher.stop()
+
+
+class DataReaderListener:
+    '''Base for reader listeners. Only the statuses of the callbacks that a
+    subclass overrides are listened for.
+
+    Set dispatcher to use a dispatcher other than default_dispatcher() and
+    max_samples to limit how many samples on_data_available gets at a time.
+    '''
+
+    dispatcher: Optional[ListenerDispatcher] = None
+    max_samples: int = LENGTH_UNLIMITED
+
+    def on_data_available(self, reader: DataReader, samples: List[Any]) -> None:
+        pass
+
+    def on_requested_deadline_missed(self,
+            reader: DataReader, status: RequestedDeadlineMissedStatus) -> None:
+        pass
+
+    def on_requested_incompatible_qos(self,
+            reader: DataReader, status: RequestedIncompatibleQosStatus) -> None:
+        pass
+
+    def on_sample_rejected(self, reader: DataReader, status: SampleRejectedStatus) -> None:
+        pass
+
+    def on_liveliness_changed(self, reader: DataReader, status: LivelinessChangedStatus) -> None:
+        pass
+
+    def on_subscription_matched(self,
+            reader: DataReader, status: SubscriptionMatchedStatus) -> None:
+        pass
+
+    def on_sample_lost(self, reader: DataReader, status: SampleLostStatus) -> None:
+        pass
+
+    def status_mask(self) -> StatusKind:
+        '''Return the statuses of the callbacks this overrides.
+        '''
+        mask = StatusKind(0)
+        for kind, (name, status_type) in _callbacks.items():
+            if getattr(type(self), name) is not getattr(DataReaderListener, name):
+                mask |= kind
+        return mask
+
+
+_callbacks: Dict[StatusKind, Tuple[str, Optional[Callable[..., Any]]]] = {
+    StatusKind.DATA_AVAILABLE: ('on_data_available', None),
+    StatusKind.REQUESTED_DEADLINE_MISSED:
+        ('on_requested_deadline_missed', RequestedDeadlineMissedStatus),
+    StatusKind.REQUESTED_INCOMPATIBLE_QOS:
+        ('on_requested_incompatible_qos', RequestedIncompatibleQosStatus),
+    StatusKind.SAMPLE_REJECTED: ('on_sample_rejected', SampleRejectedStatus),
+    StatusKind.LIVELINESS_CHANGED: ('on_liveliness_changed', LivelinessChangedStatus),
+    StatusKind.SUBSCRIPTION_MATCHED: ('on_subscription_matched', SubscriptionMatchedStatus),
+    StatusKind.SAMPLE_LOST: ('on_sample_lost', SampleLostStatus),
+}
+
+
+def dispatch_reader_event(reader_ref: Callable[[], Optional[DataReader]],
+        kind: int, values: Tuple[int, ...]) -> None:
+    '''Called by the dispatcher threads to pass an event to the listener of a
+    reader. The reader is weakly referenced so the native listener doesn't
+    keep it alive.
+    '''
+    reader = reader_ref()
+    if reader is None or reader.listener is None:
+        return
+    listener = reader.listener
+    name, status_type = _callbacks[StatusKind(kind)]
+    if status_type is None:
+        # Take everything, because there won't be another event for the
+        # samples left behind.
+        while True:
+            samples = reader.take(listener.max_samples)
+            if samples:
+                listener.on_data_available(reader, samples)
+            if len(samples) < listener.max_samples or listener.max_samples == LENGTH_UNLIMITED:
+                break
+    else:
+        getattr(listener, name)(reader, status_type(*values))
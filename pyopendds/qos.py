@@ -0,0 +1,274 @@
+'''QoS policies for the entities.
+
+Every entity takes a qos argument that can be the QoS class for that kind of
+entity, like DataReaderQos, a QosProfile, or the name of a profile registered
+with register_profile. Policies left as None keep the OpenDDS defaults. Readers
+and writers also get the policies their topic has that they don't set
+themselves.
+
+The native code turns the QoS into the DDS QoS struct and checks it with
+OpenDDS. Problems are raised as BadParameterReturnCodeError and
+InconsistentPolicyReturnCodeError, like OpenDDS would return for them.
+'''
+
+from dataclasses import dataclass, field, fields, replace
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar, Union
+
+from .constants import HistoryKind, ReliabilityKind, ReturnCode, LENGTH_UNLIMITED
+from .exceptions import ReturnCodeError
+from .util import TimeDurationType, normalize_time_duration
+
+# Duration for policies that never time out
+DURATION_INFINITE = (0x7fffffff, 0x7fffffff)
+
+
+def _bad_parameter(message: str) -> ReturnCodeError:
+    return ReturnCodeError.for_code(ReturnCode.BAD_PARAMETER, message)
+
+
+def _inconsistent_policy(message: str) -> ReturnCodeError:
+    return ReturnCodeError.for_code(ReturnCode.INCONSISTENT_POLICY, message)
+
+
+def _duration(name: str, duration: TimeDurationType) -> Tuple[int, int]:
+    try:
+        seconds, nanoseconds = normalize_time_duration(duration)
+    except TypeError as e:
+        raise _bad_parameter('{} is not a duration: {}'.format(name, e)) from None
+    if seconds < 0 or not 0 <= nanoseconds < 1000000000:
+        if (seconds, nanoseconds) != DURATION_INFINITE:
+            raise _bad_parameter('{} must be a positive duration'.format(name))
+    return seconds, nanoseconds
+
+
+def _limit(name: str, value: int) -> int:
+    if value != LENGTH_UNLIMITED and value < 1:
+        raise _bad_parameter('{} must be positive or LENGTH_UNLIMITED'.format(name))
+    return int(value)
+
+
+@dataclass
+class HistoryQosPolicy:
+    kind: HistoryKind = HistoryKind.KEEP_LAST
+    depth: int = 1
+
+    def _native(self) -> tuple:
+        if self.kind == HistoryKind.KEEP_LAST and self.depth < 1:
+            raise _bad_parameter('History depth must be at least 1 for KEEP_LAST')
+        return (int(HistoryKind(self.kind)), int(self.depth))
+
+
+@dataclass
+class ResourceLimitsQosPolicy:
+    max_samples: int = LENGTH_UNLIMITED
+    max_instances: int = LENGTH_UNLIMITED
+    max_samples_per_instance: int = LENGTH_UNLIMITED
+
+    def _native(self) -> tuple:
+        per_instance = _limit('max_samples_per_instance', self.max_samples_per_instance)
+        max_samples = _limit('max_samples', self.max_samples)
+        if LENGTH_UNLIMITED not in (max_samples, per_instance) and per_instance > max_samples:
+            raise _inconsistent_policy('max_samples is less than max_samples_per_instance')
+        return (max_samples, _limit('max_instances', self.max_instances), per_instance)
+
+
+@dataclass
+class ReliabilityQosPolicy:
+    kind: ReliabilityKind = ReliabilityKind.BEST_EFFORT
+    max_blocking_time: TimeDurationType = timedelta(milliseconds=100)
+
+    def _native(self) -> tuple:
+        return (int(ReliabilityKind(self.kind)),
+            *_duration('max_blocking_time', self.max_blocking_time))
+
+
+@dataclass
+class LatencyBudgetQosPolicy:
+    duration: TimeDurationType = 0
+
+    def _native(self) -> tuple:
+        return _duration('Latency budget duration', self.duration)
+
+
+@dataclass
+class TransportPriorityQosPolicy:
+    value: int = 0
+
+    def _native(self) -> tuple:
+        return (int(self.value),)
+
+
+@dataclass
+class TimeBasedFilterQosPolicy:
+    minimum_separation: TimeDurationType = 0
+
+    def _native(self) -> tuple:
+        return _duration('minimum_separation', self.minimum_separation)
+
+
+@dataclass
+class PartitionQosPolicy:
+    name: List[str] = field(default_factory=list)
+
+    def _native(self) -> tuple:
+        if isinstance(self.name, str):
+            raise _bad_parameter('Partition name must be a list of strings')
+        return tuple(self.name)
+
+
+@dataclass
+class UserDataQosPolicy:
+    value: bytes = b''
+
+    def _native(self) -> tuple:
+        return (bytes(self.value),)
+
+
+@dataclass
+class EntityQos:
+    '''Base of the QoS classes for each kind of entity.
+    '''
+
+    def _native(self) -> Dict[str, tuple]:
+        '''Return the policies that were set, converted to what the native
+        code expects.
+        '''
+        policies = {}
+        for policy_field in fields(self):
+            policy = getattr(self, policy_field.name)
+            if policy is not None:
+                policies[policy_field.name] = policy._native()
+        history = getattr(self, 'history', None)
+        resource_limits = getattr(self, 'resource_limits', None)
+        if history is not None and resource_limits is not None and \
+                resource_limits.max_samples_per_instance != LENGTH_UNLIMITED and \
+                history.depth > resource_limits.max_samples_per_instance:
+            raise _inconsistent_policy('History depth is more than max_samples_per_instance')
+        return policies
+
+    def with_topic_qos(self, topic_qos: Optional['TopicQos']) -> Any:
+        '''Return a copy with the policies of topic_qos that this has, but
+        didn't set.
+        '''
+        if topic_qos is None:
+            return self
+        names = {policy_field.name for policy_field in fields(self)}
+        return replace(self, **{
+            policy_field.name: getattr(topic_qos, policy_field.name)
+            for policy_field in fields(topic_qos)
+            if policy_field.name in names and getattr(self, policy_field.name) is None
+        })
+
+
+@dataclass
+class DomainParticipantQos(EntityQos):
+    user_data: Optional[UserDataQosPolicy] = None
+
+
+@dataclass
+class TopicQos(EntityQos):
+    history: Optional[HistoryQosPolicy] = None
+    resource_limits: Optional[ResourceLimitsQosPolicy] = None
+    reliability: Optional[ReliabilityQosPolicy] = None
+    latency_budget: Optional[LatencyBudgetQosPolicy] = None
+    transport_priority: Optional[TransportPriorityQosPolicy] = None
+
+
+@dataclass
+class SubscriberQos(EntityQos):
+    partition: Optional[PartitionQosPolicy] = None
+
+
+@dataclass
+class PublisherQos(EntityQos):
+    partition: Optional[PartitionQosPolicy] = None
+
+
+@dataclass
+class DataReaderQos(EntityQos):
+    history: Optional[HistoryQosPolicy] = None
+    resource_limits: Optional[ResourceLimitsQosPolicy] = None
+    reliability: Optional[ReliabilityQosPolicy] = None
+    latency_budget: Optional[LatencyBudgetQosPolicy] = None
+    time_based_filter: Optional[TimeBasedFilterQosPolicy] = None
+
+
+@dataclass
+class DataWriterQos(EntityQos):
+    history: Optional[HistoryQosPolicy] = None
+    resource_limits: Optional[ResourceLimitsQosPolicy] = None
+    reliability: Optional[ReliabilityQosPolicy] = None
+    latency_budget: Optional[LatencyBudgetQosPolicy] = None
+    transport_priority: Optional[TransportPriorityQosPolicy] = None
+
+
+@dataclass
+class QosProfile:
+    '''QoS for each kind of entity that can be passed as a group to all of
+    them, by itself or by the name it was registered with.
+    '''
+
+    participant: Optional[DomainParticipantQos] = None
+    topic: Optional[TopicQos] = None
+    subscriber: Optional[SubscriberQos] = None
+    publisher: Optional[PublisherQos] = None
+    datareader: Optional[DataReaderQos] = None
+    datawriter: Optional[DataWriterQos] = None
+
+
+_profiles: Dict[str, QosProfile] = {}
+
+
+def register_profile(name: str, profile: QosProfile) -> None:
+    '''Make a profile available to pass to entities by name, replacing any
+    profile that already had the name.
+    '''
+    _profiles[name] = profile
+
+
+def get_profile(name: str) -> QosProfile:
+    try:
+        return _profiles[name]
+    except KeyError:
+        raise _bad_parameter('There is no QoS profile named ' + repr(name)) from None
+
+
+QosT = TypeVar('QosT', bound=EntityQos)
+QosArg = Union[EntityQos, QosProfile, str, None]
+
+
+def resolve_qos(qos: QosArg, qos_type: Type[QosT], profile_field: str) -> Optional[QosT]:
+    '''Get the QoS of qos_type from a qos argument of an entity.
+    '''
+    if isinstance(qos, str):
+        qos = get_profile(qos)
+    if isinstance(qos, QosProfile):
+        qos = getattr(qos, profile_field)
+    if qos is not None and not isinstance(qos, qos_type):
+        raise _bad_parameter('Expected {} or a QosProfile, got {}'.format(
+            qos_type.__name__, type(qos).__name__))
+    return qos
+
+
+def native_qos(qos: Optional[EntityQos]) -> Optional[Dict[str, tuple]]:
+    return None if qos is None else qos._native()
+
+
+def _keep_history(kind: ReliabilityKind, history: HistoryQosPolicy) -> QosProfile:
+    reliability = ReliabilityQosPolicy(kind)
+    return QosProfile(
+        topic=TopicQos(history=history, reliability=reliability),
+        datareader=DataReaderQos(history=history, reliability=reliability),
+        datawriter=DataWriterQos(history=history, reliability=reliability),
+    )
+
+
+# Only the latest sample of each instance matters and losing some is fine,
+# like for high rate sensor data.
+register_profile('best_effort',
+    _keep_history(ReliabilityKind.BEST_EFFORT, HistoryQosPolicy(HistoryKind.KEEP_LAST, 1)))
+
+# Every sample has to be delivered and kept until it's taken.
+register_profile('reliable',
+    _keep_history(ReliabilityKind.RELIABLE, HistoryQosPolicy(HistoryKind.KEEP_ALL)))
@@ -1,4 +1,4 @@
-from typing import Union, Tuple
+from typing import Any, Dict, Iterable, Union, Tuple
 from datetime import timedelta
 
 DDS_Duration_t = Tuple[int, int]
@@ -19,3 +19,20 @@ def normalize_time_duration(duration: TimeDurationType):
         raise TypeError('Could not extract time from ' + repr(duration))
 
     return (seconds, nanoseconds)
+
+
+def sum_stats(all_stats: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    '''Add up the counters of the dicts returned by DataReader.stats(). The
+    string caches are shared by the readers of a type, so they're merged
+    instead of added.
+    '''
+    total: Dict[str, Any] = dict(
+        samples=0, batches=0, bytes=0, wait_ns=0, take_ns=0, convert_ns=0, backlog=0,
+        string_caches={})
+    for stats in all_stats:
+        for name, value in stats.items():
+            if name == 'string_caches':
+                total[name].update(value)
+            else:
+                total[name] += value
+    return total
@@ -53,4 +53,7 @@ setup(
         'jinja2',
         'cmake-build-extension',
     ],
+    extras_require={
+        'numpy': ['numpy'],
+    },
 )
@@ -0,0 +1,85 @@
+'''Checks that readers waiting for data in different threads wait at the same
+time and don't stop other Python threads from running.
+
+There is no publisher for this test, so every wait times out.
+'''
+
+import sys
+import time
+import threading
+from datetime import timedelta
+
+from pyopendds import (
+    init_opendds,
+    DomainParticipant,
+    StatusKind,
+    PyOpenDDS_Error,
+    ReturnCodeError,
+)
+from pyopendds.constants import ReturnCode
+from pybasic.basic import Reading
+
+thread_count = 4
+wait = timedelta(seconds=2)
+
+
+def wait_for_match(reader, errors):
+    try:
+        reader.wait_for(StatusKind.SUBSCRIPTION_MATCHED, wait)
+        errors.append('wait_for returned without a publisher')
+    except ReturnCodeError as e:
+        if e.return_code != ReturnCode.TIMEOUT:
+            errors.append('wait_for raised ' + repr(e))
+
+
+def wait_for_samples(reader, errors):
+    samples = reader.take(timeout=wait)
+    if samples:
+        errors.append('take returned samples without a publisher: ' + repr(samples))
+
+
+if __name__ == '__main__':
+    try:
+        init_opendds()
+        domain = DomainParticipant(36)
+        topic = domain.create_topic('Readings', Reading)
+        subscriber = domain.create_subscriber()
+
+        errors: list = []
+        threads = []
+        for i in range(thread_count):
+            reader = subscriber.create_datareader(topic)
+            target = wait_for_match if i % 2 else wait_for_samples
+            threads.append(threading.Thread(target=target, args=(reader, errors)))
+
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+
+        # The main thread should keep running while the others wait
+        longest_gap = 0.0
+        last = time.monotonic()
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(0.01)
+            now = time.monotonic()
+            longest_gap = max(longest_gap, now - last)
+            last = now
+        elapsed = time.monotonic() - start
+
+        for thread in threads:
+            thread.join()
+
+        wait_seconds = wait.total_seconds()
+        print(f'{thread_count} waits of {wait_seconds} s took {elapsed:.2f} s, '
+            f'main thread was blocked for at most {longest_gap:.2f} s')
+        if elapsed > wait_seconds * 1.5:
+            errors.append('Waits did not run concurrently')
+        if longest_gap > wait_seconds / 2:
+            errors.append('Main thread was blocked while other threads waited')
+        if errors:
+            sys.exit('\n'.join(errors))
+
+        print('Done!')
+
+    except PyOpenDDS_Error as e:
+        sys.exit(e)
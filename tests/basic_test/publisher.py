@@ -0,0 +1,45 @@
+import sys
+import time
+from datetime import timedelta
+
+from pyopendds import (
+    init_opendds,
+    DomainParticipant,
+    StatusKind,
+    PyOpenDDS_Error,
+)
+from pybasic.basic import Reading, ReadingKind
+
+if __name__ == "__main__":
+    try:
+        # Initialize OpenDDS and Create DDS Entities
+        init_opendds(opendds_debug_level=1)
+        domain = DomainParticipant(34)
+        topic = domain.create_topic('Readings', Reading)
+        publisher = domain.create_publisher()
+        writer = publisher.create_datawriter(topic)
+
+        # Wait for Subscriber to Connect
+        print('Waiting for Subscriber...')
+        writer.wait_for(StatusKind.PUBLICATION_MATCHED, timedelta(seconds=5))
+        print('Found Subscriber!')
+
+        time.sleep(1)
+
+        # Values that aren't members of the IDL enum can't be written
+        for kind in (999, ReadingKind.speed | ReadingKind.acceleration):
+            try:
+                writer.write(Reading(kind=kind, value=-200, where='Somewhere'))
+                sys.exit('Writing a ReadingKind of {!r} should have failed'.format(kind))
+            except ValueError:
+                pass
+
+        # Write Sample
+        writer.write(Reading(kind=ReadingKind.speed, value=-200, where='Somewhere'))
+
+        time.sleep(1)
+
+        print('Done!')
+
+    except PyOpenDDS_Error as e:
+        sys.exit(e)
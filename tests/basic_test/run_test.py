@@ -28,20 +28,33 @@ def run_test(args):
 
         # Generate and Install Python Package
         pack_dir = 'basic_output'
-        run_command('itl2py', '-o', pack_dir, 'basic_idl',
+        run_command('itl2py', '-o', pack_dir, '--lazy-samples', 'basic_idl',
             find_itl_file(build_dir, 'basic.itl'),
             cwd=build_dir, exit_on_error=True)
         run_python('-m', 'pip', '--verbose', 'install', '.',
             cwd=(build_dir / pack_dir), exit_on_error=True)
 
-    # Run the test
-    pub = run_command(build_dir / 'publisher', '-DCPSConfigFile', 'rtps.ini',
-        return_popen=True, cwd=this_dir,
-        add_library_paths=[build_dir])
-    sub = run_python(this_dir / 'subscriber.py', cwd=this_dir, return_popen=True,
+    # Run the test with each way the subscriber can get the sample from the
+    # C++ publisher, then taking the sample from the Python publisher.
+    cpp_pub = [build_dir / 'publisher', '-DCPSConfigFile', 'rtps.ini']
+    py_pub = [sys.executable, this_dir / 'publisher.py']
+    runs = ((cpp_pub, []), (cpp_pub, ['--asyncio']), (cpp_pub, ['--listener']),
+        (cpp_pub, ['--filter']), (cpp_pub, ['--waitset']), (cpp_pub, ['--waitset-reader']),
+        (cpp_pub, ['--last-value']), (cpp_pub, ['--serialized']),
+        (cpp_pub, ['--lazy']), (cpp_pub, ['--latency']), (py_pub, []))
+    for pub_command, sub_args in runs:
+        pub = run_command(*pub_command,
+            return_popen=True, cwd=this_dir,
+            add_library_paths=[build_dir])
+        sub = run_python(this_dir / 'subscriber.py', *sub_args, cwd=this_dir, return_popen=True,
+            add_library_paths=[build_dir])
+        wait_or_kill(pub, timeout)
+        wait_or_kill(sub, timeout)
+
+    # Run the concurrency test
+    conc = run_python(this_dir / 'concurrency_test.py', cwd=this_dir, return_popen=True,
         add_library_paths=[build_dir])
-    wait_or_kill(pub, timeout)
-    wait_or_kill(sub, timeout)
+    wait_or_kill(conc, timeout)
 
 
 if __name__ == '__main__':
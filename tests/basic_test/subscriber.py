@@ -1,4 +1,8 @@
 import sys
+import asyncio
+import threading
+import time
+from argparse import ArgumentParser
 from datetime import timedelta
 
 from pyopendds import (
@@ -6,19 +10,67 @@ from pyopendds import (
     init_opendds,
     DomainParticipant,
     StatusKind,
+    DataReaderListener,
+    GuardCondition,
+    SampleState,
+    WaitSet,
     PyOpenDDS_Error,
 )
-from pybasic.basic import Reading
+from pybasic.basic import Reading, ReadingView
+
+
+async def take_async(reader):
+    async for sample in reader:
+        return sample
+
+
+class Listener(DataReaderListener):
+
+    def __init__(self):
+        self.samples = []
+        self.received = threading.Event()
+
+    def on_data_available(self, reader, samples):
+        self.samples += samples
+        self.received.set()
+
 
 if __name__ == "__main__":
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('--asyncio', action='store_true',
+        help='Take the sample using asyncio instead of blocking')
+    arg_parser.add_argument('--listener', action='store_true',
+        help='Get the sample from a listener instead of taking it')
+    arg_parser.add_argument('--filter', action='store_true',
+        help='Read from a content filtered topic that the sample passes')
+    arg_parser.add_argument('--waitset', action='store_true',
+        help='Wait for the sample with a WaitSet before taking it')
+    arg_parser.add_argument('--waitset-reader', action='store_true',
+        help='Wait for the sample with the reader itself attached to a WaitSet')
+    arg_parser.add_argument('--last-value', action='store_true',
+        help='Get the sample from the last value cache of the reader')
+    arg_parser.add_argument('--serialized', action='store_true',
+        help='Take the sample serialized and decode it with its view')
+    arg_parser.add_argument('--lazy', action='store_true',
+        help='Take the sample as a proxy that converts fields when they\'re used')
+    arg_parser.add_argument('--latency', action='store_true',
+        help='Take the sample with its info and record its latency')
+    args = arg_parser.parse_args()
+
     print('OpenDDS Version is:', opendds_version_dict())
     try:
         # Initialize OpenDDS and Create DDS Entities
         init_opendds(opendds_debug_level=1)
         domain = DomainParticipant(34)
         topic = domain.create_topic('Readings', Reading)
+        if args.filter:
+            # The parameter is changed so the sample passes the filter
+            topic = domain.create_contentfilteredtopic(
+                'FilteredReadings', topic, 'value < %0', [-1000])
+            topic.set_expression_parameters([0])
         subscriber = domain.create_subscriber()
-        reader = subscriber.create_datareader(topic)
+        listener = Listener() if args.listener else None
+        reader = subscriber.create_datareader(topic, listener=listener)
 
         # Wait for Publisher to Connect
         print('Waiting for Publisher...')
@@ -26,7 +78,84 @@ if __name__ == "__main__":
         print('Found Publisher!')
 
         # Read and Print Sample
-        print(reader.take_next_sample())
+        if listener:
+            if not listener.received.wait(5):
+                sys.exit('Listener didn\'t get the sample')
+            print(listener.samples[0])
+        elif args.waitset:
+            waitset = WaitSet()
+            not_read = reader.create_readcondition(SampleState.NOT_READ)
+            waitset.attach(not_read)
+            waitset.attach(GuardCondition())
+            if waitset.wait(timedelta(seconds=5)) != [not_read]:
+                sys.exit('WaitSet didn\'t get the sample')
+            print(reader.take_next_sample())
+            waitset.detach(not_read)
+            reader.delete_readcondition(not_read)
+        elif args.waitset_reader:
+            # SUBSCRIPTION_MATCHED stays set from wait_for, so the WaitSet
+            # must only wake up when the sample arrives.
+            waitset = WaitSet()
+            waitset.attach(reader)
+            # wait_for must leave the statuses attach enabled alone
+            reader.wait_for(StatusKind.SUBSCRIPTION_MATCHED, timedelta(seconds=5))
+            if reader.get_statuscondition().get_enabled_statuses() != StatusKind.DATA_AVAILABLE:
+                sys.exit('wait_for changed the statuses enabled by attach')
+            if waitset.wait(timedelta(seconds=5)) != [reader]:
+                sys.exit('WaitSet didn\'t get the sample')
+            samples = reader.take()
+            if len(samples) != 1:
+                sys.exit('WaitSet returned the reader before it had the sample')
+            print(samples[0])
+            waitset.detach(reader)
+        elif args.last_value:
+            reader.enable_last_value_cache()
+            deadline = time.monotonic() + 5
+            changed = {}
+            while not changed and time.monotonic() < deadline:
+                changed = reader.changed_last_values()
+                time.sleep(0.1)
+            if len(changed) != 1:
+                sys.exit('Last value cache didn\'t get the sample')
+            handle, sample = changed.popitem()
+            if reader.lookup_instance(sample) != handle or reader.last_value(handle) is not sample:
+                sys.exit('Last value cache should return the sample for its instance')
+            print(sample)
+        elif args.serialized:
+            serialized = reader.take_serialized(timeout=timedelta(seconds=5))
+            if len(serialized) != 1:
+                sys.exit('take_serialized didn\'t get the sample')
+            view = ReadingView(serialized[0])
+            print(view.where, view.materialize())
+        elif args.lazy:
+            proxies = reader.take_lazy(timeout=timedelta(seconds=5))
+            if len(proxies) != 1:
+                sys.exit('take_lazy didn\'t get the sample')
+            sample = proxies[0].materialize()
+            if proxies[0].where != sample.where or proxies[0].where is not proxies[0].where:
+                sys.exit('Proxy fields should match the sample and be kept')
+            print(sample)
+        elif args.latency:
+            reader.enable_latency_stats()
+            taken = reader.take(timeout=timedelta(seconds=5), with_info=True)
+            if len(taken) != 1:
+                sys.exit('take with_info didn\'t get the sample')
+            sample, info = taken[0]
+            if info.instance_handle != reader.lookup_instance(sample):
+                sys.exit('SampleInfo should have the instance of the sample')
+            latency = reader.latency_stats()
+            print(sample, info, latency)
+            if latency is None or latency['count'] != 1:
+                sys.exit('Latency stats should count the one sample taken')
+        elif args.asyncio:
+            print(asyncio.run(asyncio.wait_for(take_async(reader), 5)))
+        else:
+            print(reader.take_next_sample())
+
+        stats = subscriber.stats()
+        print('Subscriber stats:', stats)
+        if stats['samples'] != 1 or stats['batches'] != 1:
+            sys.exit('Subscriber stats should count the one sample taken')
 
         print('Done!')
 
@@ -0,0 +1,47 @@
+'''Measures the fixed cost of calling into the native code, using calls that
+do as little DDS work as possible: take and read on a reader that has no
+samples and writing to a writer with no readers. Only the public API is used
+so the results can be compared across versions of PyOpenDDS.
+'''
+
+import sys
+import time
+from argparse import ArgumentParser
+
+from pyopendds import init_opendds, DomainParticipant, PyOpenDDS_Error
+from pybench.bench import Sample
+
+
+def ns_per_call(function, iterations):
+    start = time.perf_counter_ns()
+    for i in range(iterations):
+        function()
+    return (time.perf_counter_ns() - start) / iterations
+
+
+if __name__ == '__main__':
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('-n', '--iterations', type=int, default=100000)
+    args = arg_parser.parse_args()
+
+    try:
+        init_opendds()
+        # No other benchmark uses this domain, so nothing will match
+        domain = DomainParticipant(37)
+        topic = domain.create_topic('CallOverhead', Sample)
+        reader = domain.create_subscriber().create_datareader(topic)
+        writer = domain.create_publisher().create_datawriter(topic)
+        sample = Sample(1, 2, 'Somewhere')
+
+        calls = [
+            ('Python no-op', lambda: None),
+            ('take(1) with no data', lambda: reader.take(1)),
+            ('read(1) with no data', lambda: reader.read(1)),
+            ('write() with no readers', lambda: writer.write(sample)),
+        ]
+        print(f'{"Call":<24} {"ns/call":>10}')
+        for name, function in calls:
+            print(f'{name:<24} {ns_per_call(function, args.iterations):>10.1f}')
+
+    except PyOpenDDS_Error as e:
+        sys.exit(e)
@@ -0,0 +1,55 @@
+'''Measures the cost of converting samples of each benchmark type between
+Python and C++, without any DDS entities involved. The package has to be
+generated with itl2py --benchmarks, like run_benchmark.py does.
+'''
+
+import importlib
+from argparse import ArgumentParser
+
+from pybench.bench import (
+    Integers, Floats, Booleans, Strings, Color, Enums, Point, Nested,
+)
+
+samples = [
+    Integers(200, 60000, -30000, 4000000000, -2000000000, 2 ** 63, -2 ** 62),
+    Floats(1.5, 2.5, 3.5, 4.5),
+    Booleans(True, False, True, False),
+    Strings('Somewhere', 'Anywhere', 'Nowhere', 'Everywhere'),
+    Enums(Color.red, Color.green, Color.blue, Color.red),
+    Nested(Point(1.0, 2.0), Point(3.0, 4.0)),
+]
+
+
+def field_count(sample):
+    '''Count the primitive fields, including the ones in nested structs'''
+    fields = getattr(sample, '_pyopendds_fields', None)
+    if fields is None:
+        return 1
+    return sum(field_count(getattr(sample, name)) for name in fields)
+
+
+def benchmark(sample, iterations):
+    cls = type(sample)
+    ts_package = importlib.import_module(cls._pyopendds_typesupport_packge_name)
+    to_cpp_ns, to_python_ns = ts_package.benchmark_conversion(cls, sample, iterations)
+    fields = field_count(sample)
+    return {
+        'type': cls.__name__,
+        'fields': fields,
+        'to_cpp_ns_per_sample': to_cpp_ns / iterations,
+        'to_cpp_ns_per_field': to_cpp_ns / iterations / fields,
+        'to_python_ns_per_sample': to_python_ns / iterations,
+        'to_python_ns_per_field': to_python_ns / iterations / fields,
+    }
+
+
+if __name__ == '__main__':
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('-n', '--iterations', type=int, default=100000)
+    args = arg_parser.parse_args()
+
+    print(f'{"Type":<10} {"Fields":>6} {"To C++ ns/field":>16} {"To Python ns/field":>19}')
+    for sample in samples:
+        r = benchmark(sample, args.iterations)
+        print(f'{r["type"]:<10} {r["fields"]:>6} {r["to_cpp_ns_per_field"]:>16.1f} '
+            f'{r["to_python_ns_per_field"]:>19.1f}')
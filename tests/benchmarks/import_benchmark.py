@@ -0,0 +1,106 @@
+'''Measures how long it takes to import a package generated by itl2py, which
+doesn't need OpenDDS or a build because only the Python package is imported.
+
+The package is generated from the synthetic ITL corpus of itl2py_benchmark.
+Each import is timed in a new interpreter, like a short-lived worker would do
+it, after the package is byte compiled, and the best of a number of runs is
+reported. It reports importing the package, one module of it, and every module
+of it while creating a sample of each struct.
+'''
+
+import compileall
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser
+from pathlib import Path
+
+from itl2py_benchmark import make_corpus
+
+from pyopendds.dev.itl2py.generate import generate
+
+package_name = 'pycorpus'
+
+# Run by the new interpreter with the modules to import as arguments. It prints
+# the seconds it took.
+timing_code = '''
+import sys
+import time
+from importlib import import_module
+start = time.perf_counter()
+for name in sys.argv[2:]:
+    module = import_module(name)
+    if sys.argv[1] == 'samples':
+        for value in list(vars(module).values()):
+            if hasattr(value, '_pyopendds_fields'):
+                value()
+print(time.perf_counter() - start)
+'''
+
+
+def time_import(path, runs, modules, samples=False):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [path.as_posix()] + ([env['PYTHONPATH']] if 'PYTHONPATH' in env else []))
+    best = None
+    for run in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', timing_code, 'samples' if samples else 'import'] + modules,
+            env=env, check=True, stdout=subprocess.PIPE, universal_newlines=True)
+        seconds = float(result.stdout)
+        if best is None or seconds < best:
+            best = seconds
+    return best
+
+
+if __name__ == '__main__':
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('--files', type=int, default=5)
+    arg_parser.add_argument('--modules', type=int, default=10)
+    arg_parser.add_argument('--types', type=int, default=100,
+        help='Types in each module, including the common module')
+    arg_parser.add_argument('--runs', type=int, default=5,
+        help='Times to import each, the best is reported')
+    args = arg_parser.parse_args()
+
+    temp_dir = Path(tempfile.mkdtemp())
+    try:
+        itl_files = make_corpus(temp_dir, args.files, args.modules, args.types)
+        output = temp_dir / 'output'
+        generate(dict(
+            idl_library_cmake_name='corpus_idl',
+            idl_library_build_dir=temp_dir.as_posix(),
+            itl_files=itl_files,
+            output=output,
+            package_name=package_name,
+            native_package_name='_' + package_name,
+            default_encoding='utf_8',
+            skip_init=False,
+            lazy_samples=False,
+            intern_strings=None,
+            intern_cache_size=256,
+            benchmarks=False,
+            jobs=0,
+            dry_run=False,
+            dump_ast=False,
+            just_dump_ast=False,
+        ))
+        # Byte compile it like installing it would, so compiling isn't timed
+        compileall.compile_dir(output.as_posix(), quiet=1)
+        modules = [package_name + '.common'] + [
+            '{}.file{}.module{}'.format(package_name, f, m)
+            for f in range(args.files) for m in range(args.modules)]
+        print('{} modules, {} types'.format(len(modules), len(modules) * args.types))
+
+        for label, names, samples in (
+            ('Import package', [package_name], False),
+            ('Import one module', modules[1:2], False),
+            ('Import every module', modules, False),
+            ('... and create samples', modules, True),
+        ):
+            seconds = time_import(output, args.runs, names, samples)
+            print('{:<24}{:8.3f} s'.format(label + ':', seconds))
+    finally:
+        shutil.rmtree(temp_dir)
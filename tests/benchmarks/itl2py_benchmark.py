@@ -0,0 +1,130 @@
+'''Measures how long itl2py takes on a synthetic ITL corpus, which doesn't need
+OpenDDS or a build.
+
+The corpus has a number of ITL files that each define modules of enums and
+structs. Every file also repeats the types of a common file it "includes",
+like opendds_idl does, so there are duplicates to skip. Structs have fields of
+primitives, strings, sequences, arrays, and the enums and structs before them,
+some in other modules. It reports the time to parse the ITL files with one
+process and with parallel jobs, to generate the whole package, which includes
+parsing, and to generate it again with nothing changed.
+'''
+
+import json
+import shutil
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+from pyopendds.dev.itl2py.generate import generate, parse_itl_files
+
+
+def itl_name(module, name):
+    return 'IDL:{}/{}:1.0'.format(module, name)
+
+
+def make_module(module, types, other_module=None):
+    '''Return the ITL of types enums and structs in a module, alternating.
+    '''
+    itl_types = []
+    struct_names = []
+    enum_names = []
+    for i in range(types):
+        if i % 4 == 0:
+            name = 'Kind{}'.format(i)
+            values = {'value{}_{}'.format(i, v): str(v) for v in range(4)}
+            itl_types.append({'name': itl_name(module, name), 'kind': 'alias', 'type': {
+                'kind': 'int', 'bits': 32, 'unsigned': True, 'constrained': True,
+                'values': values}})
+            enum_names.append(name)
+            continue
+        name = 'Struct{}'.format(i)
+        fields = [
+            {'name': 'id', 'type': {'kind': 'int', 'bits': 32}},
+            {'name': 'value', 'type': {'kind': 'float', 'model': 'binary64'}},
+            {'name': 'where', 'type': {'kind': 'string'}},
+            {'name': 'data', 'type': {'kind': 'sequence', 'type': {'kind': 'int', 'bits': 8,
+                'unsigned': True}}},
+            {'name': 'points', 'type': {'kind': 'sequence', 'size': [3], 'type': {
+                'kind': 'float', 'model': 'binary32'}}},
+        ]
+        if enum_names:
+            fields.append({'name': 'kind', 'type': itl_name(module, enum_names[-1])})
+        if struct_names:
+            fields.append({'name': 'previous', 'type': itl_name(module, struct_names[-1])})
+        if other_module:
+            fields.append({'name': 'common', 'type': itl_name(other_module, 'Struct1')})
+        itl_types.append({'name': itl_name(module, name), 'kind': 'alias',
+            'note': {'is_dcps_data_type': True}, 'type': {'kind': 'record', 'fields': fields}})
+        struct_names.append(name)
+    return itl_types
+
+
+def make_corpus(directory, files, modules, types):
+    '''Write the ITL files and return their paths. Each has modules modules of
+    types types after the common types.
+    '''
+    common = make_module('common', types)
+    paths = []
+    for f in range(files):
+        itl_types = list(common)
+        for m in range(modules):
+            itl_types += make_module('file{}/module{}'.format(f, m), types, 'common')
+        path = directory / 'corpus{}.itl'.format(f)
+        path.write_text(json.dumps({'types': itl_types}))
+        paths.append(path)
+    return paths
+
+
+def timed(label, function, *args):
+    start = time.perf_counter()
+    function(*args)
+    print('{:<24}{:8.3f} s'.format(label + ':', time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('--files', type=int, default=20)
+    arg_parser.add_argument('--modules', type=int, default=10)
+    arg_parser.add_argument('--types', type=int, default=100,
+        help='Types in each module, including the common module')
+    arg_parser.add_argument('-j', '--jobs', type=int, default=0,
+        help='Processes to parse with, 0 for one per CPU')
+    args = arg_parser.parse_args()
+
+    temp_dir = Path(tempfile.mkdtemp())
+    try:
+        itl_files = make_corpus(temp_dir, args.files, args.modules, args.types)
+        type_count = (args.files * args.modules + 1) * args.types
+        print('{} files, {} unique types, {} with the repeated common types'.format(
+            args.files, type_count, args.files * (args.modules + 1) * args.types))
+
+        timed('Parse ITL, 1 job', parse_itl_files, itl_files, 1)
+        timed('Parse ITL, {} jobs'.format(args.jobs or 'auto'),
+            parse_itl_files, itl_files, args.jobs)
+
+        output = temp_dir / 'output'
+        context = dict(
+            idl_library_cmake_name='corpus_idl',
+            idl_library_build_dir=temp_dir.as_posix(),
+            itl_files=itl_files,
+            output=output,
+            package_name='pycorpus',
+            native_package_name='_pycorpus',
+            default_encoding='utf_8',
+            skip_init=False,
+            lazy_samples=True,
+            intern_strings=None,
+            intern_cache_size=256,
+            benchmarks=False,
+            jobs=args.jobs,
+            dry_run=False,
+            dump_ast=False,
+            just_dump_ast=False,
+        )
+
+        timed('Generate package', generate, dict(context))
+        timed('Generate again, no-op', generate, dict(context))
+    finally:
+        shutil.rmtree(temp_dir)
@@ -0,0 +1,268 @@
+#include <benchTypeSupportImpl.h>
+
+#include <dds/DdsDcpsInfrastructureC.h>
+#include <dds/DdsDcpsPublicationC.h>
+#include <dds/DCPS/Marked_Default_Qos.h>
+#include <dds/DCPS/Service_Participant.h>
+#include <dds/DCPS/WaitSet.h>
+#include <dds/DCPS/DCPS_Utils.h>
+
+#include <chrono>
+#include <cstdlib>
+#include <cstring>
+#include <iostream>
+#include <thread>
+
+using OpenDDS::DCPS::retcode_to_string;
+
+/**
+ * Wait until the writer has matched with a total of at least count readers.
+ */
+bool wait_for_readers(DDS::DataWriter* writer, CORBA::Long count)
+{
+  DDS::StatusCondition_var sc = writer->get_statuscondition();
+  sc->set_enabled_statuses(DDS::PUBLICATION_MATCHED_STATUS);
+  DDS::WaitSet_var ws = new DDS::WaitSet;
+  ws->attach_condition(sc);
+  const DDS::Duration_t max_wait = {60, 0};
+  DDS::PublicationMatchedStatus status = {0, 0, 0, 0, 0};
+  bool found = true;
+  while (found && status.total_count < count) {
+    DDS::ConditionSeq active;
+    if (ws->wait(active, max_wait) != DDS::RETCODE_OK) {
+      std::cerr << "Error: Timedout waiting for subscriber" << std::endl;
+      found = false;
+    } else if (writer->get_publication_matched_status(status) != DDS::RETCODE_OK) {
+      std::cerr << "Error: Failed to get pub matched status" << std::endl;
+      found = false;
+    }
+  }
+  ws->detach_condition(sc);
+  return found;
+}
+
+/**
+ * Register the type and create a topic for it and a writer with a reliable,
+ * keep all history. Returns nil after printing an error if something fails.
+ */
+template <typename TypeSupportImpl>
+DDS::DataWriter_var create_writer(DDS::DomainParticipant* participant, const char* topic_name)
+{
+  DDS::TypeSupport_var ts = new TypeSupportImpl();
+  DDS::ReturnCode_t rc = ts->register_type(participant, "");
+  if (rc != DDS::RETCODE_OK) {
+    std::cerr << "Error: Failed to register type: " << retcode_to_string(rc) << std::endl;
+    return DDS::DataWriter::_nil();
+  }
+
+  CORBA::String_var type_name = ts->get_type_name();
+  DDS::Topic_var topic = participant->create_topic(
+    topic_name, type_name.in(), TOPIC_QOS_DEFAULT, 0, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
+  if (!topic) {
+    std::cerr << "Error: Failed to create topic" << std::endl;
+    return DDS::DataWriter::_nil();
+  }
+
+  DDS::Publisher_var publisher =
+    participant->create_publisher(PUBLISHER_QOS_DEFAULT, 0, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
+  if (!publisher) {
+    std::cerr << "Error: Failed to create publisher" << std::endl;
+    return DDS::DataWriter::_nil();
+  }
+
+  DDS::DataWriterQos qos;
+  publisher->get_default_datawriter_qos(qos);
+  qos.reliability.kind = DDS::RELIABLE_RELIABILITY_QOS;
+  qos.history.kind = DDS::KEEP_ALL_HISTORY_QOS;
+  DDS::DataWriter_var writer =
+    publisher->create_datawriter(topic.in(), qos, 0, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
+  if (!writer) {
+    std::cerr << "Error: Failed to create writer" << std::endl;
+  }
+  return writer;
+}
+
+/**
+ * Write bursts of Samples, each burst after a new reader is matched.
+ */
+bool publish_samples(DDS::DomainParticipant* participant, CORBA::Long count, CORBA::Long bursts)
+{
+  DDS::DataWriter_var writer =
+    create_writer<bench::SampleTypeSupportImpl>(participant, "Samples");
+  if (!writer) {
+    return false;
+  }
+  bench::SampleDataWriter_var sample_writer = bench::SampleDataWriter::_narrow(writer);
+
+  for (CORBA::Long burst = 1; burst <= bursts; ++burst) {
+    std::cout << "Wating for Reader " << burst << "..." << std::endl;
+    if (!wait_for_readers(writer, burst)) {
+      return false;
+    }
+    ACE_OS::sleep(1);
+
+    // Write a burst of samples, each one a different instance so the default
+    // KEEP_LAST 1 history of the reader holds all of them.
+    std::cout << "Writing " << count << " Samples..." << std::endl;
+    const std::chrono::steady_clock::time_point start = std::chrono::steady_clock::now();
+    bench::Sample sample;
+    sample.where
+#ifdef CPP11_IDL
+      ()
+#endif
+      = "Somewhere";
+    for (CORBA::Long i = 0; i < count; ++i) {
+      sample.id
+#ifdef CPP11_IDL
+        ()
+#endif
+        = i;
+      sample.value
+#ifdef CPP11_IDL
+        ()
+#endif
+        = i * burst;
+      const DDS::ReturnCode_t rc = sample_writer->write(sample, DDS::HANDLE_NIL);
+      if (rc != DDS::RETCODE_OK) {
+        std::cerr << "Error: Failed to write: " << retcode_to_string(rc) << std::endl;
+        return false;
+      }
+    }
+    const std::chrono::duration<double> seconds = std::chrono::steady_clock::now() - start;
+    std::cout << "C++ write(): wrote " << count << " samples in " << seconds.count() << " s, "
+      << static_cast<long>(count / seconds.count()) << " samples/s" << std::endl;
+  }
+  return true;
+}
+
+/**
+ * Write count Payloads with size bytes of data each for the throughput
+ * benchmark, at rate samples per second or as fast as possible if rate is 0.
+ */
+bool publish_payloads(
+  DDS::DomainParticipant* participant, CORBA::Long count, CORBA::Long size, CORBA::Long rate)
+{
+  DDS::DataWriter_var writer =
+    create_writer<bench::PayloadTypeSupportImpl>(participant, "Payloads");
+  if (!writer) {
+    return false;
+  }
+  bench::PayloadDataWriter_var payload_writer = bench::PayloadDataWriter::_narrow(writer);
+
+  std::cout << "Wating for Reader..." << std::endl;
+  if (!wait_for_readers(writer, 1)) {
+    return false;
+  }
+  ACE_OS::sleep(1);
+
+  std::cout << "Writing " << count << " Payloads of " << size << " bytes";
+  if (rate) {
+    std::cout << " at " << rate << " samples/s";
+  }
+  std::cout << "..." << std::endl;
+  bench::Payload payload;
+#ifdef CPP11_IDL
+  payload.data().resize(size);
+#else
+  payload.data.length(size);
+#endif
+  const std::chrono::steady_clock::time_point start = std::chrono::steady_clock::now();
+  for (CORBA::Long i = 0; i < count; ++i) {
+    if (rate) {
+      std::this_thread::sleep_until(start + std::chrono::nanoseconds(1000000000LL * i / rate));
+    }
+    payload.seq
+#ifdef CPP11_IDL
+      ()
+#endif
+      = i;
+    const DDS::ReturnCode_t rc = payload_writer->write(payload, DDS::HANDLE_NIL);
+    if (rc != DDS::RETCODE_OK) {
+      std::cerr << "Error: Failed to write: " << retcode_to_string(rc) << std::endl;
+      return false;
+    }
+  }
+  const std::chrono::duration<double> seconds = std::chrono::steady_clock::now() - start;
+  std::cout << "C++ write(): wrote " << count << " payloads in " << seconds.count() << " s"
+    << std::endl;
+
+  // Let the reader get everything before going away
+  const DDS::Duration_t max_wait = {60, 0};
+  writer->wait_for_acknowledgments(max_wait);
+  return true;
+}
+
+/**
+ * Publishes samples for the Python benchmarks.
+ *
+ * By default it publishes bursts of Samples for the take benchmarks. Each
+ * burst is written after a new reader is matched so the subscriber can
+ * measure taking a full reader one way, then create another reader to measure
+ * another way. The time taken to write each burst is printed as a baseline
+ * for the Python write benchmark.
+ *
+ * With -s it publishes Payloads for the throughput benchmark instead, on
+ * domain 36 so it can use a localhost only configuration.
+ *
+ * Options:
+ *   -n COUNT   Number of samples in each burst. Default is 10000.
+ *   -b BURSTS  Number of bursts and readers to wait for. Default is 2.
+ *   -s SIZE    Publish one burst of Payloads with SIZE bytes of data.
+ *   -r RATE    Samples per second to write Payloads at. Default is 0, which
+ *              is as fast as possible.
+ */
+int main(int argc, char* argv[])
+{
+  try {
+    // Init OpenDDS
+    TheServiceParticipant->default_configuration_file("rtps.ini");
+    DDS::DomainParticipantFactory_var opendds = TheParticipantFactoryWithArgs(argc, argv);
+
+    CORBA::Long count = 10000;
+    CORBA::Long bursts = 2;
+    CORBA::Long size = -1;
+    CORBA::Long rate = 0;
+    for (int i = 1; i < argc; ++i) {
+      if (!std::strcmp(argv[i], "-n") && i + 1 < argc) {
+        count = std::atoi(argv[++i]);
+      } else if (!std::strcmp(argv[i], "-b") && i + 1 < argc) {
+        bursts = std::atoi(argv[++i]);
+      } else if (!std::strcmp(argv[i], "-s") && i + 1 < argc) {
+        size = std::atoi(argv[++i]);
+      } else if (!std::strcmp(argv[i], "-r") && i + 1 < argc) {
+        rate = std::atoi(argv[++i]);
+      } else {
+        std::cerr << "Error: Invalid argument: " << argv[i] << std::endl;
+        return 1;
+      }
+    }
+
+    DDS::DomainParticipantQos part_qos;
+    opendds->get_default_participant_qos(part_qos);
+    DDS::DomainParticipant_var participant = opendds->create_participant(
+      size < 0 ? 35 : 36, part_qos, 0, OpenDDS::DCPS::DEFAULT_STATUS_MASK);
+    if (!participant) {
+      std::cerr << "Error: Failed to create participant" << std::endl;
+      return 1;
+    }
+
+    const bool ok = size < 0 ? publish_samples(participant, count, bursts) :
+                               publish_payloads(participant, count, size, rate);
+    if (!ok) {
+      return 1;
+    }
+
+    ACE_OS::sleep(2);
+
+    // Cleanup
+    participant->delete_contained_entities();
+    opendds->delete_participant(participant.in());
+    TheServiceParticipant->shutdown();
+
+  } catch (const CORBA::Exception& e) {
+    e._tao_print_exception("Exception caught in main():");
+    return 1;
+  }
+
+  return 0;
+}
@@ -0,0 +1,99 @@
+import sys
+from pathlib import Path
+import argparse
+
+from pyopendds.dev.util import (
+    RunCommandError,
+    run_command,
+    run_python,
+    wait_or_kill,
+    build_cmake_project,
+    find_itl_file,
+)
+
+
+this_dir = Path(__file__).resolve().parent
+timeout = 120
+
+
+def run_benchmark(args):
+    build_dirname = 'build_cpp11' if args.cpp11 else 'build_classic'
+    build_dir = this_dir / build_dirname
+
+    if not args.just_run:
+        cfg_args = []
+        if args.cpp11:
+            cfg_args.append('-DCPP11_IDL=ON')
+        build_cmake_project(this_dir, build_dir, cfg_args=cfg_args)
+
+        # Generate and Install Python Package
+        pack_dir = 'bench_output'
+        itl2py_args = ['--benchmarks']
+        if args.skip_init:
+            itl2py_args.append('--skip-init')
+        if args.intern_strings:
+            itl2py_args += ['--intern-strings', 'bench.Sample.where']
+        run_command('itl2py', '-o', pack_dir, *itl2py_args, 'bench_idl',
+            find_itl_file(build_dir, 'bench.itl'),
+            cwd=build_dir, exit_on_error=True)
+        run_python('-m', 'pip', '--verbose', 'install', '.',
+            cwd=(build_dir / pack_dir), exit_on_error=True)
+
+    count = str(args.count)
+
+    def run_pair(pub_command, sub_command):
+        pub = run_command(*pub_command, return_popen=True, cwd=this_dir,
+            add_library_paths=[build_dir])
+        sub = run_python(*sub_command, cwd=this_dir, return_popen=True,
+            add_library_paths=[build_dir])
+        wait_or_kill(pub, timeout)
+        wait_or_kill(sub, timeout)
+
+    # Convert samples without any DDS entities
+    run_python(this_dir / 'conversion_benchmark.py', cwd=this_dir,
+        add_library_paths=[build_dir])
+
+    # Fixed cost of calling into the native code
+    run_python(this_dir / 'call_overhead_benchmark.py', cwd=this_dir,
+        add_library_paths=[build_dir])
+
+    cpp_pub = [build_dir / 'publisher', '-DCPSConfigFile', 'rtps.ini', '-n', count]
+
+    # Take from a reader filled by the C++ publisher
+    run_pair(cpp_pub, [this_dir / 'take_benchmark.py', '-n', count])
+
+    # Write using C++ as a baseline, then from Python
+    run_pair(cpp_pub + ['-b', '1'], [this_dir / 'sink.py'])
+    run_pair([sys.executable, this_dir / 'write_benchmark.py', '-n', count],
+        [this_dir / 'sink.py'])
+
+    # End-to-end throughput from the C++ publisher over localhost RTPS
+    mapping = 'cpp11' if args.cpp11 else 'classic'
+    for size in args.payload_sizes:
+        results_args = ['--results', args.results.resolve()] if args.results else []
+        run_pair(
+            [build_dir / 'publisher', '-DCPSConfigFile', 'rtps_localhost.ini',
+                '-n', count, '-s', str(size), '-r', str(args.rate)],
+            [this_dir / 'throughput_benchmark.py', '-n', count, '-s', str(size),
+                '-r', str(args.rate), '--mapping', mapping, *results_args])
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--cpp11', action='store_true')
+    arg_parser.add_argument('--just-run', action='store_true')
+    arg_parser.add_argument('--skip-init', action='store_true',
+        help='Generate the package with itl2py --skip-init')
+    arg_parser.add_argument('--intern-strings', action='store_true',
+        help='Generate the package with itl2py --intern-strings for Sample.where')
+    arg_parser.add_argument('-n', '--count', type=int, default=10000)
+    arg_parser.add_argument('--payload-sizes', type=int, nargs='+', default=[64, 1024, 16384],
+        metavar='SIZE', help='Payload sizes in bytes to run the throughput benchmark with')
+    arg_parser.add_argument('--rate', type=int, default=0,
+        help='Samples per second to publish at in the throughput benchmark, 0 for unlimited')
+    arg_parser.add_argument('--results', type=Path,
+        help='JSON file to append the throughput results to')
+    try:
+        run_benchmark(arg_parser.parse_args())
+    except RunCommandError as ex:
+        sys.exit(f'ERROR: {ex}')
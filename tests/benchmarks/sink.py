@@ -0,0 +1,36 @@
+'''Takes samples until none arrive for a while, so writers in the benchmarks
+have a reader to write to.
+'''
+
+import sys
+from argparse import ArgumentParser
+from datetime import timedelta
+
+from pyopendds import init_opendds, DomainParticipant, StatusKind, PyOpenDDS_Error
+from pybench.bench import Sample
+
+if __name__ == '__main__':
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('--idle', type=float, default=5.0,
+        help='Seconds without samples before exiting')
+    args = arg_parser.parse_args()
+
+    try:
+        init_opendds()
+        domain = DomainParticipant(35)
+        topic = domain.create_topic('Samples', Sample)
+        subscriber = domain.create_subscriber()
+        reader = subscriber.create_datareader(topic)
+
+        reader.wait_for(StatusKind.SUBSCRIPTION_MATCHED, timedelta(seconds=30))
+        reader.wait_for(StatusKind.DATA_AVAILABLE, timedelta(seconds=30))
+        taken = 0
+        while True:
+            samples = reader.take(timeout=timedelta(seconds=args.idle))
+            if not samples:
+                break
+            taken += len(samples)
+        print(f'Sink took {taken} samples')
+
+    except PyOpenDDS_Error as e:
+        sys.exit(e)
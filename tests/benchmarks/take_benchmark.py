@@ -0,0 +1,102 @@
+'''Compares the rate samples can be taken from a reader using
+take_next_sample() one at a time versus take() in batches.
+
+Each method gets its own reader, which the publisher fills with a burst of
+samples when it matches. The reader is left to fill up before it's drained so
+that what is measured is the cost of taking and converting samples, not the
+rate the publisher can write them.
+'''
+
+import sys
+import time
+from argparse import ArgumentParser
+from datetime import timedelta
+
+from pyopendds import (
+    init_opendds,
+    DomainParticipant,
+    StatusKind,
+    PyOpenDDS_Error,
+    ReturnCodeError,
+)
+from pyopendds.constants import ReturnCode
+from pybench.bench import Sample
+
+
+def wait_for_burst(reader, settle):
+    reader.wait_for(StatusKind.SUBSCRIPTION_MATCHED, timedelta(seconds=10))
+    reader.wait_for(StatusKind.DATA_AVAILABLE, timedelta(seconds=10))
+    time.sleep(settle)
+
+
+def take_one_at_a_time(reader, count):
+    taken = 0
+    start = end = time.perf_counter()
+    while taken < count:
+        try:
+            reader.take_next_sample()
+        except ReturnCodeError as e:
+            if e.return_code != ReturnCode.TIMEOUT:
+                raise
+            break
+        taken += 1
+        end = time.perf_counter()
+    return taken, end - start
+
+
+def take_batched(reader, count, batch_size):
+    taken = 0
+    start = end = time.perf_counter()
+    while taken < count:
+        samples = reader.take(batch_size, timedelta(seconds=1))
+        if not samples:
+            break
+        taken += len(samples)
+        end = time.perf_counter()
+    return taken, end - start
+
+
+def report(name, taken, seconds):
+    rate = taken / seconds if seconds else float('inf')
+    print(f'{name}: took {taken} samples in {seconds:.3f} s, {rate:,.0f} samples/s')
+    return rate
+
+
+if __name__ == '__main__':
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('-n', '--count', type=int, default=10000)
+    arg_parser.add_argument('--batch-size', type=int, default=1000)
+    arg_parser.add_argument('--settle', type=float, default=2.0,
+        help='Seconds to let a burst arrive before taking it')
+    args = arg_parser.parse_args()
+
+    try:
+        init_opendds()
+        domain = DomainParticipant(35)
+        topic = domain.create_topic('Samples', Sample)
+        subscriber = domain.create_subscriber()
+
+        reader = subscriber.create_datareader(topic)
+        wait_for_burst(reader, args.settle)
+        single_rate = report('take_next_sample()',
+            *take_one_at_a_time(reader, args.count))
+
+        reader = subscriber.create_datareader(topic)
+        wait_for_burst(reader, args.settle)
+        batch_rate = report(f'take({args.batch_size})',
+            *take_batched(reader, args.count, args.batch_size))
+
+        print(f'take() is {batch_rate / single_rate:.1f}x take_next_sample()')
+
+        stats = reader.stats()
+        if stats['samples']:
+            print(f'take({args.batch_size}) per sample: '
+                f'{stats["take_ns"] / stats["samples"]:.0f} ns in OpenDDS, '
+                f'{stats["convert_ns"] / stats["samples"]:.0f} ns converting')
+
+        for field, cache_stats in stats['string_caches'].items():
+            print(f'{field} string cache: {cache_stats["hit_rate"]:.1%} hit rate, '
+                f'{cache_stats["entries"]} entries, {cache_stats["memory"]} bytes')
+
+    except PyOpenDDS_Error as e:
+        sys.exit(e)
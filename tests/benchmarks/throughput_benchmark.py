@@ -0,0 +1,103 @@
+'''Measures end-to-end throughput from the C++ publisher to a Python reader.
+
+publisher.cpp -s writes Payloads with the localhost only configuration and
+this takes them in batches with a reliable, keep all reader until it has all
+of them or none arrive for a while. It reports samples/s, MB/s of payload
+data, and the CPU time this process used per sample, which includes the
+OpenDDS threads receiving the samples. The results can be appended to a JSON
+file to compare across runs.
+'''
+
+import json
+import sys
+import time
+from argparse import ArgumentParser
+from datetime import timedelta
+from pathlib import Path
+
+from pyopendds import (
+    init_opendds,
+    opendds_version_str,
+    DomainParticipant,
+    StatusKind,
+    PyOpenDDS_Error,
+)
+from pybench.bench import Payload
+
+
+def take_all(reader, count, batch_size, idle):
+    '''Take until count samples were received or none arrived for idle
+    seconds. Returns the number of samples and bytes of payload data received
+    and the wall and CPU seconds it took.
+    '''
+    received = 0
+    data_bytes = 0
+    start = end = time.perf_counter()
+    cpu_start = cpu_end = time.process_time()
+    while received < count:
+        samples = reader.take(batch_size, timedelta(seconds=idle))
+        if not samples:
+            break
+        received += len(samples)
+        data_bytes += sum(len(sample.data) for sample in samples)
+        end = time.perf_counter()
+        cpu_end = time.process_time()
+    return received, data_bytes, end - start, cpu_end - cpu_start
+
+
+def append_result(path, result):
+    results = json.loads(path.read_text()) if path.exists() else []
+    results.append(result)
+    path.write_text(json.dumps(results, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('-n', '--count', type=int, default=10000)
+    arg_parser.add_argument('-s', '--payload-size', type=int, default=1024,
+        help='Size the publisher was told to use, only used in the results')
+    arg_parser.add_argument('-r', '--rate', type=int, default=0,
+        help='Rate the publisher was told to use, only used in the results')
+    arg_parser.add_argument('--mapping', default='classic',
+        help='IDL mapping the publisher was built with, only used in the results')
+    arg_parser.add_argument('--batch-size', type=int, default=1000)
+    arg_parser.add_argument('--idle', type=float, default=5.0,
+        help='Seconds without samples before giving up on the rest')
+    arg_parser.add_argument('--results', type=Path,
+        help='JSON file to append the results to')
+    args = arg_parser.parse_args()
+
+    try:
+        init_opendds(sys.argv[0], '-DCPSConfigFile', 'rtps_localhost.ini', default_rtps=False)
+        domain = DomainParticipant(36)
+        topic = domain.create_topic('Payloads', Payload)
+        reader = domain.create_subscriber().create_datareader(topic, qos='reliable')
+
+        reader.wait_for(StatusKind.SUBSCRIPTION_MATCHED, timedelta(seconds=30))
+        reader.wait_for(StatusKind.DATA_AVAILABLE, timedelta(seconds=30))
+        received, data_bytes, seconds, cpu_seconds = take_all(
+            reader, args.count, args.batch_size, args.idle)
+
+        result = dict(
+            opendds_version=opendds_version_str(),
+            mapping=args.mapping,
+            count=args.count,
+            payload_size=args.payload_size,
+            rate=args.rate,
+            batch_size=args.batch_size,
+            received=received,
+            seconds=seconds,
+            samples_per_s=received / seconds if seconds else None,
+            mb_per_s=data_bytes / 1e6 / seconds if seconds else None,
+            cpu_us_per_sample=cpu_seconds * 1e6 / received if received else None,
+        )
+        print(f'Throughput ({args.mapping}, {args.payload_size} byte payloads): '
+            f'received {received} of {args.count} samples in {seconds:.3f} s')
+        if received and seconds:
+            print(f'  {result["samples_per_s"]:,.0f} samples/s, {result["mb_per_s"]:,.2f} MB/s, '
+                f'{result["cpu_us_per_sample"]:.2f} us CPU/sample')
+        if args.results:
+            append_result(args.results, result)
+
+    except PyOpenDDS_Error as e:
+        sys.exit(e)
@@ -0,0 +1,65 @@
+'''Measures the rate samples can be written from Python using write() one at a
+time versus write_many() in batches. publisher.cpp prints the same measurement
+for the C++ API as a baseline.
+'''
+
+import sys
+import time
+from argparse import ArgumentParser
+from datetime import timedelta
+
+from pyopendds import init_opendds, DomainParticipant, StatusKind, PyOpenDDS_Error
+from pybench.bench import Sample
+
+
+def make_samples(count, burst):
+    return [Sample(id=i, value=i * burst, where='Somewhere') for i in range(count)]
+
+
+def write_one_at_a_time(writer, samples):
+    start = time.perf_counter()
+    for sample in samples:
+        writer.write(sample)
+    return time.perf_counter() - start
+
+
+def write_batched(writer, samples, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(samples), batch_size):
+        writer.write_many(samples[i:i + batch_size])
+    return time.perf_counter() - start
+
+
+def report(name, count, seconds):
+    rate = count / seconds if seconds else float('inf')
+    print(f'{name}: wrote {count} samples in {seconds:.3f} s, {rate:,.0f} samples/s')
+    return rate
+
+
+if __name__ == '__main__':
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('-n', '--count', type=int, default=10000)
+    arg_parser.add_argument('--batch-size', type=int, default=1000)
+    args = arg_parser.parse_args()
+
+    try:
+        init_opendds()
+        domain = DomainParticipant(35)
+        topic = domain.create_topic('Samples', Sample)
+        publisher = domain.create_publisher()
+        writer = publisher.create_datawriter(topic)
+
+        writer.wait_for(StatusKind.PUBLICATION_MATCHED, timedelta(seconds=30))
+        time.sleep(1)
+
+        # Samples are created beforehand so only conversion and writing is measured
+        single_rate = report('write()',
+            args.count, write_one_at_a_time(writer, make_samples(args.count, 1)))
+        batch_rate = report(f'write_many({args.batch_size})',
+            args.count, write_batched(writer, make_samples(args.count, 2), args.batch_size))
+        print(f'write_many() is {batch_rate / single_rate:.1f}x write()')
+
+        time.sleep(1)
+
+    except PyOpenDDS_Error as e:
+        sys.exit(e)
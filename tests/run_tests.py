@@ -1,4 +1,5 @@
 import sys
+from argparse import ArgumentParser
 from pathlib import Path
 
 from pyopendds.dev.util import run_command, run_python, RunCommandError
@@ -40,6 +41,28 @@ def run_integration_tests():
     return failed
 
 
+def run_benchmarks(results_path):
+    '''Run the benchmarks for both IDL mappings. The throughput results of both
+    are written to results_path as a JSON list.
+    '''
+    if results_path.exists():
+        results_path.unlink()
+    failed = False
+    for args in ([], ['--cpp11']):
+        command = [str(tests_path / 'benchmarks' / 'run_benchmark.py'),
+            '--results', str(results_path)] + args
+        s = repr(' '.join(command))
+        print('Running', s, '...')
+        try:
+            run_python(*command, cwd=tests_path / 'benchmarks')
+        except RunCommandError as e:
+            print(s, 'failed:', str(e), file=sys.stderr)
+            failed = True
+    if failed:
+        sys.exit('There were benchmark failures!')
+    print('Throughput results are in', results_path)
+
+
 def run_clang_format():
     template_dir = pyopendds_path / 'pyopendds/dev/itl2py/templates'
     assert template_dir.is_dir()
@@ -79,4 +102,14 @@ def run_all_tests():
 
 
 if __name__ == '__main__':
-    run_all_tests()
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('--benchmarks', action='store_true',
+        help='Run the benchmarks instead of the tests')
+    arg_parser.add_argument('--results', type=Path,
+        default=tests_path / 'benchmarks' / 'results.json',
+        help='JSON file for the benchmark results. By default this is %(default)s')
+    args = arg_parser.parse_args()
+    if args.benchmarks:
+        run_benchmarks(args.results.resolve())
+    else:
+        run_all_tests()
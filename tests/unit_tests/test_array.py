@@ -0,0 +1,41 @@
+import struct
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Mixed:
+    _pyopendds_array_fields = (('kind', 'u4'), ('value', 'i4'), ('where', 'O'))
+
+
+class Numeric:
+    _pyopendds_array_fields = (('flag', '?'), ('value', 'f8'))
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class TestMakeArray(unittest.TestCase):
+
+    def test_mixed(self):
+        from pyopendds.array import make_array
+        records = bytearray(struct.pack('=Ii', 1, -5) + struct.pack('=Ii', 2, 7))
+        array = make_array(Mixed, 2, records, (['here', 'there'],))
+        self.assertEqual(array.dtype.names, ('kind', 'value', 'where'))
+        self.assertEqual(list(array['kind']), [1, 2])
+        self.assertEqual(list(array['value']), [-5, 7])
+        self.assertEqual(list(array['where']), ['here', 'there'])
+
+    def test_numeric(self):
+        from pyopendds.array import make_array
+        records = bytearray(struct.pack('=?d', True, 1.5))
+        array = make_array(Numeric, 1, records, ())
+        self.assertTrue(array['flag'][0])
+        self.assertEqual(array['value'][0], 1.5)
+
+    def test_empty(self):
+        from pyopendds.array import make_array
+        array = make_array(Mixed, 0, bytearray(), ([],))
+        self.assertEqual(len(array), 0)
+        self.assertEqual(array.dtype.names, ('kind', 'value', 'where'))
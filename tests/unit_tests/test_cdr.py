@@ -0,0 +1,135 @@
+import enum
+import struct
+import sys
+import unittest
+from array import array
+from dataclasses import dataclass, field
+
+from pyopendds import cdr
+
+
+class Kind(enum.IntFlag):
+    a = 0
+    b = 1
+
+
+@dataclass
+class Point:
+    x: float = 0.0
+    y: float = 0.0
+
+    @staticmethod
+    def _pyopendds_cdr_fields():
+        return (('x', cdr.Primitive('d', 8)), ('y', cdr.Primitive('d', 8)))
+
+
+@dataclass
+class Sample:
+    flag: bool = False
+    name: str = ''
+    kind: Kind = Kind.a
+    value: int = 0
+    longs: array = field(default_factory=lambda: array('i'))
+    octets: bytes = b''
+    point: Point = field(default_factory=Point)
+    names: list = field(default_factory=list)
+    wide: str = ''
+    after: int = 0
+
+    @staticmethod
+    def _pyopendds_cdr_fields():
+        return (
+            ('flag', cdr.Bool()),
+            ('name', cdr.String()),
+            ('kind', cdr.Enum(Kind)),
+            ('value', cdr.Primitive('q', 8)),
+            ('longs', cdr.Sequence(cdr.Primitive('i', 4), 'array')),
+            ('octets', cdr.Array(cdr.Primitive('B', 1), 3, 'bytes')),
+            ('point', cdr.Struct(Point)),
+            ('names', cdr.Sequence(cdr.String(), 'list')),
+            ('wide', cdr.WString()),
+            ('after', cdr.Primitive('i', 4)),
+        )
+
+
+class SampleView(cdr.SampleView):
+    __slots__ = tuple(name for name, decoder in Sample._pyopendds_cdr_fields())
+    _pyopendds_type = Sample
+
+
+utf16 = 'utf-16-le' if sys.byteorder == 'little' else 'utf-16-be'
+
+
+def serialize():
+    # Offsets in the comments are where each field starts after alignment
+    return (
+        struct.pack('=?', True) + bytes(3)        # 0 flag
+        + struct.pack('=I', 3) + b'hi\0' + bytes(1)  # 4 name
+        + struct.pack('=I', 1)                    # 12 kind
+        + struct.pack('=q', -7)                   # 16 value
+        + struct.pack('=Iii', 2, 5, 6)            # 24 longs
+        + b'xyz' + bytes(1)                       # 36 octets
+        + struct.pack('=dd', 1.5, 2.5)            # 40 point
+        + struct.pack('=I', 2)                    # 56 names
+        + struct.pack('=I', 2) + b'a\0' + bytes(2)
+        + struct.pack('=I', 1) + b'\0' + bytes(3)
+        + struct.pack('=I', 4) + 'hé'.encode(utf16)  # 76 wide
+        + struct.pack('=i', 9)                    # 84 after
+    )
+
+
+class TestSampleView(unittest.TestCase):
+
+    def test_fields(self):
+        view = SampleView(memoryview(serialize()))
+        self.assertEqual(view.names, ['a', ''])
+        self.assertIs(view.flag, True)
+        self.assertEqual(view.name, 'hi')
+        self.assertIs(view.kind, Kind.b)
+        self.assertEqual(view.value, -7)
+        self.assertEqual(view.longs, array('i', [5, 6]))
+        self.assertEqual(view.octets, b'xyz')
+        self.assertEqual(view.point, Point(1.5, 2.5))
+
+    def test_memoized(self):
+        view = SampleView(memoryview(serialize()))
+        self.assertIs(view.point, view.point)
+
+    def test_wide(self):
+        view = SampleView(memoryview(serialize()))
+        self.assertEqual(view.after, 9)
+        self.assertEqual(view.wide, 'hé')
+
+    def test_materialize(self):
+        sample = SampleView(memoryview(serialize())).materialize()
+        self.assertEqual(sample.names, ['a', ''])
+        self.assertEqual(sample.after, 9)
+
+    def test_not_a_field(self):
+        view = SampleView(memoryview(serialize()))
+        with self.assertRaises(AttributeError):
+            view.missing
+
+
+class TestDecoders(unittest.TestCase):
+
+    def test_alignment(self):
+        data = memoryview(bytes(1) + bytes(7) + struct.pack('=d', 3.0))
+        self.assertEqual(cdr.Primitive('d', 8).decode(data, 1), (3.0, 16))
+
+    def test_empty_sequence(self):
+        data = memoryview(struct.pack('=I', 0))
+        self.assertEqual(cdr.Sequence(cdr.Primitive('d', 8), 'array').decode(data, 0),
+            (array('d'), 4))
+        self.assertEqual(cdr.Sequence(cdr.Primitive('d', 8), 'array').skip(data, 0), 4)
+
+    def test_char(self):
+        self.assertEqual(cdr.Char().decode(memoryview(b'q'), 0), ('q', 1))
+
+    def test_wchar(self):
+        data = memoryview(b'x' + bytes(1) + 'é'.encode(utf16))
+        self.assertEqual(cdr.WChar().decode(data, 1), ('é', 4))
+
+    def test_string_encoding(self):
+        data = memoryview(struct.pack('=I', 3) + 'é'.encode('latin-1') + b'?\0')
+        self.assertEqual(cdr.String('latin-1').decode(data, 0), ('é?', 7))
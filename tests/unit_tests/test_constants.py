@@ -0,0 +1,24 @@
+import unittest
+
+from pyopendds.constants import SampleState, ViewState, InstanceState
+
+
+class TestStateMasks(unittest.TestCase):
+    '''The masks have to match the ones in the DDS specification because
+    they're passed to OpenDDS as they are.
+    '''
+
+    def test_sample_state(self):
+        self.assertEqual(SampleState.READ, 0x0001)
+        self.assertEqual(SampleState.NOT_READ, 0x0002)
+
+    def test_view_state(self):
+        self.assertEqual(ViewState.NEW, 0x0001)
+        self.assertEqual(ViewState.NOT_NEW, 0x0002)
+
+    def test_instance_state(self):
+        self.assertEqual(InstanceState.ALIVE, 0x0001)
+        self.assertEqual(InstanceState.NOT_ALIVE_DISPOSED, 0x0002)
+        self.assertEqual(InstanceState.NOT_ALIVE_NO_WRITERS, 0x0004)
+        self.assertEqual(InstanceState.NOT_ALIVE,
+            InstanceState.NOT_ALIVE_DISPOSED | InstanceState.NOT_ALIVE_NO_WRITERS)
@@ -0,0 +1,14 @@
+import unittest
+
+from pyopendds.ContentFilteredTopic import _parameters
+
+
+class TestExpressionParameters(unittest.TestCase):
+
+    def test_parameters(self):
+        self.assertEqual(_parameters([5, 'x', "'quoted'"]), ('5', 'x', "'quoted'"))
+        self.assertEqual(_parameters(()), ())
+
+    def test_string_is_not_parameters(self):
+        with self.assertRaises(TypeError):
+            _parameters('5')
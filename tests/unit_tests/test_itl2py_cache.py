@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from pyopendds.dev.itl2py.ast import Module
+from pyopendds.dev.itl2py.cache import Cache, inputs_hash, outputs_hash
+from pyopendds.dev.itl2py.Output import write_if_changed
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+        self.itl = self.dir / 'types.itl'
+        self.itl.write_text('{"types": []}')
+        self.output = self.dir / 'setup.py'
+        self.output.write_text('setup()')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_write_if_changed(self):
+        self.assertFalse(write_if_changed(self.output, 'setup()'))
+        self.assertTrue(write_if_changed(self.output, 'setup(name="x")'))
+        self.assertTrue(write_if_changed(self.dir / 'new.py', ''))
+
+    def test_hashes(self):
+        inputs = inputs_hash([self.itl])
+        self.assertEqual(outputs_hash(inputs, dict(skip_init=False, dry_run=False)),
+            outputs_hash(inputs, dict(skip_init=False, dry_run=True)))
+        self.assertNotEqual(outputs_hash(inputs, dict(skip_init=False)),
+            outputs_hash(inputs, dict(skip_init=True)))
+        self.itl.write_text('{"types": [], "version": 1}')
+        self.assertNotEqual(inputs, inputs_hash([self.itl]))
+
+    def test_round_trip(self):
+        path = self.dir / '.itl2py_cache'
+        inputs = inputs_hash([self.itl])
+        outputs = outputs_hash(inputs, {})
+        self.assertFalse(Cache(path).is_current(outputs))
+        Cache(path).save(inputs, Module(None, None), outputs, [self.output])
+
+        cache = Cache(path)
+        self.assertTrue(cache.is_current(outputs))
+        self.assertIsInstance(cache.ast(inputs), Module)
+        self.assertIsNone(cache.ast('other'))
+        self.assertFalse(cache.is_current('other'))
+
+        # Changing a generated file means it has to be generated again
+        self.output.write_text('setup(name="x")')
+        self.assertFalse(Cache(path).is_current(outputs))
+
+    def test_damaged(self):
+        path = self.dir / '.itl2py_cache'
+        path.write_bytes(b'not a pickle')
+        self.assertIsNone(Cache(path).ast(inputs_hash([self.itl])))
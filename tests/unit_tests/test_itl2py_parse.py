@@ -0,0 +1,55 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from pyopendds.dev.itl2py.generate import parse_itl_files
+
+kind = {'name': 'IDL:common/Kind:1.0', 'kind': 'alias', 'type': {
+    'kind': 'int', 'bits': 32, 'unsigned': True, 'constrained': True,
+    'values': {'a': '0', 'b': '1'}}}
+
+
+def struct(module, name, field_type):
+    return {'name': 'IDL:{}/{}:1.0'.format(module, name), 'kind': 'alias',
+        'type': {'kind': 'record', 'fields': [{'name': 'field', 'type': field_type}]}}
+
+
+class TestParseItlFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_itl(self, name, types):
+        path = self.dir / name
+        path.write_text(json.dumps({'types': types}))
+        return path
+
+    def parse(self, jobs):
+        # Both files repeat Kind like opendds_idl does for included files and
+        # the last one uses a type it doesn't define.
+        files = [
+            self.write_itl('a.itl', [kind, struct('a', 'A', 'IDL:common/Kind:1.0')]),
+            self.write_itl('b.itl', [kind, struct('b', 'B', 'IDL:common/Kind:1.0')]),
+            self.write_itl('c.itl', [struct('c', 'C', 'IDL:a/A:1.0')]),
+        ]
+        return parse_itl_files(files, jobs)
+
+    def check(self, root_module):
+        common = root_module.submodules['common'].types['IDL:common/Kind:1.0']
+        a = root_module.submodules['a'].types['IDL:a/A:1.0']
+        b = root_module.submodules['b'].types['IDL:b/B:1.0']
+        c = root_module.submodules['c'].types['IDL:c/C:1.0']
+        self.assertIs(a.fields['field'].type_node, common)
+        self.assertIs(b.fields['field'].type_node, common)
+        self.assertIs(c.fields['field'].type_node, a)
+
+    def test_serial(self):
+        self.check(self.parse(1))
+
+    def test_parallel(self):
+        self.check(self.parse(2))
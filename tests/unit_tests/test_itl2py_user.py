@@ -0,0 +1,114 @@
+import json
+import sys
+import tempfile
+import unittest
+from array import array
+from pathlib import Path
+
+from pyopendds.dev.itl2py.generate import generate
+
+package_name = 'pyitl2py_user_test'
+
+types = [
+    {'name': 'IDL:a/Kind:1.0', 'kind': 'alias', 'type': {
+        'kind': 'int', 'bits': 32, 'unsigned': True, 'constrained': True,
+        'values': {'first': '0', 'second': '1'}}},
+    {'name': 'IDL:a/Point:1.0', 'kind': 'alias', 'type': {'kind': 'record', 'fields': [
+        {'name': 'x', 'type': {'kind': 'float', 'model': 'binary64'}},
+        {'name': 'self', 'type': {'kind': 'int', 'bits': 32}},
+    ]}},
+    {'name': 'IDL:b/Shape:1.0', 'kind': 'alias', 'note': {'is_dcps_data_type': True},
+        'type': {'kind': 'record', 'fields': [
+            {'name': 'kind', 'type': 'IDL:a/Kind:1.0'},
+            {'name': 'center', 'type': 'IDL:a/Point:1.0'},
+            {'name': 'corners', 'type': {'kind': 'sequence', 'size': [2],
+                'type': 'IDL:a/Point:1.0'}},
+            {'name': 'values', 'type': {'kind': 'sequence', 'type': {
+                'kind': 'float', 'model': 'binary32'}}},
+            {'name': 'range', 'type': {'kind': 'sequence', 'size': [2], 'type': {
+                'kind': 'int', 'bits': 8, 'unsigned': True}}},
+        ]}},
+    {'name': 'IDL:b/Big:1.0', 'kind': 'alias', 'type': {'kind': 'record', 'fields': [
+        {'name': 'x', 'type': {'kind': 'float', 'model': 'binary128'}},
+    ]}},
+    {'name': 'IDL:b/HasBig:1.0', 'kind': 'alias', 'note': {'is_dcps_data_type': True},
+        'type': {'kind': 'record', 'fields': [
+            {'name': 'big', 'type': 'IDL:b/Big:1.0'},
+        ]}},
+]
+
+
+class TestGeneratedPackage(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        temp_dir = Path(cls.temp_dir.name)
+        itl_file = temp_dir / 'test.itl'
+        itl_file.write_text(json.dumps({'types': types}))
+        generate(dict(
+            idl_library_cmake_name='test_idl',
+            idl_library_build_dir=temp_dir.as_posix(),
+            itl_files=[itl_file],
+            output=temp_dir,
+            package_name=package_name,
+            native_package_name='_' + package_name,
+            default_encoding='utf_8',
+            skip_init=False,
+            lazy_samples=False,
+            intern_strings=None,
+            intern_cache_size=256,
+            benchmarks=False,
+            dry_run=False,
+            dump_ast=False,
+            just_dump_ast=False,
+        ))
+        sys.path.insert(0, cls.temp_dir.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        sys.path.remove(cls.temp_dir.name)
+        for name in list(sys.modules):
+            if name.split('.')[0] == package_name:
+                del sys.modules[name]
+        cls.temp_dir.cleanup()
+
+    def test_lazy_modules(self):
+        package = __import__(package_name)
+        self.assertIn('b', dir(package))
+        shape = package.b.Shape()
+        self.assertIn(package_name + '.a', sys.modules)
+        self.assertIs(type(shape.center), package.a.Point)
+        with self.assertRaises(AttributeError):
+            package.c
+
+    def test_struct(self):
+        from pyitl2py_user_test.a import Kind, Point
+        from pyitl2py_user_test.b import Shape, ShapeView
+
+        shape = Shape()
+        self.assertEqual(Shape._pyopendds_fields,
+            ('kind', 'center', 'corners', 'values', 'range'))
+        self.assertEqual(shape.kind, Kind.first)
+        self.assertEqual(shape.corners, [Point(), Point()])
+        self.assertIsNot(shape.corners[0], shape.corners[1])
+        self.assertEqual(shape.values, array('f'))
+        self.assertEqual(shape.range, b'\x00\x00')
+        self.assertIsNot(Shape().center, shape.center)
+        self.assertIs(ShapeView._pyopendds_type, Shape)
+
+        point = Point(1.5, self=2)
+        self.assertEqual(repr(point), 'Point(x=1.5, self=2)')
+        self.assertEqual(point, Point(x=1.5, self=2))
+        self.assertNotEqual(point, Point(x=1.5))
+        self.assertNotEqual(point, (1.5, 2))
+        with self.assertRaises(TypeError):
+            hash(point)
+
+    def test_not_cdr_decodable(self):
+        from pyitl2py_user_test import b
+
+        self.assertTrue(hasattr(b.Shape, '_pyopendds_cdr_fields'))
+        self.assertFalse(hasattr(b.Big, '_pyopendds_cdr_fields'))
+        self.assertFalse(hasattr(b.HasBig, '_pyopendds_cdr_fields'))
+        self.assertFalse(hasattr(b, 'HasBigView'))
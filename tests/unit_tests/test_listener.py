@@ -0,0 +1,68 @@
+import unittest
+import weakref
+
+from pyopendds import DataReaderListener, StatusKind, LENGTH_UNLIMITED
+from pyopendds.listener import dispatch_reader_event, SampleLostStatus
+
+
+class Listener(DataReaderListener):
+
+    def __init__(self):
+        self.batches = []
+        self.statuses = []
+
+    def on_data_available(self, reader, samples):
+        self.batches.append(samples)
+
+    def on_sample_lost(self, reader, status):
+        self.statuses.append(status)
+
+
+class Reader:
+    '''Stands in for a DataReader with some samples to take
+    '''
+
+    def __init__(self, listener, samples):
+        self.listener = listener
+        self.samples = samples
+
+    def take(self, max_samples):
+        count = len(self.samples) if max_samples == LENGTH_UNLIMITED else max_samples
+        taken = self.samples[:count]
+        del self.samples[:count]
+        return taken
+
+
+class TestListener(unittest.TestCase):
+
+    def test_status_mask(self):
+        self.assertEqual(DataReaderListener().status_mask(), StatusKind(0))
+        self.assertEqual(Listener().status_mask(),
+            StatusKind.DATA_AVAILABLE | StatusKind.SAMPLE_LOST)
+
+    def test_data_available(self):
+        listener = Listener()
+        reader = Reader(listener, [1, 2, 3])
+        dispatch_reader_event(weakref.ref(reader), StatusKind.DATA_AVAILABLE, ())
+        self.assertEqual(listener.batches, [[1, 2, 3]])
+
+    def test_data_available_max_samples(self):
+        listener = Listener()
+        listener.max_samples = 2
+        reader = Reader(listener, [1, 2, 3, 4])
+        dispatch_reader_event(weakref.ref(reader), StatusKind.DATA_AVAILABLE, ())
+        self.assertEqual(listener.batches, [[1, 2], [3, 4]])
+
+    def test_status(self):
+        listener = Listener()
+        reader = Reader(listener, [])
+        dispatch_reader_event(weakref.ref(reader), StatusKind.SAMPLE_LOST, (3, 1))
+        self.assertEqual(listener.statuses, [SampleLostStatus(3, 1)])
+
+    def test_deleted_reader(self):
+        listener = Listener()
+        reader = Reader(listener, [1])
+        reader_ref = weakref.ref(reader)
+        del reader
+        dispatch_reader_event(reader_ref, StatusKind.DATA_AVAILABLE, ())
+        self.assertEqual(listener.batches, [])
@@ -0,0 +1,22 @@
+import unittest
+
+from _pyopendds import Entity, create_subscriber, datareader_wait_for, datareader_stats
+
+
+class TestNativeEntity(unittest.TestCase):
+
+    def test_rejects_non_entity(self):
+        with self.assertRaises(TypeError):
+            create_subscriber(object(), None)
+
+    def test_rejects_empty_entity(self):
+        with self.assertRaises(TypeError):
+            create_subscriber(Entity(), None)
+
+    def test_rejects_wrong_kind(self):
+        with self.assertRaises(TypeError):
+            datareader_wait_for(Entity(), 0, 0, 0)
+
+    def test_stats_rejects_wrong_kind(self):
+        with self.assertRaises(TypeError):
+            datareader_stats(Entity())
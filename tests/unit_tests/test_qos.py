@@ -0,0 +1,92 @@
+import unittest
+from datetime import timedelta
+
+from pyopendds import (
+    ReturnCodeError,
+    HistoryKind,
+    ReliabilityKind,
+    HistoryQosPolicy,
+    ResourceLimitsQosPolicy,
+    ReliabilityQosPolicy,
+    TimeBasedFilterQosPolicy,
+    PartitionQosPolicy,
+    TopicQos,
+    SubscriberQos,
+    DataReaderQos,
+    QosProfile,
+    register_profile,
+)
+from pyopendds.constants import ReturnCode
+from pyopendds.qos import resolve_qos
+
+
+class TestQos(unittest.TestCase):
+
+    def assertRaisesReturnCode(self, rc):
+        return self.assertRaises(ReturnCodeError.subclasses[rc])
+
+    def test_native(self):
+        qos = DataReaderQos(
+            history=HistoryQosPolicy(HistoryKind.KEEP_LAST, 10),
+            reliability=ReliabilityQosPolicy(ReliabilityKind.RELIABLE, timedelta(seconds=1.5)),
+            time_based_filter=TimeBasedFilterQosPolicy(timedelta(milliseconds=2)),
+        )
+        self.assertEqual(qos._native(), {
+            'history': (0, 10),
+            'reliability': (1, 1, 500000000),
+            'time_based_filter': (0, 2000000),
+        })
+
+    def test_partition(self):
+        qos = SubscriberQos(partition=PartitionQosPolicy(['A', 'B*']))
+        self.assertEqual(qos._native(), {'partition': ('A', 'B*')})
+        with self.assertRaisesReturnCode(ReturnCode.BAD_PARAMETER):
+            SubscriberQos(partition=PartitionQosPolicy('A'))._native()
+
+    def test_bad_depth(self):
+        with self.assertRaisesReturnCode(ReturnCode.BAD_PARAMETER) as cm:
+            DataReaderQos(history=HistoryQosPolicy(depth=0))._native()
+        self.assertIn('depth', str(cm.exception))
+
+    def test_bad_duration(self):
+        with self.assertRaisesReturnCode(ReturnCode.BAD_PARAMETER):
+            DataReaderQos(time_based_filter=TimeBasedFilterQosPolicy((-1, 0)))._native()
+
+    def test_inconsistent_resource_limits(self):
+        with self.assertRaisesReturnCode(ReturnCode.INCONSISTENT_POLICY):
+            TopicQos(resource_limits=ResourceLimitsQosPolicy(
+                max_samples=10, max_samples_per_instance=20))._native()
+
+    def test_inconsistent_history(self):
+        with self.assertRaisesReturnCode(ReturnCode.INCONSISTENT_POLICY):
+            TopicQos(
+                history=HistoryQosPolicy(depth=5),
+                resource_limits=ResourceLimitsQosPolicy(max_samples_per_instance=2),
+            )._native()
+
+    def test_with_topic_qos(self):
+        history = HistoryQosPolicy(HistoryKind.KEEP_ALL)
+        topic_qos = TopicQos(
+            history=HistoryQosPolicy(depth=3),
+            reliability=ReliabilityQosPolicy(ReliabilityKind.RELIABLE),
+        )
+        qos = DataReaderQos(history=history).with_topic_qos(topic_qos)
+        self.assertIs(qos.history, history)
+        self.assertIs(qos.reliability, topic_qos.reliability)
+        self.assertIsNone(qos.time_based_filter)
+
+    def test_profiles(self):
+        profile = QosProfile(datareader=DataReaderQos(history=HistoryQosPolicy(depth=4)))
+        register_profile('test_profiles', profile)
+        self.assertIs(resolve_qos('test_profiles', DataReaderQos, 'datareader'),
+            profile.datareader)
+        self.assertIs(resolve_qos(profile, DataReaderQos, 'datareader'), profile.datareader)
+        self.assertIsNone(resolve_qos('test_profiles', TopicQos, 'topic'))
+        reliable = resolve_qos('reliable', DataReaderQos, 'datareader')
+        self.assertEqual(reliable.reliability.kind, ReliabilityKind.RELIABLE)
+        with self.assertRaisesReturnCode(ReturnCode.BAD_PARAMETER):
+            resolve_qos('not_a_profile', DataReaderQos, 'datareader')
+
+    def test_wrong_type(self):
+        with self.assertRaisesReturnCode(ReturnCode.BAD_PARAMETER):
+            resolve_qos(TopicQos(), DataReaderQos, 'datareader')
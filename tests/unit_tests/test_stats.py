@@ -0,0 +1,31 @@
+import unittest
+
+from pyopendds.util import sum_stats
+
+
+def reader_stats(samples, string_caches):
+    return dict(samples=samples, batches=1, bytes=samples * 16, wait_ns=10, take_ns=20,
+        convert_ns=30, backlog=2, string_caches=string_caches)
+
+
+class TestSumStats(unittest.TestCase):
+
+    def test_empty(self):
+        total = sum_stats([])
+        self.assertEqual(total['samples'], 0)
+        self.assertEqual(total['string_caches'], {})
+
+    def test_sum(self):
+        cache = {'basic.Reading.where': dict(hits=3, misses=1)}
+        total = sum_stats([reader_stats(5, cache), reader_stats(7, cache)])
+        self.assertEqual(total['samples'], 12)
+        self.assertEqual(total['batches'], 2)
+        self.assertEqual(total['bytes'], 192)
+        self.assertEqual(total['convert_ns'], 60)
+        self.assertEqual(total['backlog'], 4)
+        # Shared caches are counted once
+        self.assertEqual(total['string_caches'], cache)
+
+    def test_sum_of_sums(self):
+        total = sum_stats([sum_stats([reader_stats(1, {})]), sum_stats([reader_stats(2, {})])])
+        self.assertEqual(total['samples'], 3)